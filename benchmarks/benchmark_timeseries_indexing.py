@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark of the indexing of an xarray TimeSeries along a dimension of 10k coordinates,
+by mixed label/integer selections, comparing the current resolution of all indices, via cached label -> index dicts,
+with the previous path of TimeSeries.__getitem__, which tried integer indexing, then .loc, and then resolved
+any remaining labels by a search through a new list of all labels of their dimension.
+Timings depend on the machine, and, thus, are only reported, e.g.:
+  python benchmarks/benchmark_timeseries_indexing.py
+"""
+
+import timeit
+
+import numpy
+from six import string_types
+
+from tvb_scripts.datatypes.time_series_xarray import TimeSeries
+from tvb_scripts.utils.data_structures_utils import is_integer
+
+
+def _labels_dimensions(data):
+    # The previous labels_dimensions property, computed anew at every call
+    return dict([(key, value.values) for key, value in data.coords.items()])
+
+
+def _resolve_mixed_slice(data, slice_tuple):
+    # The previous resolution of labels by a search through all labels of their dimension
+    slice_list = []
+    for idx, current_slice in enumerate(slice_tuple):
+        if isinstance(current_slice, slice):
+            slice_list.append(current_slice)
+        else:
+            current_slice = list(current_slice)
+            for i_slc, slc in enumerate(current_slice):
+                if isinstance(slc, string_types) or isinstance(slc, float):
+                    current_slice[i_slc] = _labels_dimensions(data)[data.dims[idx]].tolist().index(slc)
+            slice_list.append(current_slice)
+    return tuple(slice_list)
+
+
+def getitem_before(data, slice_tuple):
+    # The previous trial and error indexing of the xarray.DataArray data of a TimeSeries
+    slice_tuple = tuple([[slc] if is_integer(slc) or isinstance(slc, string_types) else slc for slc in slice_tuple])
+    try:
+        return data[slice_tuple]
+    except Exception:
+        try:
+            return data.loc[slice_tuple]
+        except Exception:
+            return data[_resolve_mixed_slice(data, slice_tuple)]
+
+
+def getitem_after(ts, slice_tuple):
+    return ts._data[ts._resolve_indices(slice_tuple)]
+
+
+def main(n_regions=10000, number=20, repeat=5):
+    ts = TimeSeries(numpy.random.rand(10, 3, n_regions, 1), start_time=0.0, sample_period=0.5,
+                    labels_ordering=["Time", "State Variable", "Region", "Mode"],
+                    labels_dimensions={"State Variable": ["x1", "x2", "z"],
+                                       "Region": ["r%d" % i_region for i_region in range(n_regions)]})
+    selections = {"mixed labels and integers": (slice(None), "x2", ["r9000", 3, "r5000"]),
+                  "labels": (slice(None), "x2", ["r9000", "r3", "r5000"])}
+    for name, slice_tuple in selections.items():
+        assert numpy.array_equal(getitem_before(ts._data, slice_tuple).values,
+                                 getitem_after(ts, slice_tuple).values)
+        time_before = min(timeit.repeat(lambda: getitem_before(ts._data, slice_tuple),
+                                        number=number, repeat=repeat)) / number
+        time_after = min(timeit.repeat(lambda: getitem_after(ts, slice_tuple),
+                                       number=number, repeat=repeat)) / number
+        print("%s: %.3f ms before, %.3f ms after, %.1fx speed-up"
+              % (name, 1000 * time_before, 1000 * time_after, time_before / time_after))
+
+
+if __name__ == "__main__":
+    main()
@@ -19,11 +19,15 @@ VERSION = "1.0.0"
 
 INSTALL_REQUIREMENTS = ["pandas", "xarray"]
 
+# Optional requirements, e.g., dask for chunked xarray TimeSeries, zarr or netCDF4 for their stores
+EXTRAS_REQUIREMENTS = {"dask": ["dask[array]"], "zarr": ["zarr", "dask[array]"], "netcdf": ["netCDF4", "dask[array]"]}
+
 setuptools.setup(name='tvb-scripts',
                  version=VERSION,
                  packages=setuptools.find_packages(),
                  include_package_data=True,
                  install_requires=INSTALL_REQUIREMENTS,
+                 extras_require=EXTRAS_REQUIREMENTS,
                  description='A package with helper functions, '
                              'some additional datatypes, '
                              'plotting functions, '
@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
 
-from copy import deepcopy
+from copy import copy, deepcopy
 from enum import Enum
+from itertools import count
 
 import numpy
+from numpy.lib.mixins import NDArrayOperatorsMixin
+from numpy.lib.stride_tricks import as_strided
 from six import string_types
-from tvb.basic.neotraits.api import List, Attr
+from tvb.basic.neotraits.api import List, Attr, NArray
+from tvb.basic.neotraits.ex import TraitTypeError, TraitValueError
 from tvb.basic.profile import TvbProfile
 from tvb.datatypes.sensors import Sensors, SensorsEEG, SensorsMEG, SensorsInternal
 from tvb.datatypes.time_series import TimeSeries as TimeSeriesTVB
@@ -16,7 +20,8 @@ from tvb.datatypes.time_series import TimeSeriesSEEG as TimeSeriesSEEGTVB
 from tvb.datatypes.time_series import TimeSeriesSurface as TimeSeriesSurfaceTVB
 from tvb.datatypes.time_series import TimeSeriesVolume as TimeSeriesVolumeTVB
 
-from tvb_scripts.utils.data_structures_utils import ensure_list, is_integer, monopolar_to_bipolar
+from tvb_scripts.utils.data_structures_utils import ensure_list, is_integer, is_float, monopolar_to_bipolar, \
+    read_only_view
 from tvb_scripts.utils.log_error_utils import initialize_logger, warning
 
 TvbProfile.set_profile(TvbProfile.LIBRARY_PROFILE)
@@ -65,23 +70,250 @@ def prepare_4d(data, logger):
     return data
 
 
+class RegularTimeAxis(NDArrayOperatorsMixin):
+    """
+    Compact representation of a regularly sampled time vector by its start, period and length,
+    which is materialized only on demand, e.g., via numpy.array(time_axis), or time_axis.values.
+    Time points are computed as start + index * period, avoiding any accumulation of float errors,
+    and conversion of time to index is O(1).
+    Otherwise, it behaves as a 1D ndarray: arithmetic, comparisons and numpy functions return ndarrays,
+    and any other ndarray methods, e.g., min(), copy(), tolist() or astype(), are applied to its time points,
+    which are materialized once, and cached, as a read-only array.
+    """
+
+    dtype = numpy.dtype("float64")
+    ndim = 1
+
+    def __init__(self, start=0.0, period=1.0, length=0):
+        self.start = float(start)
+        self.period = float(period)
+        self.length = int(length)
+
+    @property
+    def shape(self):
+        return (self.length,)
+
+    @property
+    def size(self):
+        return self.length
+
+    @property
+    def end(self):
+        return self.start + (self.length - 1) * self.period
+
+    @property
+    def values(self):
+        return self.start + numpy.arange(self.length) * self.period
+
+    @property
+    def _cached_values(self):
+        key = (self.start, self.period, self.length)
+        cache = self.__dict__.get("_cache", None)
+        if cache is None or cache[0] != key:
+            cache = (key, read_only_view(self.values))
+            self.__dict__["_cache"] = cache
+        return cache[1]
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if any(isinstance(output, RegularTimeAxis) for output in kwargs.get("out", ())):
+            return NotImplemented
+        inputs = tuple(inp._cached_values if isinstance(inp, RegularTimeAxis) else inp for inp in inputs)
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def __getattr__(self, attr):
+        # Any other ndarray attributes and methods, e.g., min(), max(), copy(), tolist(), astype()
+        if not attr.startswith("_"):
+            try:
+                return getattr(self._cached_values, attr)
+            except AttributeError:
+                pass
+        raise AttributeError("%r object has no attribute %r" % (self.__class__.__name__, attr))
+
+    def __len__(self):
+        return self.length
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None:
+            return self.values
+        return self.values.astype(dtype)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __eq__(self, other):
+        if isinstance(other, RegularTimeAxis):
+            return self.start == other.start and self.period == other.period and self.length == other.length
+        return self.values == other
+
+    def __ne__(self, other):
+        return numpy.logical_not(self.__eq__(other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "%s(start=%s, period=%s, length=%d)" % (self.__class__.__name__, self.start, self.period, self.length)
+
+    def index_of(self, time):
+        # The index of the time point nearest to time
+        if self.period == 0:
+            # e.g., for a single sample, all time points are equal to start,
+            # and, as for an irregular time vector, the first one of them is the nearest
+            return int(numpy.argmin(numpy.abs(self.values - time)))
+        return int(numpy.round((time - self.start) / self.period))
+
+    def __getitem__(self, index):
+        if is_integer(index):
+            if index < 0:
+                index += self.length
+            if index < 0 or index >= self.length:
+                raise IndexError("Index %d out of range for %s of length %d!"
+                                 % (index, self.__class__.__name__, self.length))
+            return self.start + index * self.period
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.length)
+            return RegularTimeAxis(self.start + start * self.period, step * self.period,
+                                   len(range(start, stop, step)))
+        return self._cached_values[index]
+
+
+class SharedNArray(NArray):
+    """
+    An NArray trait that does not copy the arrays it is set to,
+    unless they need to be cast to its dtype,
+    so that TimeSeries instances can share their data buffers.
+    Floating point arrays keep their precision, e.g., float32 data are not upcast to float64.
+    It also accepts array-like proxies, e.g., an H5DataProxy of a lazily read file.
+    """
+
+    def _validate_set(self, instance, value):
+        if not isinstance(value, numpy.ndarray) and hasattr(value, "__array__") and hasattr(value, "shape"):
+            # Array-like proxies, e.g., of lazily read files, are set as they are
+            return value
+        value = Attr._validate_set(self, instance, value)
+        if value is None:
+            return
+        if self.ndim is not None and value.ndim != self.ndim:
+            raise TraitValueError("can't be set to an array with ndim {}".format(value.ndim), attr=self)
+        if numpy.issubdtype(self.dtype, numpy.floating) and numpy.issubdtype(value.dtype, numpy.floating):
+            return value
+        if not numpy.can_cast(value.dtype, self.dtype, 'safe'):
+            raise TraitTypeError("can't be set to an array of dtype {}".format(value.dtype), attr=self)
+        return value.astype(self.dtype, copy=False)
+
+
+# Versions of LabelsDict instances, unique across all instances
+_labels_versions = count()
+
+
+class LabelsDict(dict):
+    """
+    A dict of the labels of each dimension of a TimeSeries, with a version,
+    which changes whenever labels are set or deleted,
+    so that lookups cached per version remain valid without checking the labels themselves.
+    Labels are stored as read-only arrays, so that they cannot be modified in place, but only set anew.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(LabelsDict, self).__init__()
+        self.version = next(_labels_versions)
+        self.update(*args, **kwargs)
+
+    @staticmethod
+    def _read_only_labels(labels):
+        if labels is None or \
+                (isinstance(labels, numpy.ndarray) and not labels.flags.writeable and labels.base is None):
+            return labels
+        labels = numpy.array(labels)
+        labels.flags.writeable = False
+        return labels
+
+    def __setitem__(self, dimension, labels):
+        super(LabelsDict, self).__setitem__(dimension, self._read_only_labels(labels))
+        self.version = next(_labels_versions)
+
+    def __delitem__(self, dimension):
+        super(LabelsDict, self).__delitem__(dimension)
+        self.version = next(_labels_versions)
+
+    def update(self, *args, **kwargs):
+        for dimension, labels in dict(*args, **kwargs).items():
+            self[dimension] = labels
+
+    def setdefault(self, dimension, labels=None):
+        if dimension not in self:
+            self[dimension] = labels
+        return self[dimension]
+
+    def pop(self, dimension, *args):
+        self.version = next(_labels_versions)
+        return super(LabelsDict, self).pop(dimension, *args)
+
+    def popitem(self):
+        self.version = next(_labels_versions)
+        return super(LabelsDict, self).popitem()
+
+    def clear(self):
+        super(LabelsDict, self).clear()
+        self.version = next(_labels_versions)
+
+
+class LabelsDimensions(Attr):
+    """
+    An Attr trait of a LabelsDict, to which any dict of labels it is set to is converted.
+    """
+
+    def _validate_set(self, instance, value):
+        value = Attr._validate_set(self, instance, value)
+        if value is None:
+            return
+        return LabelsDict(value)
+
+
 class TimeSeries(TimeSeriesTVB):
     logger = initialize_logger(__name__)
 
-    def __init__(self, data=None, **kwargs):
+    data = SharedNArray(
+        label="Time-series data",
+        doc="""An array of time-series data, with a shape of [tpts, :], where ':' represents 1 or more dimensions""")
+
+    labels_dimensions = LabelsDimensions(
+        field_type=dict,
+        default=LabelsDict,
+        label="Specific labels for each dimension for the data stored in this timeseries.",
+        doc="""A dictionary containing mappings of the form {'dimension_name' : [labels for this dimension] },
+            which are stored as read-only arrays.""")
+
+    time = SharedNArray(
+        label="Time-series time",
+        required=False,
+        doc="""An array of time values for the time-series, with a shape of [tpts,],
+            or, for regularly sampled time-series, a RegularTimeAxis,
+            computed from start_time, sample_period and the length of the data.""")
+
+    def __init__(self, data=None, share_data=False, **kwargs):
+        # Writeable input arrays are copied, so that writing to the TimeSeries does not modify them,
+        # unless share_data is True, e.g., for shared memory or memory mapped files to be written to,
+        # in which case the TimeSeries writes in place to the input buffer.
+        # Read-only input arrays are shared without copies, and copied only if written to.
         super(TimeSeries, self).__init__(**kwargs)
         if data is not None:
             self.data = prepare_4d(data, self.logger)
+            if isinstance(self.data, numpy.ndarray) and self.data.flags.writeable:
+                if not share_data and numpy.may_share_memory(self.data, data):
+                    self.data = numpy.array(self.data)
+                self._own_data()
             self.configure()
 
     def from_xarray_DataArray(self, xrdtarr, **kwargs):
         # We assume that time is in the first dimension
+        # Data and labels are not copied, and an input time kwarg, e.g., a RegularTimeAxis, is preferred.
         labels_ordering = xrdtarr.coords.dims
         labels_dimensions = {}
         for dim in labels_ordering[1:]:
-            labels_dimensions[dim] = numpy.array(xrdtarr.coords[dim].values)
+            labels_dimensions[dim] = xrdtarr.coords[dim].values
         if xrdtarr.name is not None and len(xrdtarr.name) > 0:
             kwargs.update({"title": xrdtarr.name})
+        time = kwargs.pop("time", None)
         if xrdtarr.size == 0:
             return self.duplicate(data=numpy.empty((0, 0, 0, 0)),
                                   time=numpy.empty((0,)),
@@ -89,19 +321,85 @@ class TimeSeries(TimeSeriesTVB):
                                   labels_dimensions=labels_dimensions,
                                   **kwargs)
         return self.duplicate(data=xrdtarr.values,
-                              time=numpy.array(xrdtarr.coords[labels_ordering[0]].values),
+                              time=xrdtarr.coords[labels_ordering[0]].values if time is None else time,
                               labels_ordering=labels_ordering,
                               labels_dimensions=labels_dimensions,
                               **kwargs)
 
-    def duplicate(self, **kwargs):
-        duplicate = deepcopy(self)
+    def _share_data(self, data=None):
+        # Copy-on-write: return a read-only view of self's data buffer, or of data, e.g., a slice of it,
+        # to be shared with another TimeSeries instance, which copies it the first time it writes to it.
+        # self's data remain writeable, but self copies them before writing to them via __setitem__,
+        # or in place operations, so that the TimeSeries that share them are not affected.
+        if data is None:
+            data = self.data
+        if isinstance(data, numpy.ndarray) and isinstance(self.data, numpy.ndarray):
+            self.__dict__["_shared_data"] = self.data
+            return read_only_view(data)
+        return data
+
+    def _own_data(self):
+        # Mark the current data buffer as owned by self, which, thus, writes to it in place
+        self.__dict__["_owned_data"] = self.data
+
+    def _owns_data(self):
+        return self.__dict__.get("_owned_data", None) is self.data
+
+    def _ensure_writeable_data(self):
+        # Copy-on-write: data shared with other TimeSeries, read-only, or not owned by self,
+        # e.g., set directly to an array of the caller, are copied the first time they are written to
+        if isinstance(self.data, numpy.ndarray):
+            if not self.data.flags.writeable or not self._owns_data() or \
+                    self.__dict__.get("_shared_data", None) is self.data:
+                self.data = numpy.array(self.data)
+            self._own_data()
+        self.__dict__.pop("_shared_data", None)
+        return self.data
+
+    def duplicate(self, deep_copy=False, **kwargs):
+        # Input data kwargs are taken over by the duplicate, which owns them,
+        # unless they may be views of self's data buffer, e.g., slices, which are shared in a copy-on-write way.
+        data = kwargs.get("data", None)
+        owns_data = data is None or (isinstance(data, numpy.ndarray) and
+                                     not numpy.may_share_memory(data, getattr(self, "data", None)))
+        if deep_copy:
+            duplicate = deepcopy(self)
+            if data is None and numpy.may_share_memory(duplicate.data, self.data):
+                # SharedNArray does not copy upon setting the data of the deepcopy
+                duplicate.data = numpy.array(self.data)
+        else:
+            # Only metadata are copied,
+            # whereas connectivity, sensors, surface, etc, are shared by reference.
+            # The data buffer is either replaced by an input data kwarg,
+            # or shared, in a copy-on-write way, with the duplicated instance.
+            duplicate = copy(self)
+            owns_data = owns_data and data is not None
+            duplicate.__dict__.pop("_shared_data", None)
+            duplicate.__dict__.pop("_owned_data", None)
+            duplicate.labels_dimensions = dict(self.labels_dimensions)
+            duplicate.tags = dict(self.tags)
+            duplicate._clear_labels_indices()
+            if data is None and self.data is not None:
+                duplicate.data = self._share_data()
+            elif isinstance(data, numpy.ndarray) and isinstance(self.data, numpy.ndarray) and \
+                    numpy.may_share_memory(data, self.data):
+                # Input data that may be views of self's data buffer, e.g., slices, are shared as well
+                kwargs["data"] = self._share_data(data)
+        if "time" not in kwargs and isinstance(duplicate.time, RegularTimeAxis):
+            # A regular time axis is computed again from start_time, sample_period and the data length
+            duplicate.time = None
         for attr, value in kwargs.items():
             setattr(duplicate, attr, value)
         duplicate.data = prepare_4d(duplicate.data, self.logger)
+        if owns_data and isinstance(duplicate.data, numpy.ndarray):
+            duplicate._own_data()
         duplicate.configure()
         return duplicate
 
+    def astype(self, dtype, **kwargs):
+        # A duplicate with data of another precision, e.g., float32, which the TimeSeriesService will then keep
+        return self.duplicate(data=numpy.asarray(self.data).astype(dtype, copy=False), **kwargs)
+
     def _assert_index(self, index):
         assert (index >= 0 and index < self.number_of_dimensions)
         return index
@@ -131,6 +429,22 @@ class TimeSeries(TimeSeriesTVB):
                               (dimension_label_or_index, self.data.shape))
             raise
 
+    def _clear_labels_indices(self):
+        self.__dict__["_labels_indices"] = {}
+
+    def _get_labels_indices(self, dimension):
+        # Hash map of the labels of this dimension to their indices,
+        # cached per dimension name, as long as the version of the labels, which changes whenever they are set, holds
+        version = getattr(self.labels_dimensions, "version", None)
+        cache = self.__dict__.setdefault("_labels_indices", {})
+        cached_version, labels_indices = cache.get(dimension, (None, None))
+        if version is None or cached_version != version:
+            labels = self.get_dimension_labels(dimension)
+            # Iterate in reverse so that, as with list.index, the first occurrence of a repeated label wins
+            labels_indices = dict((label, index) for index, label in reversed(list(enumerate(labels))))
+            cache[dimension] = (version, labels_indices)
+        return labels_indices
+
     def update_dimension_names(self, dim_names, dim_indices=None):
         dim_names = ensure_list(dim_names)
         if dim_indices is None:
@@ -148,14 +462,16 @@ class TimeSeries(TimeSeriesTVB):
             except:
                 pass
         self.labels_ordering = labels_ordering
+        self._clear_labels_indices()
 
     def _check_indices(self, indices, dimension):
         dim_index = self.get_dimension_index(dimension)
-        for index in ensure_list(indices):
-            if index < 0 or index > self.data.shape[dim_index]:
-                self.logger.error("Some of the given indices are out of %s range: [0, %s]",
-                                  (self.get_dimension_name(dim_index), self.data.shape[dim_index]))
-                raise IndexError
+        # All indices are checked at once
+        indices = numpy.array(ensure_list(indices))
+        if indices.size > 0 and (indices.min() < 0 or indices.max() > self.data.shape[dim_index]):
+            self.logger.error("Some of the given indices are out of %s range: [0, %s]",
+                              (self.get_dimension_name(dim_index), self.data.shape[dim_index]))
+            raise IndexError
 
     def _check_space_indices(self, list_of_index):
         self._check_indices(list_of_index, 2)
@@ -164,16 +480,16 @@ class TimeSeries(TimeSeriesTVB):
         self._check_indices(list_of_index, 1)
 
     def _get_index_of_label(self, labels, dimension):
-        indices = []
-        data_labels = list(self.get_dimension_labels(dimension))
-        for label in ensure_list(labels):
-            try:
-                indices.append(data_labels.index(label))
-            except IndexError:
-                self.logger.error("Cannot access index of %s label: %s. Existing %s labels: %s" % (
-                    dimension, label, dimension, str(data_labels)))
-                raise
-        return indices
+        labels_indices = self._get_labels_indices(dimension)
+        labels = ensure_list(labels)
+        try:
+            # All labels are looked up at once
+            return list(map(labels_indices.__getitem__, labels))
+        except KeyError:
+            missing_labels = [label for label in labels if label not in labels_indices]
+            self.logger.error("Cannot access index of %s labels: %s. Existing %s labels: %s" % (
+                dimension, str(missing_labels), dimension, str(self.get_dimension_labels(dimension))))
+            raise IndexError("%s labels %s not found!" % (dimension, str(missing_labels)))
 
     def _process_slice(self, slice_arg, idx):
         if isinstance(slice_arg, slice):
@@ -185,6 +501,9 @@ class TimeSeries(TimeSeriesTVB):
                 return slice_arg
 
     def _process_slice_tuple(self, slice_tuple):
+        if not isinstance(slice_tuple, tuple):
+            # e.g., an Ellipsis, an integer, or a slice of the first dimension
+            slice_tuple = (slice_tuple,)
         n_slices = len(slice_tuple)
         assert (n_slices >= 0 and n_slices <= self.number_of_dimensions)
         slice_list = []
@@ -192,29 +511,24 @@ class TimeSeries(TimeSeriesTVB):
             slice_list.append(self._process_slice(current_slice, idx))
         return tuple(slice_list)
 
-    def _slice_to_indices(self, slices, dim_index):
-        indices = []
-        for slice in ensure_list(slices):
-            if slice.start is None:
-                start = 0
-            else:
-                start = slice.start
-            if slice.stop is None:
-                stop = self.data.shape[dim_index]
-            else:
-                stop = slice.stop
-            if slice.step is None:
-                step = 1
-            else:
-                step = slice.step
-
-                slice.step = 1
-            indices.append(list(range(start, stop, step)))
-        if len(indices) == 1:
-            return indices[0]
-        return tuple(indices)
+    @staticmethod
+    def _indices_to_slice(indices):
+        # Return a slice equivalent to the input indices, if they are regularly spaced in increasing order,
+        # so that the data can be sliced by basic indexing, returning a view instead of a copy
+        indices = numpy.array(indices)
+        if indices.ndim != 1 or indices.size == 0 or indices.dtype.kind not in "iu" or indices.min() < 0:
+            return None
+        if indices.size == 1:
+            return slice(int(indices[0]), int(indices[0]) + 1)
+        steps = numpy.diff(indices)
+        if steps[0] > 0 and numpy.all(steps == steps[0]):
+            return slice(int(indices[0]), int(indices[-1]) + 1, int(steps[0]))
+        return None
 
     def _get_index_for_slice_label(self, slice_label, slice_idx):
+        if slice_idx == 0 and is_float(slice_label):
+            # Time units
+            return self._get_index_for_time_unit(slice_label)
         return self._get_index_of_label(slice_label,
                                         self.get_dimension_name(slice_idx))[0]
 
@@ -233,22 +547,96 @@ class TimeSeries(TimeSeriesTVB):
     def _get_string_slice_index(self, current_slice_string, slice_idx):
         return self._get_index_for_slice_label(current_slice_string, slice_idx)
 
-    def slice_data_across_dimension_by_index(self, indices, dimension, **kwargs):
-        dim_index = self.get_dimension_index(dimension)
-        indices = ensure_list(indices)
+    def _resolve_dimension_index(self, inputs, dim_index):
+        # Resolve any combination of integer indices, labels, time units and slices of a dimension
+        # to either a slice, or a list of integer indices, which do not reduce the dimensionality
+        if isinstance(inputs, slice):
+            index = self._process_slice(inputs, dim_index)
+            if is_integer(index):
+                return slice(index, index + 1)
+            return index
+        if isinstance(inputs, numpy.ndarray) and inputs.dtype.kind in "iu":
+            indices = inputs.ravel().tolist()
+        else:
+            inputs = ensure_list(inputs)
+            # All labels are resolved at once, with a single pass over the cached map of labels to indices
+            labels = [inp for inp in inputs if isinstance(inp, string_types)]
+            if len(labels) == len(inputs):
+                indices = self._get_index_of_label(labels, self.get_dimension_name(dim_index))
+            else:
+                labels_indices = iter(self._get_index_of_label(labels, self.get_dimension_name(dim_index))
+                                      if len(labels) > 0 else [])
+                indices = []
+                for inp in inputs:
+                    if isinstance(inp, slice):
+                        indices += \
+                            numpy.arange(self.data.shape[dim_index])[self._process_slice(inp, dim_index)].tolist()
+                    elif isinstance(inp, string_types):
+                        indices.append(next(labels_indices))
+                    elif is_float(inp):
+                        indices.append(self._get_index_for_slice_label(inp, dim_index))
+                    else:
+                        indices.append(inp)
         self._check_indices(indices, dim_index)
-        slices = [slice(None)] * 4
-        slices[dim_index] = indices
-        data = self.data[tuple(slices)]
-        labels_dimensions = deepcopy(self.labels_dimensions)
-        try:
-            labels_dimensions[self.get_dimension_name(dim_index)] = \
-                (numpy.array(labels_dimensions[self.get_dimension_name(dim_index)])[indices]).tolist()
-        except:
-            self.logger.warn("Failed to get labels subset for indices %s of dimension %d!"
-                             % (str(indices), dim_index))
-            labels_dimensions[self.get_dimension_name(dim_index)] = []
-        return self.duplicate(data=data, labels_dimensions=labels_dimensions, **kwargs)
+        index_slice = self._indices_to_slice(indices)
+        if index_slice is not None:
+            return index_slice
+        return indices
+
+    def _read_data_from_indices(self, indices):
+        # A single read of the data for all dimensions together:
+        # basic slices return a read-only view, shared in a copy-on-write way (see _share_data()),
+        # and a single list index is applied orthogonally by numpy.
+        # Lazily read files' proxies index orthogonally as well, reading a single hyperslab.
+        fancy_dims = [dim for dim, index in enumerate(indices) if not isinstance(index, slice)]
+        if len(fancy_dims) == 0:
+            return self._share_data(self.data[tuple(indices)])
+        if len(fancy_dims) < 2 or not isinstance(self.data, numpy.ndarray):
+            return self.data[tuple(indices)]
+        # For more than one list indices, apply first the basic slices, returning a view,
+        # and then all list indices at once, orthogonally, via numpy.ix_
+        data = self.data[tuple([slice(None) if dim in fancy_dims else index for dim, index in enumerate(indices)])]
+        return data[numpy.ix_(*[indices[dim] if dim in fancy_dims else numpy.arange(dim_length)
+                                for dim, dim_length in enumerate(data.shape)])]
+
+    def _get_time_kwargs_for_index(self, time_index):
+        # start_time and sample_period are set by configure from the time subset
+        return {"time": self.time[time_index]}
+
+    def slice_data_across_dimensions(self, inputs, **kwargs):
+        # Selection planner for all dimensions together:
+        # inputs is either a sequence of up to 4 inputs, one per dimension in order,
+        # or a dictionary of inputs per dimension name or index,
+        # each input being any combination of integer indices, labels, time units (for time) and slices.
+        # All inputs are resolved first, then the data are read once, and the TimeSeries is duplicated once.
+        if not isinstance(inputs, dict):
+            inputs = dict(enumerate(ensure_list(inputs)))
+        indices = [slice(None)] * 4
+        for dimension, dim_inputs in inputs.items():
+            dim_index = self.get_dimension_index(dimension)
+            indices[dim_index] = self._resolve_dimension_index(dim_inputs, dim_index)
+        labels_dimensions = dict(self.labels_dimensions)
+        for dim_index, index in enumerate(indices):
+            if index == slice(None):
+                continue
+            dim_name = self.get_dimension_name(dim_index)
+            if dim_name in labels_dimensions:
+                try:
+                    labels_dimensions[dim_name] = (numpy.array(labels_dimensions[dim_name])[index]).tolist()
+                except:
+                    self.logger.warn("Failed to get labels subset for indices %s of dimension %d!"
+                                     % (str(index), dim_index))
+                    labels_dimensions[dim_name] = []
+        time_kwargs = {}
+        if indices[0] != slice(None):
+            time_kwargs = self._get_time_kwargs_for_index(indices[0])
+        time_kwargs.update(kwargs)
+        return self.duplicate(data=self._read_data_from_indices(indices),
+                              labels_dimensions=labels_dimensions, **time_kwargs)
+
+    def slice_data_across_dimension_by_index(self, indices, dimension, **kwargs):
+        return self.slice_data_across_dimensions({self.get_dimension_index(dimension): ensure_list(indices)},
+                                                 **kwargs)
 
     def slice_data_across_dimension_by_label(self, labels, dimension, **kwargs):
         dim_index = self.get_dimension_index(dimension)
@@ -258,11 +646,8 @@ class TimeSeries(TimeSeriesTVB):
             dim_index, **kwargs)
 
     def slice_data_across_dimension_by_slice(self, slice_arg, dimension, **kwargs):
-        dim_index = self.get_dimension_index(dimension)
-        return self.slice_data_across_dimension_by_index(
-            self._slice_to_indices(
-                self._process_slice(slice_arg, dim_index), dim_index),
-            dim_index, **kwargs)
+        # Contiguous or strided slices are applied as basic slices, returning views of the data
+        return self.slice_data_across_dimensions({self.get_dimension_index(dimension): slice_arg}, **kwargs)
 
     def _index_or_label_or_slice(self, inputs):
         inputs = ensure_list(inputs)
@@ -282,10 +667,7 @@ class TimeSeries(TimeSeriesTVB):
                        self._index_or_label_or_slice(inputs))(inputs, dim_index, **kwargs)
 
     def get_data_from_slice(self, slice_tuple, **kwargs):
-        output_data = self.slice_data_across_dimension_by_slice(slice_tuple[0], **kwargs)
-        for this_slice in enumerate(slice_tuple[1:]):
-            output_data = output_data.slice_data_across_dimension_by_slice(this_slice, **kwargs)
-        return output_data
+        return self.slice_data_across_dimensions(slice_tuple, **kwargs)
 
     def get_times_by_index(self, list_of_times_indices, **kwargs):
         return self.slice_data_across_dimension_by_index(list_of_times_indices, 0, **kwargs)
@@ -316,7 +698,7 @@ class TimeSeries(TimeSeriesTVB):
     def get_subspace_by_index(self, list_of_index, **kwargs):
         return self.slice_data_across_dimension_by_index(list_of_index, 2, **kwargs)
 
-    def get_subspace_by_label(self, list_of_labels):
+    def get_subspace_by_label(self, list_of_labels, **kwargs):
         return self.slice_data_across_dimension_by_label(list_of_labels, 2, **kwargs)
 
     def get_subspace_by_slice(self, slice_arg, **kwargs):
@@ -330,7 +712,7 @@ class TimeSeries(TimeSeriesTVB):
     def get_modes_by_index(self, list_of_index, **kwargs):
         return self.slice_data_across_dimension_by_index(list_of_index, 3, **kwargs)
 
-    def get_modes_by_label(self, list_of_labels):
+    def get_modes_by_label(self, list_of_labels, **kwargs):
         return self.slice_data_across_dimension_by_label(list_of_labels, 3, **kwargs)
 
     def get_modes_by_slice(self, slice_arg, **kwargs):
@@ -355,6 +737,7 @@ class TimeSeries(TimeSeriesTVB):
         return self.data[self._process_slice_tuple(slice_tuple)]
 
     def __setitem__(self, slice_tuple, values):
+        self._ensure_writeable_data()
         self.data[self._process_slice_tuple(slice_tuple)] = values
 
     @property
@@ -422,18 +805,53 @@ class TimeSeries(TimeSeriesTVB):
         return self.start_time + time_index * self.sample_period
 
     def _get_index_for_time_unit(self, time_unit):
-        return int((time_unit - self.start_time) / self.sample_period)
+        if isinstance(self.time, RegularTimeAxis):
+            return self.time.index_of(time_unit)
+        # The index of the nearest time point of an irregular time vector
+        return int(numpy.argmin(numpy.abs(self.time - time_unit)))
 
     def get_time_window(self, index_start, index_end, **kwargs):
         if index_start < 0 or index_end > self.data.shape[0]:
             self.logger.error("The time indices are outside time series interval: [%s, %s]" %
                               (0, self.data.shape[0]))
             raise IndexError
-        subtime_data = self.data[index_start:index_end, :, :, :]
+        # A read-only view, shared in a copy-on-write way (see _share_data())
+        subtime_data = self._share_data(self.data[index_start:index_end, :, :, :])
         if subtime_data.ndim == 3:
             subtime_data = numpy.expand_dims(subtime_data, 0)
         return self.duplicate(data=subtime_data, start_time=self._get_time_unit_for_index(index_start), **kwargs)
 
+    def _get_windows_starts(self, length, step=None):
+        if step is None:
+            step = length
+        if length < 1 or step < 1 or length > self.time_length:
+            self.logger.error("Window length %s and step %s should be positive, "
+                              "and the length should not exceed the time length %d!"
+                              % (str(length), str(step), self.time_length))
+            raise ValueError
+        return range(0, self.time_length - length + 1, step)
+
+    def iter_windows(self, length, step=None, as_time_series=True, **kwargs):
+        # Generator of the time windows of length time points, starting every step time points,
+        # by default non overlapping. Windows are either read-only views of the data,
+        # or TimeSeries that share the data buffer, in a copy-on-write way, with the start_time of each window.
+        for index_start in self._get_windows_starts(length, step):
+            if as_time_series:
+                yield self.get_time_window(index_start, index_start + length, **kwargs)
+            else:
+                yield read_only_view(self.data[index_start:index_start + length])
+
+    def get_windows(self, length, step=None):
+        # All time windows of iter_windows as a single read-only strided view of the data,
+        # of shape (n_windows, length, ...), for vectorized computations across windows.
+        # The start times of the windows are self.time[::step][:n_windows].
+        n_windows = len(self._get_windows_starts(length, step))
+        if step is None:
+            step = length
+        data = numpy.asarray(self.data)
+        return as_strided(data, shape=(n_windows, length) + data.shape[1:],
+                          strides=(step * data.strides[0], ) + data.strides, writeable=False)
+
     def get_time_window_by_units(self, unit_start, unit_end, **kwargs):
         end_time = self.end_time
         if unit_start < self.start_time or unit_end > end_time:
@@ -445,11 +863,11 @@ class TimeSeries(TimeSeriesTVB):
         return self.get_time_window(index_start, index_end)
 
     def decimate_time(self, new_sample_period, **kwargs):
-        if new_sample_period % self.sample_period != 0:
+        index_step = int(numpy.round(new_sample_period / self.sample_period))
+        if index_step < 1 or not numpy.isclose(index_step * self.sample_period, new_sample_period):
             self.logger.error("Cannot decimate time if new time step is not a multiple of the old time step")
             raise ValueError
 
-        index_step = int(new_sample_period / self.sample_period)
         time_data = self.data[::index_step, :, :, :]
         return self.duplicate(data=time_data, sample_period=new_sample_period, **kwargs)
 
@@ -467,15 +885,25 @@ class TimeSeries(TimeSeriesTVB):
 
     def configure(self):
         super(TimeSeries, self).configure()
+        time_length = self.data.shape[0]
+        if self.time is not None and len(self.time) != time_length:
+            self.logger.warn("Ignoring time of length %d, not matching the time length %d of the data!"
+                             % (len(self.time), time_length))
+            self.time = None
         if self.time is None:
-            self.time = numpy.arange(self.start_time, self.end_time + self.sample_period, self.sample_period)
+            self.time = RegularTimeAxis(self.start_time, self.sample_period, time_length)
+        elif isinstance(self.time, RegularTimeAxis):
+            self.start_time = self.time.start
+            self.sample_period = self.time.period
         else:
-            self.start_time = 0.0
-            self.sample_period = 0.0
-            if len(self.time) > 0:
-                self.start_time = self.time[0]
-            if len(self.time) > 1:
-                self.sample_period = numpy.mean(numpy.diff(self.time))
+            # An input time vector is replaced by a RegularTimeAxis, if it is regularly sampled
+            if time_length > 0:
+                self.start_time = float(self.time[0])
+            if time_length > 1:
+                self.sample_period = float(self.time[-1] - self.time[0]) / (time_length - 1)
+                if not numpy.allclose(numpy.diff(self.time), self.sample_period):
+                    return
+            self.time = RegularTimeAxis(self.start_time, self.sample_period, time_length)
 
 
 class TimeSeriesBrain(TimeSeries):
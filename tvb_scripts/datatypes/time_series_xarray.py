@@ -34,7 +34,9 @@ The TimeSeries datatypes.
 .. moduleauthor:: Stuart A. Knock <Stuart@tvb.invalid>
 
 """
-from copy import deepcopy
+from collections import OrderedDict
+from copy import copy, deepcopy
+from itertools import count
 
 import numpy as np
 import xarray as xr
@@ -42,8 +44,23 @@ from six import string_types
 from tvb.basic.neotraits.api import HasTraits, Attr, List, narray_summary_info
 from tvb.datatypes import sensors, surfaces, volumes, region_mapping, connectivity
 
-from tvb_scripts.datatypes.time_series import TimeSeries as TimeSeriesTVB
-from tvb_scripts.utils.data_structures_utils import is_integer
+from tvb_scripts.datatypes.time_series import TimeSeries as TimeSeriesTVB, TimeSeriesDict as TimeSeriesTVBDict, \
+    RegularTimeAxis
+from tvb_scripts.utils.data_structures_utils import is_integer, read_only_view
+from tvb_scripts.utils.log_error_utils import initialize_logger, raise_import_error, raise_value_error
+
+try:
+    import dask.array as da
+except ImportError:
+    da = None
+
+
+# Versions of the data of all TimeSeries instances, which stamp the cache of their derived properties
+_DATA_VERSIONS = count()
+
+
+def is_dask_array(data):
+    return da is not None and isinstance(data, da.Array)
 
 
 def prepare_4d(data):
@@ -61,7 +78,9 @@ class TimeSeries(HasTraits):
     Base time-series dataType.
     """
 
-    _data = xr.DataArray([])
+    logger = initialize_logger(__name__)
+
+    _empty_data = xr.DataArray([])
 
     _default_labels_ordering = List(
         default=("Time", "State Variable", "Space", "Mode"),
@@ -70,11 +89,61 @@ class TimeSeries(HasTraits):
 
     title = Attr(str)
 
+    @property
+    def _data(self):
+        return self.__dict__.get("_data_array", self._empty_data)
+
+    @_data.setter
+    def _data(self, data):
+        self.__dict__["_data_array"] = data
+        self._invalidate_cache()
+
+    def _invalidate_cache(self):
+        # Derived properties (labels, time, etc) are cached for a version of the data,
+        # which changes whenever _data is replaced, or mutated via __setitem__ or configure.
+        # A new cache dict is created, instead of clearing the old one, which might be shared by shallow copies.
+        self.__dict__["_cache"] = {"version": next(_DATA_VERSIONS)}
+
+    def _cached(self, key, compute):
+        cache = self.__dict__.get("_cache", None)
+        if cache is None:
+            self._invalidate_cache()
+            cache = self.__dict__["_cache"]
+        if key not in cache:
+            cache[key] = compute()
+        return cache[key]
+
+    @property
+    def data_version(self):
+        return self._cached("version", lambda: None)
+
     @property
     def data(self):
         # Return numpy array
+        # (for chunked TimeSeries, this computes all of the data in memory)
         return self._data.values
 
+    @data.setter
+    def data(self, data):
+        # Replace the data with an array (numpy or dask) of the same shape, keeping all labels
+        if tuple(data.shape) != self.shape:
+            raise_value_error("The shape %s of the new data does not match the shape %s of the TimeSeries!"
+                              % (str(data.shape), str(self.shape)), self.logger)
+        self._data = self._data.copy(deep=False, data=data)
+
+    @property
+    def lazy_data(self):
+        # Return the underlying array, i.e., a dask array for chunked TimeSeries, without computing it
+        return self._data.data
+
+    @property
+    def is_chunked(self):
+        return self._data.chunks is not None
+
+    @property
+    def chunks(self):
+        return self._data.chunks
+
     @property
     def name(self):
         return self._data.name
@@ -133,18 +202,42 @@ class TimeSeries(HasTraits):
 
     @property
     def labels_dimensions(self):
-        d = {}
-        for key, val in zip(list(self._data.coords.keys()),
-                            list([value.values for value in self._data.coords.values()])):
-            d[key] = val
-        return d
+        # A new dict, so that it can be modified without affecting the cached one
+        return dict(self._cached("labels_dimensions",
+                                 lambda: dict([(key, variable.values)
+                                               for key, variable in self._data.coords.variables.items()])))
+
+    def _get_labels_indices(self, dim_index):
+        # A dict of the index of each label of a dimension, for O(1) lookups.
+        # As with list.index(), the first occurrence of a repeated label is returned.
+        dim_name = self.labels_ordering[dim_index]
+
+        def compute():
+            labels = self._data.coords.variables[dim_name].values.tolist()
+            return dict([(label, index) for index, label in reversed(list(enumerate(labels)))])
+
+        return self._cached("labels_indices_%s" % dim_name, compute)
 
     @property
     def time(self):
-        return self._data.coords[self._data.dims[0]].values
+        return self._cached("time", lambda: self._data.coords.variables[self._data.dims[0]].values)
 
     # xarrays have a attrs dict with useful attributes
 
+    @property
+    def time_axis(self):
+        # A RegularTimeAxis of time, if it is regularly sampled, which is checked once per version of the data,
+        # or None otherwise
+        def compute():
+            time = self.time
+            if len(time) == 0:
+                return None
+            if len(time) > 1 and not np.allclose(np.diff(time), self.sample_period):
+                return None
+            return RegularTimeAxis(float(time[0]), float(self.sample_period or 0.0), len(time))
+
+        return self._cached("time_axis", compute)
+
     @property
     def start_time(self):
         try:
@@ -168,10 +261,15 @@ class TimeSeries(HasTraits):
 
     @property
     def sample_period(self):
-        try:
-            return np.mean(np.diff(self.time))
-        except:
-            return None
+        # Time is assumed to be regularly sampled
+        def compute():
+            try:
+                time = self.time
+                return (time[-1] - time[0]) / (len(time) - 1)
+            except:
+                return None
+
+        return self._cached("sample_period", compute)
 
     @property
     def sample_rate(self):
@@ -213,19 +311,18 @@ class TimeSeries(HasTraits):
         if time_length > 0:
             if time is None:
                 if start_time is not None and sample_period is not None:
-                    end_time = start_time + (time_length - 1) * sample_period
-                    time = np.arange(start_time, end_time + sample_period, sample_period)
-                    return time, start_time, end_time, sample_period, kwargs
+                    time = RegularTimeAxis(start_time, sample_period, time_length)
+                    return time.values, start_time, time.end, sample_period, kwargs
                 else:
                     raise ValueError("Neither time vector nor start_time and/or "
                                      "sample_period are provided as input arguments!")
             else:
                 assert time_length == len(time)
+                time = np.asarray(time)
                 start_time = time[0]
                 end_time = time[-1]
                 if len(time) > 1:
-                    sample_period = np.mean(np.diff(time))
-                    assert end_time == start_time + (time_length - 1) * sample_period
+                    sample_period = (end_time - start_time) / (time_length - 1)
                 else:
                     sample_period = None
                 return time, start_time, end_time, sample_period, kwargs
@@ -245,24 +342,66 @@ class TimeSeries(HasTraits):
         return labels_ordering, labels_dimensions, kwargs
 
     def from_TVB_time_series(self, ts, **kwargs):
-        labels_ordering = kwargs.pop("labels_ordering", kwargs.pop("dims", ts.labels_ordering))
-        labels_dimensions = kwargs.pop("labels_dimensions", kwargs.pop("coords", ts.labels_dimensions))
+        labels_ordering = list(kwargs.pop("labels_ordering", kwargs.pop("dims", ts.labels_ordering)))
+        # A new dict, so that the labels of ts are not modified
+        labels_dimensions = dict(kwargs.pop("labels_dimensions", kwargs.pop("coords", ts.labels_dimensions)))
         name = kwargs.pop("name", kwargs.pop("title", ts.title))
-        time = kwargs.pop("time", ts.time)
+        time = np.asarray(kwargs.pop("time", ts.time))
         labels_dimensions[labels_ordering[0]] = time
         for label, dimensions in labels_dimensions.items():
             id = labels_ordering.index(label)
             if ts.shape[id] != len(dimensions):
                 labels_dimensions[label] = np.arange(ts.shape[id]).astype("i")
+        for label, dim_length in zip(labels_ordering[1:], ts.shape[1:]):
+            if label not in labels_dimensions:
+                # Default integer labels, as set by configure(), which is skipped for conversions
+                labels_dimensions[label] = np.arange(0, dim_length)
         kwargs["sample_period_unit"] = getattr(ts, "sample_period_unit", kwargs.pop('sample_period_unit', ""))
-        self._data = xr.DataArray(ts.data,
+        data = ts.data
+        if isinstance(data, np.ndarray):
+            # The data buffer is shared, in a copy-on-write way, with ts
+            data = ts._share_data()
+        self._data = xr.DataArray(data,
                                   dims=labels_ordering,
                                   coords=labels_dimensions,
                                   name=name, attrs=kwargs)
 
-    def from_numpy(self, data, **kwargs):
+    def to_TVB_time_series(self, time_series=None, **kwargs):
+        # Return a numpy TimeSeries, of the corresponding type, unless time_series class is given,
+        # which shares the data buffer, in a copy-on-write way, as well as the time axis and labels of self.
+        # Any kwargs, e.g., connectivity or sensors, are passed to the TimeSeries constructor,
+        # in addition to the ones of self.
+        # The data, time and labels of self are already validated, and, thus, they are set as they are,
+        # without the validation and configuration of the time and labels, upon constructing a TimeSeries of data.
+        if time_series is None:
+            time_series = TimeSeriesTVBDict.get(self.__class__.__name__, TimeSeriesTVB)
+        time_dim = self.labels_ordering[0]
+        for attr in ["connectivity", "region_mapping", "region_mapping_volume", "surface", "volume", "sensors"]:
+            value = getattr(self, attr, None)
+            if value is not None and attr not in kwargs:
+                kwargs[attr] = value
+        time = self.time_axis
+        if time is not None:
+            kwargs.update({"start_time": time.start, "sample_period": time.period})
+        elif self.time_length > 1:
+            kwargs.update({"start_time": float(self.start_time), "sample_period": float(self.sample_period)})
+        time_series = time_series(time=self.time if time is None else time,
+                                  labels_ordering=self.labels_ordering,
+                                  labels_dimensions=dict([(dim, labels)
+                                                          for dim, labels in self.labels_dimensions.items()
+                                                          if dim != time_dim]),
+                                  title=self.title, sample_period_unit=self.sample_period_unit, **kwargs)
+        time_series.data = prepare_4d(self._share_data().values)
+        return time_series
+
+    def from_numpy(self, data, share_data=False, **kwargs):
         # We have to infer time and labels inputs from kwargs
+        # Writeable input arrays are copied, unless share_data is True (see TimeSeriesTVB.__init__())
+        input_data = data
         data = prepare_4d(data)
+        owns_data = isinstance(data, np.ndarray) and data.flags.writeable
+        if owns_data and not share_data and np.may_share_memory(data, input_data):
+            data = np.array(data)
         time, start_time, end_time, sample_period, kwargs = self._configure_input_time(data, **kwargs)
         labels_ordering, labels_dimensions, kwargs = self._configure_input_labels(**kwargs)
         if time is not None:
@@ -271,6 +410,8 @@ class TimeSeries(HasTraits):
             labels_dimensions[labels_ordering[0]] = time
         self._data = xr.DataArray(data, dims=labels_ordering, coords=labels_dimensions,
                                   name=self.__class__.__name__, attrs=kwargs)
+        if owns_data:
+            self._own_data()
 
     def _configure_time(self):
         assert self.time[0] == self.start_time
@@ -281,20 +422,25 @@ class TimeSeries(HasTraits):
     def _configure_labels(self):
         for i_dim in range(1, self.nr_dimensions):
             dim_label = self.labels_ordering[i_dim]
-            val = self.labels_dimensions.get(dim_label, None)
+            # Check the labels' coordinate variable, without converting all coordinates to arrays
+            val = self._data.coords.variables.get(dim_label, None)
             if val is not None:
-                assert len(val) == self.shape[i_dim]
+                assert val.size == self.shape[i_dim]
             else:
                 # We set by default integer labels if no input labels are provided by the user
                 self._data.coords[self._data.dims[i_dim]] = np.arange(0, self.shape[i_dim])
+                self._invalidate_cache()
 
-    def configure(self):
-        # To be always used when a new object is created
-        # to check that everything is set correctly
+    def _configure_title(self):
         if self.name is None:
             self.title = "TimeSeries"
         else:
             self.title = self.name
+
+    def configure(self):
+        # To be always used when a new object is created
+        # to check that everything is set correctly
+        self._configure_title()
         super(TimeSeries, self).configure()
         try:
             time_length = self.time_length
@@ -304,17 +450,26 @@ class TimeSeries(HasTraits):
             self._configure_time()
             self._configure_labels()
 
-    def __init__(self, data=None, **kwargs):
+    def __init__(self, data=None, share_data=False, **kwargs):
+        # If chunks are given, the TimeSeries is dask-backed, and its data are processed lazily, chunk by chunk
+        chunks = kwargs.pop("chunks", None)
+        if chunks is not None and not isinstance(data, (list, tuple, np.ndarray, xr.DataArray, TimeSeriesTVB)) \
+                and hasattr(data, "shape") and hasattr(data, "__getitem__") and not is_dask_array(data):
+            # An array-like, e.g., an h5py or zarr dataset, or an H5DataProxy, which is read only chunk by chunk
+            self._assert_dask()
+            labels_ordering = list(kwargs.get("labels_ordering", self._default_labels_ordering))
+            data = da.from_array(data, chunks=tuple(self._get_chunks(chunks, labels_ordering[:data.ndim]).values()))
         if isinstance(data, (list, tuple)):
-            kwargs = self.from_numpy(np.array(data), **kwargs)
-        elif isinstance(data, np.ndarray):
-            kwargs = self.from_numpy(data, **kwargs)
+            kwargs = self.from_numpy(np.array(data), share_data=True, **kwargs)
+        elif isinstance(data, np.ndarray) or is_dask_array(data):
+            kwargs = self.from_numpy(data, share_data, **kwargs)
         elif isinstance(data, self.__class__):
             attributes = data.__dict__.items()
             attributes.update(**kwargs)
             for attr, val in attributes.items():
                 setattr(self, attr, val)
         elif isinstance(data, TimeSeriesTVB):
+            # The data, time and labels of a numpy TimeSeries are already validated, and, thus, configure() is skipped
             self.from_TVB_time_series(data, **kwargs)
         else:
             # Assuming data is an input xr.DataArray() can handle,
@@ -330,7 +485,73 @@ class TimeSeries(HasTraits):
             self._data.attrs = kwargs
             super(TimeSeries, self).__init__(**kwargs)
         super(TimeSeries, self).__init__()
-        self.configure()
+        if chunks is not None:
+            self._assert_dask()
+            self._data = self._data.chunk(self._get_chunks(chunks))
+        if isinstance(data, TimeSeriesTVB):
+            self._configure_title()
+        else:
+            self.configure()
+
+    def _assert_dask(self):
+        if da is None:
+            raise_import_error("dask is required for chunked TimeSeries!", self.logger)
+
+    def _get_chunks(self, chunks, labels_ordering=None):
+        # Chunks are given as a dict of sizes per dimension, with dimension names or indices as keys,
+        # as a sequence of sizes, one per dimension, or as a single size for all dimensions.
+        # A size of -1 means a single chunk along a dimension, and dimensions that are not given are not chunked.
+        if labels_ordering is None:
+            labels_ordering = self.labels_ordering
+        ndim = len(labels_ordering)
+        if is_integer(chunks):
+            chunks = [chunks] * ndim
+        if not isinstance(chunks, dict):
+            chunks = dict(enumerate(chunks))
+        chunks_list = [-1] * ndim
+        for dim, chunk in chunks.items():
+            if isinstance(dim, string_types):
+                dim = labels_ordering.index(dim)
+            chunks_list[dim] = -1 if chunk is None else chunk
+        return OrderedDict(zip(labels_ordering, chunks_list))
+
+    def chunk(self, chunks):
+        # Return a dask-backed duplicate, with data chunked along time and/or space
+        self._assert_dask()
+        return self.duplicate(_data=self._data.chunk(self._get_chunks(chunks)))
+
+    def compute(self, **kwargs):
+        # Return a duplicate with all data computed in memory
+        return self.duplicate(_data=self._data.compute(**kwargs))
+
+    def persist(self, **kwargs):
+        # Return a dask-backed duplicate with all data computed and kept in memory, as chunks,
+        # so that following lazy computations start from them
+        return self.duplicate(_data=self._data.persist(**kwargs))
+
+    def map_signals(self, fun, dtype=None, **kwargs):
+        # Apply fun, which processes whole signals along time (the first axis), to the data,
+        # and return a duplicate of the results, of the same shape.
+        # For chunked TimeSeries, any chunks along time are merged, and fun is applied lazily,
+        # to all chunks along the other dimensions, in parallel.
+        if self.is_chunked:
+            data = self._data.chunk({self._data.dims[0]: -1}).data
+            data = data.map_blocks(fun, dtype=data.dtype if dtype is None else dtype)
+        else:
+            data = fun(self.data)
+        return self.duplicate(_data=self._data.copy(deep=False, data=data), **kwargs)
+
+    def reduce_dimension(self, fun, dim_index, label, **kwargs):
+        # Reduce the data across a dimension, keeping it, with a single label.
+        # For chunked TimeSeries, the reduction is lazy, across all chunks in parallel.
+        dim_name = self.labels_ordering[dim_index]
+        data = self._data.reduce(fun, dim=dim_name, keepdims=True, keep_attrs=True)
+        if dim_index == 0:
+            # Time stays numeric
+            label = self.time[0]
+        data = data.assign_coords({dim_name: [label]})
+        data.name = self._data.name
+        return self.duplicate(_data=data, **kwargs)
 
     def summary_info(self):
         """
@@ -347,96 +568,139 @@ class TimeSeries(HasTraits):
         summary.update(narray_summary_info(self.data))
         return summary
 
-    def duplicate(self, **kwargs):
+    def _share_data(self, data=None):
+        # Copy-on-write: return self's _data, or data, e.g., a slice of it, with a read-only view of the data buffer,
+        # to be shared with another TimeSeries instance, which copies it the first time it writes to it.
+        # self's data remain writeable, but self copies them before writing to them via __setitem__,
+        # or in place operations, so that the TimeSeries that share them are not affected.
+        if data is None:
+            data = self._data
+        if not self.is_chunked and isinstance(data.data, np.ndarray):
+            self.__dict__["_shared_data"] = self._data
+            return data.copy(deep=False, data=read_only_view(data.values))
+        return data
+
+    def _own_data(self):
+        # Mark the current _data as owned by self, which, thus, writes to its data buffer in place
+        self.__dict__["_owned_data"] = self._data
+
+    def _owns_data(self):
+        return self.__dict__.get("_owned_data", None) is self._data
+
+    def _ensure_writeable_data(self):
+        # Copy-on-write: data shared with other TimeSeries, read-only, or not owned by self,
+        # e.g., of an input xr.DataArray, are copied the first time they are written to
+        if not self.is_chunked:
+            if not self.data.flags.writeable or not self._owns_data() or \
+                    self.__dict__.get("_shared_data", None) is self._data:
+                self._data = self._data.copy(deep=True)
+            self._own_data()
+        self.__dict__.pop("_shared_data", None)
+        return self._data
+
+    def duplicate(self, deep_copy=False, **kwargs):
         # Since all labels are internal to xarray,
         # it suffices to pass a new (e.g., sliced) xarray _data as kwarg
         # for all labels to be set correctly (and confirmed by the call to configure(),
-        # whereas any other attributes of TimeSeries will be copied
-        duplicate = deepcopy(self)
+        # whereas any other attributes of TimeSeries will be shallow copied,
+        # i.e., connectivity, sensors, surface, etc, are shared by reference.
+        # If no _data is given, the data buffer is shared, in a copy-on-write way, with the duplicated instance.
+        # Input _data kwargs are taken over by the duplicate, which owns them,
+        # unless they may be views of self's data buffer, e.g., slices, which are shared in a copy-on-write way.
+        data = kwargs.get("_data", None)
+        owns_data = data is None or (isinstance(data.data, np.ndarray) and
+                                     not np.may_share_memory(data.data, self._data.data))
+        if deep_copy:
+            duplicate = deepcopy(self)
+        else:
+            duplicate = copy(self)
+            owns_data = owns_data and data is not None
+            duplicate.__dict__.pop("_shared_data", None)
+            duplicate.__dict__.pop("_owned_data", None)
+            if data is None:
+                duplicate._data = self._share_data()
+            elif not self.is_chunked and not owns_data and isinstance(data.data, np.ndarray):
+                # Input _data that may be views of self's data buffer, e.g., slices, are shared as well
+                kwargs["_data"] = self._share_data(data)
         for attr, value in kwargs.items():
             setattr(duplicate, attr, value)
+        if owns_data:
+            duplicate._own_data()
         duplicate.configure()
         return duplicate
 
     def _assert_array_indices(self, slice_tuple):
-        if is_integer(slice_tuple) or isinstance(slice_tuple, string_types):
+        if is_integer(slice_tuple) or self._is_label(slice_tuple):
             return ([slice_tuple],)
         else:
             if isinstance(slice_tuple, slice):
                 slice_tuple = (slice_tuple,)
             slice_list = []
             for slc in slice_tuple:
-                if is_integer(slc) or isinstance(slc, string_types):
+                if is_integer(slc) or self._is_label(slc):
                     slice_list.append([slc])
                 else:
                     slice_list.append(slc)
             return tuple(slice_list)
 
     def _get_index_for_slice_label(self, slice_label, slice_idx):
-        return self.labels_dimensions[self.labels_ordering[slice_idx]].tolist().index(slice_label)
-
-    def _check_for_string_or_float_slice_indices(self, current_slice, slice_idx):
-        slice_start = current_slice.start
-        slice_stop = current_slice.stop
-
-        if isinstance(slice_start, string_types) or isinstance(slice_start, float):
-            slice_start = self._get_index_for_slice_label(slice_start, slice_idx)
-        if isinstance(slice_stop, string_types) or isinstance(slice_stop, float):
-            # NOTE!: In case of a string slice, we consider stop included!
-            slice_stop = self._get_index_for_slice_label(slice_stop, slice_idx) + 1
-
-        return slice(slice_start, slice_stop, current_slice.step)
-
-    def _resolve_mixted_slice(self, slice_tuple):
-        slice_list = []
-        for idx, current_slice in enumerate(slice_tuple):
-            if isinstance(current_slice, slice):
-                slice_list.append(self._check_for_string_or_float_slice_indices(current_slice, idx))
-            else:
-                # If not a slice, it will be an iterable:
-                for i_slc, slc in enumerate(current_slice):
-                    if isinstance(slc, string_types) or isinstance(slc, float):
-                        current_slice[i_slc] = self.labels_dimensions[self.labels_ordering[idx]].tolist().index(slc)
-                    else:
-                        current_slice[i_slc] = slc
-                slice_list.append(current_slice)
-        return tuple(slice_list)
+        try:
+            return self._get_labels_indices(slice_idx)[slice_label]
+        except KeyError:
+            raise ValueError("%s is not in the labels of dimension %s!"
+                             % (str(slice_label), self.labels_ordering[slice_idx]))
+
+    def _is_label(self, index):
+        return isinstance(index, string_types) or isinstance(index, (float, np.floating))
+
+    def _get_index_for_slice_bound(self, slice_bound, slice_idx, stop=False):
+        # Integers and None are positional bounds.
+        # Float bounds along time are time points, which select all samples within them, as xarray.DataArray.loc does.
+        # Other label bounds are looked up, and, as for xarray.DataArray.loc, a stop label is included.
+        if slice_bound is None or is_integer(slice_bound):
+            return slice_bound
+        if slice_idx == 0 and isinstance(slice_bound, (float, np.floating)):
+            return int(np.searchsorted(self.time, slice_bound, side="right" if stop else "left"))
+        return self._get_index_for_slice_label(slice_bound, slice_idx) + int(stop)
+
+    def _resolve_dimension_index(self, index, slice_idx):
+        # Classify the index of a dimension once, and resolve it to a positional one, i.e.,
+        # integers, slices of integers and integer or boolean arrays are positional indices,
+        # whereas strings and floats (time points along time) are labels.
+        if isinstance(index, slice):
+            return slice(self._get_index_for_slice_bound(index.start, slice_idx),
+                         self._get_index_for_slice_bound(index.stop, slice_idx, stop=True),
+                         index.step)
+        if isinstance(index, (np.ndarray, xr.DataArray)) and index.dtype.kind in "biu":
+            return index
+        index = list(index)
+        if not any([self._is_label(idx) for idx in index]):
+            return index
+        return [self._get_index_for_slice_label(idx, slice_idx) if self._is_label(idx) else idx for idx in index]
+
+    def _resolve_indices(self, slice_tuple):
+        # Resolve a tuple of mixed positional and label indices to a tuple of positional ones,
+        # which are then applied by xarray.DataArray.isel, without any trial and error.
+        slice_tuple = self._assert_array_indices(slice_tuple)
+        if any([slc is Ellipsis for slc in slice_tuple]):
+            i_ellipsis = [slc is Ellipsis for slc in slice_tuple].index(True)
+            slice_tuple = slice_tuple[:i_ellipsis] + \
+                          (slice(None),) * (self.nr_dimensions - len(slice_tuple) + 1) + \
+                          slice_tuple[i_ellipsis + 1:]
+        return tuple([self._resolve_dimension_index(slc, idx) for idx, slc in enumerate(slice_tuple)])
 
     # Return a TimeSeries object
     def __getitem__(self, slice_tuple):
-        slice_tuple = self._assert_array_indices(slice_tuple)
-        try:
-            # For integer indices
-            return self.duplicate(_data=self._data[slice_tuple])
-        except:
-            try:
-                # For label indices
-                # xrarray.DataArray.loc slices along labels
-                # Assuming that all dimensions without input labels
-                # are configured with labels of integer indices=
-                return self.duplicate(_data=self._data.loc[slice_tuple])
-            except:
-                # Still, for a conflicting mixture that has to be resolved
-                return self.duplicate(_data=self._data[self._resolve_mixted_slice(slice_tuple)])
+        return self.duplicate(_data=self._data[self._resolve_indices(slice_tuple)])
 
     def __setitem__(self, slice_tuple, values):
-        slice_tuple = self._assert_array_indices(slice_tuple)
+        slice_tuple = self._resolve_indices(slice_tuple)
         # Mind that xarray can handle setting values both from a numpy array and/or another xarray
         if isinstance(values, self.__class__):
             values = np.array(values.data)
-        try:
-            # For integer indices
-            self._data[slice_tuple] = values
-        except:
-            try:
-                # For label indices
-                # xrarray.DataArray.loc slices along labels
-                # Assuming that all dimensions without input labels
-                # are configured with labels of integer indices
-                self._data.loc[slice_tuple] = values
-            except:
-                # Still, for a conflicting mixture that has to be resolved
-                self._data[self._resolve_mixted_slice(slice_tuple)] = values
+        self._ensure_writeable_data()
+        self._data[slice_tuple] = values
+        self._invalidate_cache()
 
     # def __getattr__(self, attr_name):
     #     # We are here because attr_name is not an attribute of TimeSeries...
@@ -573,7 +837,7 @@ class TimeSeries(HasTraits):
                 figname = figname + ": %s" % labels_dimensions[col][0]
             except:
                 pass
-        data = xr.DataArray(self._data)
+        data = self._data.copy(deep=True)
         for i_var, var in enumerate(labels_dimensions[labels_ordering[1]]):
             # Remove mean
             data[:, i_var] -= data[:, i_var].mean()
@@ -79,5 +79,5 @@ def read_edf_to_Timeseries(path, sensors, rois_selection=None, label_strip_fun=N
     data, times, rois, rois_inds, rois_lbls = \
         read_edf(path, sensors, rois_selection, label_strip_fun, time_unit)
 
-    return TimeSeries(data, time=times, labels_dimensions={TimeSeriesDimensions.SPACE.value: rois_lbls},
+    return TimeSeries(data, share_data=True, time=times, labels_dimensions={TimeSeriesDimensions.SPACE.value: rois_lbls},
                       sample_period=np.mean(np.diff(times)), sample_period_unit=time_unit, **kwargs)
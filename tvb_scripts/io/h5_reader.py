@@ -305,14 +305,25 @@ class H5Reader(H5ReaderBase):
 
         return time, data
 
-    def read_timeseries(self, path, time_series=TimeSeries, time_series_dict=TimeSeriesDict, h5_file=None, close_file=True):
+    def read_timeseries(self, path, time_series=TimeSeries, time_series_dict=TimeSeriesDict, h5_file=None,
+                        close_file=True, lazy=False, chunks=None):
         """
         :param path: Path towards a valid TimeSeries H5 file
+        :param lazy: if True, the TimeSeries data is an H5DataProxy of the open h5 dataset,
+                     which reads only the hyperslabs that are sliced.
+                     The file is then left open until time_series.data.close() is called,
+                     unless h5_file is given, in which case the caller has to close it.
+        :param chunks: chunks of a dask-backed (xarray) TimeSeries, which reads the data lazily, chunk by chunk,
+                       from the H5DataProxy of a lazy read.
         :return: Timeseries data and time in 2 numpy arrays
         """
+        h5_file_is_input = h5_file is not None
         h5_file = self._open_file("TimeSeries", path, h5_file)
 
-        data = h5_file['data'][()]
+        if lazy:
+            data = H5DataProxy(h5_file['data'], None if h5_file_is_input else h5_file)
+        else:
+            data = h5_file['data'][()]
 
         ts_type = (h5_file.attrs.get(self.H5_SUBTYPE_ATTRIBUTE)).decode("UTF-8")
 
@@ -386,18 +397,24 @@ class H5Reader(H5ReaderBase):
         except:
             pass
 
-        self._close_file(h5_file, close_file)
-
-        self.logger.info("First Channel sv sum: " + str(np.sum(data[:, 0])))
+        if lazy:
+            self.logger.info("TimeSeries data of shape %s are left lazily in file: %s" % (str(data.shape), path))
+        else:
+            self._close_file(h5_file, close_file)
+            self.logger.info("First Channel sv sum: " + str(np.sum(data[:, 0])))
         self._log_success("TimeSeries", path)
 
-        return time_series_class(data, labels_ordering=labels_ordering, **ts_kwargs)
+        if chunks is not None:
+            ts_kwargs["chunks"] = chunks
+        return time_series_class(data, share_data=True, labels_ordering=labels_ordering, **ts_kwargs)
 
-    def read_time_series(self, path, h5_file=None, close_file=True):
-        return self.read_timeseries(path, TimeSeries, TimeSeriesDict,  h5_file, close_file)
+    def read_time_series(self, path, h5_file=None, close_file=True, lazy=False):
+        return self.read_timeseries(path, TimeSeries, TimeSeriesDict,  h5_file, close_file, lazy)
 
-    def read_xarray_time_series(self, path, h5_file=None, close_file=True):
-        return self.read_timeseries(path, XarrayTimeSeries, XarrayTimeSeriesDict, h5_file, close_file)
+    def read_xarray_time_series(self, path, h5_file=None, close_file=True, chunks=None):
+        # If chunks are given, the TimeSeries is dask-backed, and its data are read lazily, chunk by chunk
+        return self.read_timeseries(path, XarrayTimeSeries, XarrayTimeSeriesDict, h5_file, close_file,
+                                    lazy=chunks is not None, chunks=chunks)
 
     def read_dictionary(self, path=None, h5_file=None, type=None, close_file=True):
         """
@@ -3,8 +3,10 @@
 import os
 
 import h5py
+import numpy
 
 from tvb_scripts.io.h5_writer import H5Writer
+from tvb_scripts.utils.data_structures_utils import is_integer
 from tvb_scripts.utils.log_error_utils import initialize_logger
 
 
@@ -46,3 +48,112 @@ class H5GroupHandlers(object):
             type = group.attrs[self.H5_SUBTYPE_ATTRIBUTE]
         else:
             return dictionary
+
+
+class H5DataProxy(object):
+    """
+    Array-like, read-only proxy of an open h5py dataset,
+    which reads from the file only the hyperslabs that are actually indexed.
+    Indexing is orthogonal, i.e., each list or array index selects along its own axis.
+    The h5 file remains open until close() is called, or the proxy is used as a context manager,
+    unless it has been opened by the caller, who is then responsible for closing it.
+    """
+
+    def __init__(self, dataset, h5_file=None):
+        self.dataset = dataset
+        self.h5_file = h5_file
+
+    @property
+    def shape(self):
+        return self.dataset.shape
+
+    @property
+    def dtype(self):
+        return self.dataset.dtype
+
+    @property
+    def ndim(self):
+        return len(self.dataset.shape)
+
+    @property
+    def size(self):
+        return int(numpy.prod(self.dataset.shape))
+
+    def __len__(self):
+        return self.dataset.shape[0]
+
+    def _process_index(self, index, dim_length):
+        # Return the selection for h5py, and, if needed, the one to apply in memory on the read block
+        if isinstance(index, slice):
+            if index.step is not None and index.step < 0:
+                # h5py does not support negative steps
+                return slice(None), index
+            return index, None
+        if isinstance(index, (list, tuple, numpy.ndarray)):
+            index = numpy.array(index)
+            if index.dtype == numpy.bool_:
+                index = numpy.nonzero(index)[0]
+            index = numpy.where(index < 0, index + dim_length, index).astype("i8")
+            # h5py supports only strictly increasing list indices
+            unique_index, inverse = numpy.unique(index, return_inverse=True)
+            if numpy.array_equal(unique_index, index):
+                return unique_index.tolist(), None
+            return unique_index.tolist(), inverse.ravel()
+        if is_integer(index):
+            index = int(index)
+            return index + dim_length if index < 0 else index, None
+        raise IndexError("Only integers, slices, and lists or arrays of integers or booleans "
+                         "are valid indices of %s!" % self.__class__.__name__)
+
+    def __getitem__(self, slice_tuple):
+        if not isinstance(slice_tuple, tuple):
+            slice_tuple = (slice_tuple,)
+        if any(slc is Ellipsis for slc in slice_tuple):
+            i_ellipsis = slice_tuple.index(Ellipsis)
+            slice_tuple = slice_tuple[:i_ellipsis] + \
+                          (slice(None),) * (self.ndim - len(slice_tuple) + 1) + slice_tuple[i_ellipsis + 1:]
+        h5_slices = []
+        in_memory_slices = []
+        fancy_index_used = False
+        for slc, dim_length in zip(slice_tuple, self.shape):
+            h5_slice, in_memory_slice = self._process_index(slc, dim_length)
+            if isinstance(h5_slice, list):
+                if fancy_index_used:
+                    # h5py supports only one list index per selection,
+                    # therefore read the range covering all the rest, and select in memory
+                    in_memory_slice = numpy.array(h5_slice)[in_memory_slice] \
+                        if in_memory_slice is not None else numpy.array(h5_slice)
+                    h5_slice = slice(in_memory_slice.min(), in_memory_slice.max() + 1)
+                    in_memory_slice = in_memory_slice - h5_slice.start
+                fancy_index_used = True
+            h5_slices.append(h5_slice)
+            if not is_integer(h5_slice):
+                # Only axes that are not dropped by integer indexing remain in the read block
+                in_memory_slices.append(in_memory_slice)
+        data = self.dataset[tuple(h5_slices)]
+        for axis, in_memory_slice in enumerate(in_memory_slices):
+            if isinstance(in_memory_slice, slice):
+                data = data[(slice(None),) * axis + (in_memory_slice,)]
+            elif in_memory_slice is not None:
+                data = numpy.take(data, in_memory_slice, axis=axis)
+        return data
+
+    def __array__(self, dtype=None, copy=None):
+        data = self.dataset[()]
+        if dtype is not None:
+            data = data.astype(dtype)
+        return data
+
+    def load(self):
+        return self.dataset[()]
+
+    def close(self):
+        if self.h5_file is not None:
+            self.h5_file.close()
+            self.h5_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
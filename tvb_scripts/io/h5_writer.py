@@ -11,6 +11,7 @@ from tvb_scripts.datatypes.surface import SurfaceH5Field, Surface
 from tvb_scripts.datatypes.time_series import TimeSeries
 from tvb_scripts.datatypes.time_series_xarray import TimeSeries as TimeSeriesXarray
 from tvb_scripts.io.h5_writer_base import H5WriterBase
+from tvb_scripts.utils.time_series_utils import get_precision_dtype
 
 from tvb.datatypes.region_mapping import RegionMapping, RegionVolumeMapping
 from tvb.datatypes.structural import StructuralMRI
@@ -242,98 +243,155 @@ class H5Writer(H5WriterBase):
         self._log_success("List of dictionaries", path)
         return h5_file
 
+    def _get_ts_data(self, data):
+        # Real numerical data are written in the floating point precision of the data, or of the precision policy.
+        # Integer data are cast to it as well.
+        if numpy.issubdtype(data.dtype, numpy.number) and not numpy.issubdtype(data.dtype, numpy.complexfloating):
+            return numpy.asarray(data).astype(get_precision_dtype(data), copy=False)
+        return None
+
+    def _write_ts_metadata(self, raw_data, h5_file, path, shape, data_max, data_min, time=None,
+                           labels_dimensions=None):
+        # Write everything but the data of TimeSeries raw_data, with its time and labels_dimensions, unless given
+        if time is None:
+            time = raw_data.time
+        h5_file.create_dataset("time", data=numpy.array(time))
+        if labels_dimensions is None:
+            labels_dimensions = raw_data.labels_dimensions
+        try:
+            h5_file.create_dataset("dimensions_labels",
+                                   data=numpy.array([numpy.string_(label)
+                                                     for label in raw_data.labels_ordering]))
+        except:
+            pass
+        for i_dim, dim_label in enumerate(raw_data.labels_ordering[1:]):
+            try:
+                labels = labels_dimensions[dim_label]
+                if isinstance(labels[0], string_types):
+                    h5_file.create_dataset("%s" % dim_label,
+                                           data=numpy.array([numpy.string_(label) for label in labels]))
+                else:
+                    h5_file.create_dataset("%s" % dim_label, data=labels)
+            except:
+                pass
+        h5_file.attrs.create("sample_period_unit", numpy.string_(raw_data.sample_period_unit))
+        h5_file.attrs.create("title", numpy.string_(raw_data.title))
+        write_metadata({KEY_MAX: data_max, KEY_MIN: data_min,
+                        KEY_STEPS: shape[0], KEY_CHANNELS: shape[1],
+                        KEY_SV: 1, KEY_SAMPLING: raw_data.sample_period,
+                        KEY_START: raw_data.start_time}, h5_file,
+                       self.H5_DATE_ATTRIBUTE, self.H5_VERSION_ATTRIBUTE, "data")
+        # If this is a TimeSeriesRegion try to write all of the structures below:
+        if hasattr(raw_data, "connectivity"):
+            h5_file.create_group("connectivity")
+            self.write_connectivity(raw_data.connectivity,
+                                    path=path, h5_file=h5_file["connectivity"], close_file=False)
+        if hasattr(raw_data, "region_mapping"):
+            h5_file.create_group("region_mapping")
+            self.write_region_mapping(raw_data.region_mapping,
+                                      raw_data.connectivity.number_of_regions,
+                                      subtype="Cortical", path=path,
+                                      h5_file=h5_file["region_mapping"], close_file=False)
+        if hasattr(raw_data, "region_mapping_volume"):
+            h5_file.create_group("volume_mapping")
+            self.write_volume_mapping(raw_data.region_mapping_volume,
+                                      raw_data.connectivity.number_of_regions,
+                                      path=path, h5_file=h5_file["volume_mapping"], close_file=False)
+
+        # If this is a TimeSeriesSensors try to write the sensors:
+        if hasattr(raw_data, "sensors"):
+            h5_file.create_group("sensors")
+            self.write_sensors(raw_data.sensors, path=path, h5_file=h5_file["sensors"], close_file=False)
+
+        # If this is a TimeSeriesSurface try to write the surface:
+        if hasattr(raw_data, "surface"):
+            h5_file.create_group("surface")
+            self.write_surface(raw_data.surface, path=path, h5_file=h5_file["surface"], close_file=False)
+
+        # If this is a TimeSeriesVolume try to write the volume:
+        if hasattr(raw_data, "volume"):
+            h5_file.create_group("volume")
+            self.write_volume(raw_data.volume, path=path, h5_file=h5_file["volume"], close_file=False)
+
     def write_ts(self, raw_data, sampling_period, path=None, h5_file=None, close_file=True):
         h5_file, path = self._open_file("TimeSeries", path, h5_file)
         write_metadata({self.H5_TYPE_ATTRIBUTE: "TimeSeries"}, h5_file,
                        self.H5_DATE_ATTRIBUTE, self.H5_VERSION_ATTRIBUTE)
         if isinstance(raw_data, (TimeSeries, TimeSeriesXarray)):
             h5_file.attrs.create(self.H5_SUBTYPE_ATTRIBUTE, numpy.string_(raw_data.__class__.__name__))
-            if len(raw_data.shape) == 4 and str(raw_data.data.dtype)[0] == "f":
-                h5_file.create_dataset("data", data=raw_data.data)
-                h5_file.create_dataset("time", data=raw_data.time)
-                try:
-                    h5_file.create_dataset("dimensions_labels",
-                                           data=numpy.array([numpy.string_(label)
-                                                             for label in raw_data.labels_ordering]))
-                except:
-                    pass
-                for i_dim, dim_label in enumerate(raw_data.labels_ordering[1:]):
-                    try:
-                        labels = raw_data.labels_dimensions[dim_label]
-                        if isinstance(labels[0], string_types):
-                            h5_file.create_dataset("%s" % dim_label,
-                                                   data=numpy.array([numpy.string_(label) for label in labels]))
-                        else:
-                            h5_file.create_dataset("%s" % dim_label, data=labels)
-                    except:
-                        pass
-                h5_file.attrs.create("sample_period_unit", numpy.string_(raw_data.sample_period_unit))
-                h5_file.attrs.create("title", numpy.string_(raw_data.title))
-                write_metadata({KEY_MAX: raw_data.data.max(), KEY_MIN: raw_data.data.min(),
-                                KEY_STEPS: raw_data.data.shape[0], KEY_CHANNELS: raw_data.data.shape[1],
-                                KEY_SV: 1, KEY_SAMPLING: raw_data.sample_period,
-                                KEY_START: raw_data.start_time}, h5_file,
-                               self.H5_DATE_ATTRIBUTE, self.H5_VERSION_ATTRIBUTE, "data")
-                # If this is a TimeSeriesRegion try to write all of the structures below:
-                if hasattr(raw_data, "connectivity"):
-                    h5_file.create_group("connectivity")
-                    self.write_connectivity(raw_data.connectivity,
-                                            path=path, h5_file=h5_file["connectivity"], close_file=False)
-                if hasattr(raw_data, "region_mapping"):
-                    h5_file.create_group("region_mapping")
-                    self.write_region_mapping(raw_data.region_mapping,
-                                              raw_data.connectivity.number_of_regions,
-                                              subtype="Cortical", path=path,
-                                              h5_file=h5_file["region_mapping"], close_file=False)
-                if hasattr(raw_data, "region_mapping_volume"):
-                    h5_file.create_group("volume_mapping")
-                    self.write_volume_mapping(raw_data.region_mapping_volume,
-                                              raw_data.connectivity.number_of_regions,
-                                              path=path, h5_file=h5_file["volume_mapping"], close_file=False)
-
-                # If this is a TimeSeriesSensors try to write the sensors:
-                if hasattr(raw_data, "sensors"):
-                    h5_file.create_group("sensors")
-                    self.write_sensors(raw_data.sensors, path=path, h5_file=h5_file["sensors"], close_file=False)
-
-                # If this is a TimeSeriesSurface try to write the surface:
-                if hasattr(raw_data, "surface"):
-                    h5_file.create_group("surface")
-                    self.write_surface(raw_data.surface, path=path, h5_file=h5_file["surface"], close_file=False)
-
-                # If this is a TimeSeriesVolume try to write the volume:
-                if hasattr(raw_data, "volume"):
-                    h5_file.create_group("volume")
-                    self.write_volume(raw_data.volume, path=path, h5_file=h5_file["volume"], close_file=False)
+            data = self._get_ts_data(raw_data.data)
+            if len(raw_data.shape) == 4 and data is not None:
+                h5_file.create_dataset("data", data=data)
+                self._write_ts_metadata(raw_data, h5_file, path, data.shape, data.max(), data.min())
 
             else:
-                raise_value_error("Invalid TS data. 4D (time, nodes) numpy.ndarray of floats expected")
+                raise_value_error("Invalid TS data. 4D (time, nodes) numpy.ndarray of real numbers expected")
         else:
             h5_file.attrs.create("time_series_type", "TimeSeries")
             if isinstance(raw_data, dict):
-                for data in raw_data:
-                    if len(raw_data[data].shape) == 2 and str(raw_data[data].dtype)[0] == "f":
-                        h5_file.create_dataset(data, data=raw_data[data])
-                        write_metadata({KEY_MAX: raw_data[data].max(), KEY_MIN: raw_data[data].min(),
-                                        KEY_STEPS: raw_data[data].shape[0], KEY_CHANNELS: raw_data[data].shape[1],
+                for key in raw_data:
+                    data = self._get_ts_data(raw_data[key])
+                    if len(raw_data[key].shape) == 2 and data is not None:
+                        h5_file.create_dataset(key, data=data)
+                        write_metadata({KEY_MAX: data.max(), KEY_MIN: data.min(),
+                                        KEY_STEPS: data.shape[0], KEY_CHANNELS: data.shape[1],
                                         KEY_SV: 1, KEY_SAMPLING: sampling_period, KEY_START: 0.0}, h5_file,
-                                        self.H5_DATE_ATTRIBUTE, self.H5_VERSION_ATTRIBUTE, data)
+                                        self.H5_DATE_ATTRIBUTE, self.H5_VERSION_ATTRIBUTE, key)
                     else:
-                        raise_value_error("Invalid TS data. 2D (time, nodes) numpy.ndarray of floats expected")
+                        raise_value_error("Invalid TS data. 2D (time, nodes) numpy.ndarray of real numbers expected")
             elif isinstance(raw_data, numpy.ndarray):
-                if len(raw_data.shape) != 2 and str(raw_data.dtype)[0] != "f":
-                    h5_file.create_dataset("data", data=raw_data)
-                    write_metadata({KEY_MAX: raw_data.max(), KEY_MIN: raw_data.min(), KEY_STEPS: raw_data.shape[0],
-                                    KEY_CHANNELS: raw_data.shape[1], KEY_SV: 1, KEY_SAMPLING: sampling_period,
+                data = self._get_ts_data(raw_data)
+                if len(raw_data.shape) == 2 and data is not None:
+                    h5_file.create_dataset("data", data=data)
+                    write_metadata({KEY_MAX: data.max(), KEY_MIN: data.min(), KEY_STEPS: data.shape[0],
+                                    KEY_CHANNELS: data.shape[1], KEY_SV: 1, KEY_SAMPLING: sampling_period,
                                     KEY_START: 0.0}, h5_file, self.H5_DATE_ATTRIBUTE, self.H5_VERSION_ATTRIBUTE, "data")
                 else:
-                    raise_value_error("Invalid TS data. 2D (time, nodes) numpy.ndarray of floats expected")
+                    raise_value_error("Invalid TS data. 2D (time, nodes) numpy.ndarray of real numbers expected")
             else:
                 raise_value_error("Invalid TS data. TimeSeries, "
-                                  "dictionary or 2D (time, nodes) numpy.ndarray of floats expected")
+                                  "dictionary or 2D (time, nodes) numpy.ndarray of real numbers expected")
         self._close_file(h5_file, close_file)
         self._log_success("TimeSeries", path)
         return h5_file
 
     def write_timeseries(self, timeseries, path=None, h5_file=None, close_file=True):
         return self.write_ts(timeseries, timeseries.sample_period, path, h5_file, close_file)
+
+    def write_ts_concatenation(self, time_series_list, dim, path=None, h5_file=None, close_file=True,
+                               service=None, **kwargs):
+        # Streaming variant of TimeSeriesService.concatenate():
+        # all TimeSeries are selected (via kwargs) and validated first, and then written one by one,
+        # straight into their slices of the data dataset, which is allocated once in the file, but never in memory,
+        # so that its TimeSeries can be read with H5Reader.read_timeseries().
+        if service is None:
+            # Imported here, so that the io layer does not depend on the service layer at import time
+            from tvb_scripts.service.time_series_service import TimeSeriesService
+            service = TimeSeriesService()
+        selected, shape, dtype, labels_dimensions = service.plan_concatenation(time_series_list, dim, **kwargs)
+        time_series = selected[0]
+        if len(shape) != 4 or not numpy.issubdtype(dtype, numpy.number) or \
+                numpy.issubdtype(dtype, numpy.complexfloating):
+            raise_value_error("Invalid TS data. 4D (time, nodes) numpy.ndarray of real numbers expected")
+        h5_file, path = self._open_file("TimeSeries", path, h5_file)
+        write_metadata({self.H5_TYPE_ATTRIBUTE: "TimeSeries"}, h5_file,
+                       self.H5_DATE_ATTRIBUTE, self.H5_VERSION_ATTRIBUTE)
+        h5_file.attrs.create(self.H5_SUBTYPE_ATTRIBUTE, numpy.string_(time_series.__class__.__name__))
+        dataset = h5_file.create_dataset("data", shape=shape, dtype=get_precision_dtype(numpy.empty(0, dtype)))
+        data_range = [numpy.inf, -numpy.inf]
+
+        def update_range(data):
+            if data.size > 0:
+                data_range[0] = min(data_range[0], data.min())
+                data_range[1] = max(data_range[1], data.max())
+
+        service.copy_concatenation(selected, dim, dataset, update_range)
+        if dim == 0:
+            time = time_series.start_time + numpy.arange(shape[0]) * time_series.sample_period
+        else:
+            time = numpy.array(time_series.time)
+        self._write_ts_metadata(time_series, h5_file, path, shape, data_range[1], data_range[0],
+                                time=time, labels_dimensions=labels_dimensions)
+        self._close_file(h5_file, close_file)
+        self._log_success("TimeSeries", path)
+        return h5_file
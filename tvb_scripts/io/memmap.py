@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Memory-mapped .npy or .raw backing store of TimeSeries data,
+with a json sidecar file of the TimeSeries metadata.
+Opening a TimeSeries only maps the data file to memory, without reading it,
+so that slicing is served by the page cache, and many processes can share the same file
+without each holding a private copy.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from tvb_scripts.datatypes.time_series import TimeSeries, TimeSeriesDict, RegularTimeAxis
+from tvb_scripts.utils.log_error_utils import initialize_logger, raise_value_error
+
+
+logger = initialize_logger(__name__)
+
+RAW_EXTENSION = ".raw"
+NPY_EXTENSION = ".npy"
+SIDECAR_EXTENSION = ".json"
+
+
+def get_sidecar_path(path):
+    return path + SIDECAR_EXTENSION
+
+
+def _is_raw(path):
+    extension = os.path.splitext(path)[1]
+    if extension not in [RAW_EXTENSION, NPY_EXTENSION]:
+        raise_value_error("File %s is neither a %s nor a %s file!" % (path, NPY_EXTENSION, RAW_EXTENSION), logger)
+    return extension == RAW_EXTENSION
+
+
+def _to_list(labels):
+    return np.array(labels).tolist()
+
+
+def get_time_series_metadata(time_series):
+    # A json serializable dictionary of the metadata of time_series, i.e., of everything but its data
+    metadata = {"time_series_type": time_series.__class__.__name__,
+                "title": time_series.title,
+                "labels_ordering": list(time_series.labels_ordering),
+                "labels_dimensions": dict([(dim, _to_list(labels))
+                                           for dim, labels in time_series.labels_dimensions.items()]),
+                "start_time": float(time_series.start_time),
+                "sample_period": float(time_series.sample_period),
+                "sample_period_unit": time_series.sample_period_unit}
+    if not isinstance(time_series.time, RegularTimeAxis):
+        metadata["time"] = _to_list(time_series.time)
+    return metadata
+
+
+def time_series_from_metadata(data, metadata, time_series=TimeSeries, time_series_dict=TimeSeriesDict, **kwargs):
+    # A TimeSeries of the class and metadata of get_time_series_metadata, around data, which are not copied.
+    # Any kwargs, e.g., connectivity or sensors, are passed to the TimeSeries constructor.
+    metadata = dict(metadata)
+    time_series_class = time_series_dict.get(metadata.pop("time_series_type", ""), time_series)
+    if "time" in metadata:
+        metadata["time"] = np.array(metadata["time"])
+    metadata.update(kwargs)
+    return time_series_class(data, share_data=True, **metadata)
+
+
+def write_memmap_time_series(time_series, path):
+    # Write the data of time_series to a .npy or .raw file, depending on the extension of path,
+    # and its metadata to a json sidecar file
+    data = np.asarray(time_series.data)
+    sidecar = get_time_series_metadata(time_series)
+    if _is_raw(path):
+        # A raw file has no header, therefore its shape and dtype are written in the sidecar file
+        # (data are written in C order)
+        sidecar.update({"shape": list(data.shape), "dtype": data.dtype.str})
+        np.ascontiguousarray(data).tofile(path)
+    else:
+        np.save(path, data)
+    with open(get_sidecar_path(path), "w") as sidecar_file:
+        json.dump(sidecar, sidecar_file, indent=1)
+    logger.info("%s has been written to file: %s" % (time_series.__class__.__name__, path))
+    return path
+
+
+def read_memmap_time_series(path, mode="r", time_series=TimeSeries, time_series_dict=TimeSeriesDict, **kwargs):
+    # Open the TimeSeries of a .npy or .raw file, and its json sidecar file, with its data memory-mapped.
+    # mode is the numpy.memmap one: "r" (default) for read-only data, which are copied upon writing to them,
+    # "r+" for writing to the file, or "c" for copy-on-write pages, which are not saved to the file.
+    # Any kwargs, e.g., connectivity or sensors, are passed to the TimeSeries constructor.
+    with open(get_sidecar_path(path), "r") as sidecar_file:
+        sidecar = json.load(sidecar_file)
+    if _is_raw(path):
+        data = np.memmap(path, dtype=np.dtype(sidecar.pop("dtype")), mode=mode, shape=tuple(sidecar.pop("shape")))
+    else:
+        data = np.load(path, mmap_mode=mode)
+    return time_series_from_metadata(data, sidecar, time_series, time_series_dict, **kwargs)
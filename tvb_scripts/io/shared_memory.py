@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+TimeSeries with data in multiprocessing.shared_memory, for process-pool workers.
+The owner process places the data of a TimeSeries in shared memory, and hands workers a lightweight, picklable
+descriptor, with the name of the shared memory block, the shape and dtype of the data, and the TimeSeries metadata.
+Workers attach to the shared memory block, and rebuild from the descriptor a TimeSeries around it, without copies.
+
+Ownership:
+- The owner (create) and every worker (attach) have to close() their TimeSeriesSharedMemory,
+  after they are done with the TimeSeries built on it.
+- Only the owner may unlink() the shared memory block, after all workers are done.
+  Using the owner TimeSeriesSharedMemory as a context manager closes and unlinks it upon exit.
+"""
+
+import numpy as np
+
+from tvb_scripts.io.memmap import get_time_series_metadata, time_series_from_metadata
+from tvb_scripts.datatypes.time_series import TimeSeries, TimeSeriesDict
+from tvb_scripts.utils.data_structures_utils import read_only_view
+from tvb_scripts.utils.log_error_utils import initialize_logger, raise_import_error, raise_value_error
+
+try:
+    from multiprocessing import resource_tracker
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:
+    SharedMemory = None
+
+# Names of the shared memory blocks created by this process, or by its parent, for forked workers,
+# which share the resource tracker of their parent, and, thus, have to leave the blocks registered to it
+_created_names = set()
+
+
+class TimeSeriesSharedMemory(object):
+    logger = initialize_logger(__name__)
+
+    def __init__(self, shared_memory, descriptor, owner=False):
+        self.shared_memory = shared_memory
+        self.descriptor = descriptor
+        self.owner = owner
+
+    @staticmethod
+    def _assert_shared_memory():
+        if SharedMemory is None:
+            raise_import_error("multiprocessing.shared_memory is not available (Python >= 3.8 is required)!")
+
+    @classmethod
+    def create(cls, time_series, name=None):
+        # Copy the data of time_series to a new shared memory block, owned by the calling process
+        cls._assert_shared_memory()
+        data = np.asarray(time_series.data)
+        shared_memory = SharedMemory(name=name, create=True, size=max(data.nbytes, 1))
+        _created_names.add(shared_memory.name)
+        np.ndarray(data.shape, dtype=data.dtype, buffer=shared_memory.buf)[...] = data
+        descriptor = {"name": shared_memory.name, "shape": data.shape, "dtype": data.dtype.str,
+                      "metadata": get_time_series_metadata(time_series)}
+        return cls(shared_memory, descriptor, owner=True)
+
+    @classmethod
+    def attach(cls, descriptor):
+        # Attach to the shared memory block of descriptor, without owning it
+        cls._assert_shared_memory()
+        try:
+            # Python >= 3.13: do not let the resource tracker of workers unlink the block of the owner
+            shared_memory = SharedMemory(name=descriptor["name"], track=False)
+        except TypeError:
+            # Python < 3.13 registers attached blocks as well, which the resource tracker of a worker,
+            # e.g., a spawned one, would unlink when the worker exits, and, thus, they are unregistered
+            shared_memory = SharedMemory(name=descriptor["name"])
+            if shared_memory.name not in _created_names:
+                resource_tracker.unregister(shared_memory._name, "shared_memory")
+        return cls(shared_memory, descriptor, owner=False)
+
+    @property
+    def data(self):
+        return np.ndarray(tuple(self.descriptor["shape"]), dtype=np.dtype(self.descriptor["dtype"]),
+                          buffer=self.shared_memory.buf)
+
+    def get_time_series(self, writeable=False, time_series=TimeSeries, time_series_dict=TimeSeriesDict, **kwargs):
+        # A TimeSeries around the shared data, without copying them.
+        # Unless writeable, its data are read-only, and, thus, copied to private memory if written to.
+        # Any kwargs, e.g., connectivity or sensors, are passed to the TimeSeries constructor.
+        data = self.data
+        if not writeable:
+            data = read_only_view(data)
+        return time_series_from_metadata(data, self.descriptor["metadata"], time_series, time_series_dict, **kwargs)
+
+    def close(self):
+        # Any TimeSeries built on the shared data should have been deleted before closing
+        self.shared_memory.close()
+
+    def unlink(self):
+        if not self.owner:
+            raise_value_error("Only the owner of shared memory block %s can unlink it!"
+                              % self.descriptor["name"], self.logger)
+        self.shared_memory.unlink()
+        _created_names.discard(self.shared_memory.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        if self.owner:
+            self.unlink()
+
+
+def share_time_series(time_series, name=None):
+    # Return the owner TimeSeriesSharedMemory of the data of time_series, and its descriptor for the workers
+    time_series_shared_memory = TimeSeriesSharedMemory.create(time_series, name)
+    return time_series_shared_memory, time_series_shared_memory.descriptor
+
+
+def attach_time_series(descriptor, writeable=False, **kwargs):
+    # Return the TimeSeries of a descriptor, and its TimeSeriesSharedMemory, which the worker has to close when done
+    time_series_shared_memory = TimeSeriesSharedMemory.attach(descriptor)
+    return time_series_shared_memory.get_time_series(writeable, **kwargs), time_series_shared_memory
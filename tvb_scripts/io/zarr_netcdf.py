@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+Zarr and NetCDF stores of xarray TimeSeries, with chunked, compressed data, labels as coordinates,
+and the TimeSeries metadata as attributes.
+Stores are reopened lazily, i.e., as dask-backed TimeSeries, which read only the chunks they compute.
+
+Parallel writes:
+- The chunks of a dask-backed TimeSeries are written in parallel, by the dask scheduler in use.
+- Multiple processes, e.g., the simulations of a parameter sweep, can write concurrently to the same zarr store,
+  after one process has initialized it, via initialize_zarr_time_series(), from a template TimeSeries of its
+  whole shape and labels. Each process then writes its own region of it, via
+  write_zarr_time_series(..., region={dimension: slice}). Regions have to be aligned to the chunks of the store,
+  so that no chunk is written by two processes.
+- NetCDF files are written by a single process.
+"""
+
+import numpy as np
+import xarray as xr
+from six import string_types
+
+from tvb_scripts.datatypes.time_series_xarray import TimeSeries, TimeSeriesDict
+from tvb_scripts.utils.data_structures_utils import is_integer
+from tvb_scripts.utils.log_error_utils import initialize_logger, raise_import_error, raise_value_error
+
+try:
+    import zarr
+except ImportError:
+    zarr = None
+
+
+logger = initialize_logger(__name__)
+
+DATA_NAME = "data"
+
+# The blosc compressors of zarr stores, and the default one
+BLOSC_COMPRESSORS = ["blosclz", "lz4", "lz4hc", "zlib", "zstd"]
+DEFAULT_ZARR_COMPRESSOR = "zstd"
+
+# The compressors of netCDF4 files, and the default one
+NETCDF_COMPRESSORS = ["zlib", "szip", "zstd", "bzip2", "blosc_lz", "blosc_lz4", "blosc_lz4hc", "blosc_zlib",
+                      "blosc_zstd"]
+DEFAULT_NETCDF_COMPRESSOR = "zlib"
+
+
+def _assert_zarr():
+    if zarr is None:
+        raise_import_error("zarr is required for zarr stores of TimeSeries!", logger)
+
+
+def _get_dim_name(time_series, dim):
+    if is_integer(dim):
+        return time_series.labels_ordering[dim]
+    return dim
+
+
+def _get_chunk_sizes(time_series, chunks):
+    # Chunk sizes per dimension, as for TimeSeries.chunk(), with -1, or missing dimensions, meaning a single chunk
+    if chunks is None:
+        if time_series.is_chunked:
+            return tuple([chunk[0] for chunk in time_series.chunks])
+        return None
+    return tuple([time_series.shape[i_dim] if size == -1 else size
+                  for i_dim, size in enumerate(time_series._get_chunks(chunks).values())])
+
+
+def _to_dataset(time_series, chunk_sizes=None):
+    # A Dataset of the data of time_series, with its labels as coordinates, and its metadata as attributes,
+    # but without any other (e.g., not serializable) attributes of the TimeSeries.
+    data = time_series._data.copy(deep=False)
+    data.attrs = {}
+    if chunk_sizes is not None and time_series.is_chunked:
+        # The dask chunks have to match the chunks of the store
+        data = data.chunk(dict(zip(data.dims, chunk_sizes)))
+    dataset = data.to_dataset(name=DATA_NAME)
+    dataset.attrs = {"time_series_type": time_series.__class__.__name__,
+                     "title": time_series.title or "",
+                     "sample_period_unit": time_series.sample_period_unit}
+    return dataset
+
+
+def _from_dataset(dataset, time_series=TimeSeries, time_series_dict=TimeSeriesDict, **kwargs):
+    attrs = dict(dataset.attrs)
+    time_series_class = time_series_dict.get(attrs.get("time_series_type", ""), time_series)
+    data = dataset[DATA_NAME]
+    data.name = attrs.get("title", "") or time_series_class.__name__
+    data.attrs = {"sample_period_unit": attrs.get("sample_period_unit", "")}
+    ts = time_series_class(data, **kwargs)
+    ts._data.attrs.update(data.attrs)
+    return ts
+
+
+def _get_zarr_compressor(compressor, clevel, zarr_format):
+    if compressor is None or not isinstance(compressor, string_types):
+        # No compression, or a codec object
+        return compressor
+    if compressor not in BLOSC_COMPRESSORS:
+        raise_value_error("Compressor %s is not one of the blosc compressors %s!"
+                          % (compressor, str(BLOSC_COMPRESSORS)), logger)
+    if int(zarr.__version__.split(".")[0]) >= 3 and zarr_format != 2:
+        return zarr.codecs.BloscCodec(cname=compressor, clevel=clevel, shuffle="bitshuffle")
+    from numcodecs import Blosc
+    return Blosc(cname=compressor, clevel=clevel, shuffle=Blosc.BITSHUFFLE)
+
+
+def _get_zarr_kwargs(zarr_format):
+    # zarr_format is passed only if given, since zarr < 3 does not support it
+    if zarr_format is None:
+        return {}
+    return {"zarr_format": zarr_format}
+
+
+def _get_zarr_encoding(compressor, clevel, chunk_sizes, zarr_format):
+    encoding = {}
+    if chunk_sizes is not None:
+        encoding["chunks"] = chunk_sizes
+    compressor = _get_zarr_compressor(compressor, clevel, zarr_format)
+    if int(zarr.__version__.split(".")[0]) >= 3 and zarr_format != 2:
+        encoding["compressors"] = None if compressor is None else [compressor]
+    else:
+        encoding["compressor"] = compressor
+    return {DATA_NAME: encoding}
+
+
+def initialize_zarr_time_series(time_series, path, chunks=None, compressor=DEFAULT_ZARR_COMPRESSOR, clevel=5,
+                                zarr_format=None):
+    # Create the zarr store of the template time_series, i.e., of its shape, labels and metadata,
+    # without writing its (lazy, dask-backed) data,
+    # so that multiple processes can then write their regions of it, concurrently.
+    _assert_zarr()
+    if not time_series.is_chunked:
+        time_series = time_series.chunk(chunks if chunks is not None else -1)
+    chunk_sizes = _get_chunk_sizes(time_series, chunks)
+    _to_dataset(time_series, chunk_sizes).to_zarr(path, mode="w", compute=False,
+                                                   encoding=_get_zarr_encoding(compressor, clevel, chunk_sizes,
+                                                                               zarr_format),
+                                                   **_get_zarr_kwargs(zarr_format))
+    logger.info("The zarr store of %s has been initialized: %s" % (time_series.__class__.__name__, path))
+    return path
+
+
+def write_zarr_time_series(time_series, path, chunks=None, compressor=DEFAULT_ZARR_COMPRESSOR, clevel=5,
+                           region=None, zarr_format=None):
+    # Write time_series to a zarr store, chunked along time and/or space, as for TimeSeries.chunk(),
+    # or as the TimeSeries itself, if it is dask-backed, and compressed by a blosc compressor, or any codec object.
+    # If region is given, as a dict of slices of dimension names or indices,
+    # time_series is written to that region of an initialized store (see initialize_zarr_time_series()),
+    # which determines chunks and compressor.
+    _assert_zarr()
+    if region is not None:
+        region = dict([(_get_dim_name(time_series, dim), slc) for dim, slc in region.items()])
+        dataset = _to_dataset(time_series)
+        # Only variables along the dimensions of the region are written, the rest are already in the store
+        dataset = dataset.drop_vars([name for name, variable in dataset.variables.items()
+                                     if len(set(variable.dims).intersection(region.keys())) == 0])
+        dataset.attrs = {}
+        dataset.to_zarr(path, mode="r+", region=region)
+        logger.info("%s has been written to region %s of the zarr store: %s"
+                    % (time_series.__class__.__name__, str(region), path))
+        return path
+    chunk_sizes = _get_chunk_sizes(time_series, chunks)
+    _to_dataset(time_series, chunk_sizes).to_zarr(path, mode="w",
+                                                   encoding=_get_zarr_encoding(compressor, clevel, chunk_sizes,
+                                                                               zarr_format),
+                                                   **_get_zarr_kwargs(zarr_format))
+    logger.info("%s has been written to zarr store: %s" % (time_series.__class__.__name__, path))
+    return path
+
+
+def read_zarr_time_series(path, chunks={}, time_series=TimeSeries, time_series_dict=TimeSeriesDict, **kwargs):
+    # Open the TimeSeries of a zarr store lazily, i.e., dask-backed, with the chunks of the store,
+    # unless other chunks are given, or chunks is None, in which case all data are loaded in memory.
+    # Any kwargs, e.g., connectivity or sensors, are passed to the TimeSeries constructor.
+    _assert_zarr()
+    dataset = xr.open_zarr(path, chunks=chunks)
+    if chunks is None:
+        dataset = dataset.load()
+    return _from_dataset(dataset, time_series, time_series_dict, **kwargs)
+
+
+def write_netcdf_time_series(time_series, path, chunks=None, compressor=DEFAULT_NETCDF_COMPRESSOR, clevel=4,
+                             engine="netcdf4"):
+    # Write time_series to a netCDF4 file, chunked along time and/or space, as for TimeSeries.chunk(),
+    # or as the TimeSeries itself, if it is dask-backed, and compressed by one of NETCDF_COMPRESSORS.
+    encoding = {}
+    if compressor is not None:
+        if compressor not in NETCDF_COMPRESSORS:
+            raise_value_error("Compressor %s is not one of the netCDF compressors %s!"
+                              % (compressor, str(NETCDF_COMPRESSORS)), logger)
+        encoding.update({"compression": compressor, "complevel": clevel})
+    chunk_sizes = _get_chunk_sizes(time_series, chunks)
+    if chunk_sizes is not None:
+        encoding["chunksizes"] = chunk_sizes
+    _to_dataset(time_series, chunk_sizes).to_netcdf(path, mode="w", engine=engine, encoding={DATA_NAME: encoding})
+    logger.info("%s has been written to netCDF file: %s" % (time_series.__class__.__name__, path))
+    return path
+
+
+def read_netcdf_time_series(path, chunks={}, engine=None, time_series=TimeSeries, time_series_dict=TimeSeriesDict,
+                            **kwargs):
+    # Open the TimeSeries of a netCDF file lazily, i.e., dask-backed, with the chunks of the file,
+    # unless other chunks are given, or chunks is None, in which case all data are loaded in memory,
+    # and the file is closed.
+    # Any kwargs, e.g., connectivity or sensors, are passed to the TimeSeries constructor.
+    dataset = xr.open_dataset(path, chunks=chunks, engine=engine)
+    if chunks is None:
+        with dataset:
+            dataset = dataset.load()
+    return _from_dataset(dataset, time_series, time_series_dict, **kwargs)
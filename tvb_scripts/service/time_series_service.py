@@ -1,17 +1,21 @@
 # -*- coding: utf-8 -*-
+import time
 from copy import deepcopy
 from six import string_types
 from collections import OrderedDict
 
 import numpy as np
-from scipy.signal import convolve, detrend, hilbert
+from scipy.signal import detrend, sosfilt, sosfilt_zi
+from scipy.sparse import csr_matrix
 
 from tvb_scripts.utils.log_error_utils import raise_value_error, initialize_logger
 from tvb_scripts.utils.data_structures_utils import ensure_list
 from tvb_scripts.utils.computations_utils import select_greater_values_array_inds, \
     select_by_hierarchical_group_metric_clustering
 from tvb_scripts.utils.time_series_utils import abs_envelope, spectrogram_envelope, filter_data, decimate_signals, \
-    normalize_signals
+    normalize_signals, get_precision_dtype, ensure_precision, apply_along_time, filter_bank, design_sos_filter, \
+    get_filter_mode, moving_average, convolve_along_time, \
+    hilbert_envelope, standardize_signals, correlation_matrix, CORRELATION_DENSE_MAX_SIGNALS, DEFAULT_CORRELATION_TOP_K
 from tvb_scripts.datatypes.time_series import TimeSeriesSEEG, LABELS_ORDERING
 
 
@@ -29,64 +33,174 @@ class TimeSeriesService(object):
         else:
             return time_series.duplicate()
 
-    def decimate_by_filtering(self, time_series, decim_ratio, **kwargs):
+    def decimate_by_filtering(self, time_series, decim_ratio, n_jobs=1, **kwargs):
         if decim_ratio > 1:
             decim_data, decim_time, decim_dt, decim_n_times = decimate_signals(time_series.squeezed,
-                                                                               time_series.time, decim_ratio)
+                                                                               time_series.time, decim_ratio, n_jobs)
             return time_series.duplicate(data=decim_data, sample_period=float(decim_dt), **kwargs)
         else:
             return time_series.duplicate(**kwargs)
 
-    def convolve(self, time_series, win_len=None, kernel=None, **kwargs):
-        n_kernel_points = np.int(np.round(win_len))
-        if kernel is None:
-            kernel = np.ones((n_kernel_points, 1, 1, 1)) / n_kernel_points
+    def convolve(self, time_series, win_len=None, kernel=None, n_jobs=1, **kwargs):
+        # Convolve along time only, with a boxcar kernel of win_len points, equal to kernel if it is a scalar,
+        # or to 1/win_len, i.e., a moving average, if kernel is None, which is computed in O(N) via cumulative sums,
+        # or with an arbitrary kernel along time, via direct, overlap-add or fft convolution, depending on its size.
+        if kernel is None or np.size(kernel) == 1:
+            scale = None if kernel is None else float(np.asarray(kernel).item())
+            n_kernel_points = 1 if win_len is None else int(np.round(win_len))
+            fun = lambda data: moving_average(data, n_kernel_points, scale)
         else:
-            kernel = kernel * np.ones((n_kernel_points, 1, 1, 1))
-        return time_series.duplicate(data=convolve(time_series.data, kernel, mode='same'), **kwargs)
-
-    def hilbert_envelope(self, time_series, **kwargs):
-        return time_series.duplicate(data=np.abs(hilbert(time_series.data, axis=0)), **kwargs)
-
-    def spectrogram_envelope(self, time_series, lpf=None, hpf=None, nperseg=None, **kwargs):
-        data, time = spectrogram_envelope(time_series.squeezed, time_series.sample_rate, lpf, hpf, nperseg)
+            kernel = np.asarray(kernel)
+            if kernel.size != kernel.shape[0]:
+                raise_value_error("Kernel of shape %s does not extend along time only!" % str(kernel.shape),
+                                  self.logger)
+            fun = lambda data: convolve_along_time(data, kernel.ravel(), n_jobs)
+        return self._apply(time_series, fun, dtype=self._precision_dtype(time_series), **kwargs)
+
+    def _get_data(self, data):
+        # The data in the floating point precision of the TimeSeries, or of the global precision policy
+        dtype = get_precision_dtype(data)
+        return np.asarray(data).astype(dtype, copy=False), dtype
+
+    def _is_chunked(self, time_series):
+        return getattr(time_series, "is_chunked", False)
+
+    def _get_out(self, time_series, inplace=False, out=None):
+        # The buffer to write the results of an operation to, i.e., the data of time_series themselves, if inplace,
+        # or out, which have to be arrays of the shape of the data, and of their floating point precision
+        if not inplace and out is None:
+            return None
+        if self._is_chunked(time_series):
+            raise_value_error("In place or out= operations are not possible for chunked TimeSeries!", self.logger)
+        if inplace:
+            # Only data buffers owned by time_series are overwritten, whereas any other ones,
+            # e.g., shared with other TimeSeries, or arrays set by the caller, are copied first, once
+            time_series._ensure_writeable_data()
+            out = time_series.data
+        if not isinstance(out, np.ndarray) or out.shape != time_series.shape or \
+                out.dtype != get_precision_dtype(time_series.data):
+            raise_value_error("Cannot write the results of %s of shape %s and precision %s to %s %s of shape %s!"
+                              % (time_series.__class__.__name__, str(time_series.shape),
+                                 str(get_precision_dtype(time_series.data)),
+                                 "the data" if inplace else "out", str(getattr(out, "dtype", type(out))),
+                                 str(getattr(out, "shape", None))), self.logger)
+        return out
+
+    def _apply(self, time_series, fun, along_time=True, dtype=None, inplace=False, out=None, **kwargs):
+        # Return a duplicate of time_series with data fun(data), of the same shape.
+        # Chunked (dask-backed) TimeSeries are processed lazily, chunk by chunk, in parallel,
+        # where, if along_time, fun needs whole signals along time, and, thus, chunks along time are merged.
+        # If inplace, fun(data, out=data) overwrites the data of time_series, which is returned,
+        # or, if out is given, fun(data, out=out) writes to out, which becomes the data of the returned duplicate,
+        # so that no new arrays of the size of the data are allocated.
+        out = self._get_out(time_series, inplace, out)
+        if out is not None:
+            data = fun(time_series.data, out=out)
+            if inplace:
+                if hasattr(time_series, "_invalidate_cache"):
+                    time_series._invalidate_cache()
+                return time_series.duplicate(**kwargs) if len(kwargs) > 0 else time_series
+            return time_series.duplicate(data=data, **kwargs)
+        if self._is_chunked(time_series):
+            if along_time:
+                return time_series.map_signals(fun, dtype, **kwargs)
+            return time_series.duplicate(data=fun(time_series.lazy_data), **kwargs)
+        return time_series.duplicate(data=fun(time_series.data), **kwargs)
+
+    def _precision_dtype(self, time_series):
+        if self._is_chunked(time_series):
+            return get_precision_dtype(time_series.lazy_data)
+        return get_precision_dtype(time_series.data)
+
+    def hilbert_envelope(self, time_series, n_jobs=1, max_memory=None, block_length=None, overlap=None, **kwargs):
+        # Envelope of the analytic signal, via fast length ffts, in chunks of signals, processed by n_jobs threads,
+        # within a memory budget of max_memory bytes, if given, and in overlapping time blocks for long recordings
+        return self._apply(time_series,
+                           lambda data: hilbert_envelope(data, n_jobs, max_memory, block_length, overlap),
+                           dtype=self._precision_dtype(time_series), **kwargs)
+
+    def spectrogram_envelope(self, time_series, lpf=None, hpf=None, nperseg=None, bands=None, n_jobs=1, **kwargs):
+        # The spectrogram envelope of all signals, keeping the 4D structure of time_series,
+        # or, if (lowcut, highcut) bands are given, a list of the envelopes of each band, from the same spectrogram.
+        data, time = spectrogram_envelope(time_series.data, time_series.sample_rate, lpf, hpf, nperseg, bands,
+                                          n_jobs)
         if len(time_series.sample_period_unit) > 0 and time_series.sample_period_unit[0] == "m":
             time *= 1000
-        return time_series.duplicate(data=data, start_time=time_series.start_time + time[0],
-                                     sample_period=np.diff(time).mean(), **kwargs)
-
-    def abs_envelope(self, time_series, **kwargs):
-        return time_series.duplicate(data=abs_envelope(time_series.data), **kwargs)
-
-    def detrend(self, time_series, type='linear', **kwargs):
-        return time_series.duplicate(data=detrend(time_series.data, axis=0, type=type), **kwargs)
-
-    def normalize(self, time_series, normalization=None, axis=None, percent=None, **kwargs):
-        return time_series.duplicate(data=normalize_signals(time_series.data, normalization, axis, percent), **kwargs)
-
-    def filter(self, time_series, lowcut=None, highcut=None, mode='bandpass', order=3, **kwargs):
-        return time_series.duplicate(data=filter_data(time_series.data, time_series.sample_rate,
-                                                     lowcut, highcut, mode, order), **kwargs)
-
-    def log(self, time_series, **kwargs):
-        return time_series.duplicate(data=np.log(time_series.data), **kwargs)
-
-    def exp(self, time_series, **kwargs):
-        return time_series.duplicate(data=np.exp(time_series.data), **kwargs)
-
-    def abs(self, time_series, **kwargs):
-        return time_series.duplicate(data=np.abs(time_series.data), **kwargs)
+        kwargs.update({"start_time": time_series.start_time + time[0], "sample_period": np.diff(time).mean()})
+        if bands is None:
+            return time_series.duplicate(data=data, **kwargs)
+        return [time_series.duplicate(data=data[..., i_band], **kwargs) for i_band in range(len(bands))]
+
+    # abs_envelope, detrend, normalize, log, exp, abs and square write their results to the data of time_series
+    # themselves, if inplace=True, or to out, if given, instead of new arrays (see _apply()).
+
+    def abs_envelope(self, time_series, inplace=False, out=None, **kwargs):
+        return self._apply(time_series, abs_envelope, inplace=inplace, out=out, **kwargs)
+
+    def detrend(self, time_series, type='linear', n_jobs=1, inplace=False, out=None, **kwargs):
+        def detrend_data(data, out=None):
+            data, dtype = self._get_data(data)
+            # If out is given, only the temporaries of the chunks of signals being detrended are allocated
+            return ensure_precision(apply_along_time(lambda x: detrend(x, axis=0, type=type), data, n_jobs,
+                                                     out=out),
+                                    dtype, "detrend")
+
+        return self._apply(time_series, detrend_data, dtype=self._precision_dtype(time_series),
+                           inplace=inplace, out=out, **kwargs)
+
+    def normalize(self, time_series, normalization=None, axis=None, percent=None, inplace=False, out=None,
+                  **kwargs):
+        # Only normalizations along time can be computed chunk by chunk
+        along_time = all([ax == 0 for ax in ensure_list(axis)])
+        if self._is_chunked(time_series) and not along_time:
+            time_series = time_series.compute()
+        return self._apply(time_series,
+                           lambda data, out=None: normalize_signals(data, normalization, axis, percent, out=out),
+                           dtype=self._precision_dtype(time_series), inplace=inplace, out=out, **kwargs)
+
+    def filter(self, time_series, lowcut=None, highcut=None, mode='bandpass', order=3, n_jobs=1, **kwargs):
+        # n_jobs threads filter the signals in parallel, with results identical to the serial ones
+        return self._apply(time_series,
+                           lambda data: filter_data(data, time_series.sample_rate, lowcut, highcut, mode, order,
+                                                    n_jobs=n_jobs),
+                           dtype=self._precision_dtype(time_series), **kwargs)
+
+    def filter_bank(self, time_series, bands, mode='bandpass', order=3, n_jobs=1, **kwargs):
+        # Return a list of the TimeSeries of time_series filtered in each one of the (lowcut, highcut) bands,
+        # computed in one pass over the data, unless time_series is chunked, in which case each band is a lazy filter.
+        if self._is_chunked(time_series):
+            return [self.filter(time_series, lowcut, highcut, mode, order, **kwargs) for lowcut, highcut in bands]
+        data = filter_bank(time_series.data, time_series.sample_rate, bands, mode, order, n_jobs=n_jobs)
+        return [time_series.duplicate(data=data[..., i_band], **kwargs) for i_band in range(len(bands))]
+
+    def log(self, time_series, inplace=False, out=None, **kwargs):
+        return self._apply(time_series, np.log, along_time=False, inplace=inplace, out=out, **kwargs)
+
+    def exp(self, time_series, inplace=False, out=None, **kwargs):
+        return self._apply(time_series, np.exp, along_time=False, inplace=inplace, out=out, **kwargs)
+
+    def abs(self, time_series, inplace=False, out=None, **kwargs):
+        return self._apply(time_series, np.abs, along_time=False, inplace=inplace, out=out, **kwargs)
 
     def power(self, time_series):
         return np.sum(self.square(self.normalize(time_series, "mean", axis=0)).squeezed, axis=0)
 
-    def square(self, time_series, **kwargs):
-        return time_series.duplicate(data=time_series.data ** 2, **kwargs)
+    def square(self, time_series, inplace=False, out=None, **kwargs):
+        return self._apply(time_series, np.square, along_time=False, inplace=inplace, out=out, **kwargs)
 
-    def correlation(self, time_series):
-        return np.corrcoef(time_series.squeezed.T)
+    def correlation(self, time_series, top_k=None, threshold=None, path=None, n_jobs=1, **kwargs):
+        # The correlation matrix of the signals of time_series, i.e., of all but its time dimension flattened,
+        # computed by float32 tiles, as a dense array, a memory mapped .npy file at path, the top_k most correlated
+        # signals of each signal, or a sparse matrix of the correlations above threshold (see correlation_matrix())
+        return correlation_matrix(np.asarray(time_series.data), top_k=top_k, threshold=threshold, path=path,
+                                  n_jobs=n_jobs, **kwargs)
 
     def compute_across_dimension(self, time_series, dimension_name_or_index, fun, fun_name, **kwargs):
+        if hasattr(time_series, "reduce_dimension"):
+            # xarray TimeSeries reduce their labelled data themselves, lazily, across all chunks in parallel, if chunked
+            if isinstance(dimension_name_or_index, string_types):
+                dimension_name_or_index = time_series.labels_ordering.index(dimension_name_or_index)
+            return time_series.reduce_dimension(fun, dimension_name_or_index, fun_name, **kwargs)
         labels_ordering = deepcopy(time_series.labels_ordering)
         labels_dimensions = deepcopy(time_series.labels_dimensions)
         if isinstance(dimension_name_or_index, string_types):
@@ -120,12 +234,16 @@ class TimeSeriesService(object):
         return self.compute_across_dimension(time_series, dimension_name_or_index, np.sum, "Sum", **kwargs)
 
     def _compile_select_funs(self, labels_ordering, **kwargs):
-        select_funs = []
+        # All dimensions' selections are planned together,
+        # so that the data are read, and the TimeSeries is duplicated, only once
+        selection = OrderedDict()
         for dim, lbl in enumerate(labels_ordering):
             indices_labels_slices = ensure_list(kwargs.pop(lbl, []))
             if len(indices_labels_slices) > 0:
-                select_funs.append(lambda ts: getattr(ts, "slice_data_across_dimension")(indices_labels_slices, dim))
-        return select_funs
+                selection[dim] = indices_labels_slices
+        if len(selection) > 0:
+            return [lambda ts: ts.slice_data_across_dimensions(selection)]
+        return []
 
     def select(self, time_series, select_funs=None, **kwargs):
         if select_funs is None:
@@ -134,43 +252,73 @@ class TimeSeriesService(object):
             time_series = fun(time_series)
         return time_series, select_funs
 
-    def concatenate(self, time_series_list, dim, **kwargs):
+    def _get_dimension_labels(self, time_series, dim):
+        # The labels of dimension dim, or an empty list, if there are none, e.g., for time
+        return ensure_list(time_series.labels_dimensions.get(time_series.get_dimension_name(dim), []))
+
+    def plan_concatenation(self, time_series_list, dim, **kwargs):
+        # Select (via kwargs, as for select()) and validate all TimeSeries to concatenate along dimension dim,
+        # before any data are copied, and return them, with the shape, dtype and labels of their concatenation.
         time_series_list = ensure_list(time_series_list)
-        n_ts = len(time_series_list)
-        if n_ts > 0:
-            out_time_series, select_funs = self.select(time_series_list[0], **kwargs)
-            if n_ts > 1:
-                for id, time_series in enumerate(time_series_list[1:]):
-                    if np.float32(out_time_series.sample_period) != np.float32(time_series.sample_period):
-                        raise_value_error("Timeseries concatenation failed!\n"
-                                          "Timeseries %d have a different time step %s \n "
-                                          "than the concatenated ones %s!" %
-                                          (id, str(np.float32(time_series.sample_period)),
-                                           str(np.float32(out_time_series.sample_period))))
-                    else:
-                        time_series = self.select(time_series, select_funs)[0]
-                        # try:
-                        out_time_series.data = np.concatenate([out_time_series.data, time_series.data], axis=dim)
-                        if len(out_time_series.get_dimension_labels(dim)) > 0:
-                            if len(time_series.get_dimension_labels(dim)) > 0:
-                                dim_label = out_time_series.get_dimension_name(dim)
-                                out_time_series.labels_dimensions[dim_label] = \
-                                    np.array(ensure_list(out_time_series.get_dimension_labels(dim)) +
-                                             ensure_list(time_series.get_dimension_labels(dim)))
-                            else:
-                                raise_value_error("TimeSeries to concatenate %s \n "
-                                                  "has no dimension labels across the concatenation axis,\n"
-                                                  "unlike the TimeSeries to be appended to: %s!"
-                                                  % (str(time_series), str(out_time_series)))
-                        # except:
-                        #     raise_value_error("Timeseries concatenation failed!\n"
-                        #                       "Timeseries %d have a shape %s and the concatenated ones %s!" %
-                        #                       (id, str(out_time_series.shape), str(time_series.shape)))
-                return out_time_series
-            else:
-                return out_time_series
-        else:
-            raise_value_error("Cannot concatenate empty list of TimeSeries!")
+        if len(time_series_list) == 0:
+            raise_value_error("Cannot concatenate empty list of TimeSeries!", self.logger)
+        first_time_series, select_funs = self.select(time_series_list[0], **kwargs)
+        selected = [first_time_series] + [self.select(time_series, select_funs)[0]
+                                          for time_series in time_series_list[1:]]
+        sample_period = np.float32(first_time_series.sample_period)
+        shape = list(first_time_series.shape)
+        has_labels = len(self._get_dimension_labels(first_time_series, dim)) > 0
+        labels = []
+        for id, time_series in enumerate(selected):
+            if np.float32(time_series.sample_period) != sample_period:
+                raise_value_error("Timeseries concatenation failed!\n"
+                                  "Timeseries %d have a different time step %s \n "
+                                  "than the concatenated ones %s!" %
+                                  (id, str(np.float32(time_series.sample_period)), str(sample_period)),
+                                  self.logger)
+            if len(time_series.shape) != len(shape) or \
+                    any([time_series.shape[i_dim] != shape[i_dim] for i_dim in range(len(shape)) if i_dim != dim]):
+                raise_value_error("Timeseries concatenation failed!\n"
+                                  "Timeseries %d have a shape %s and the concatenated ones %s!" %
+                                  (id, str(time_series.shape), str(first_time_series.shape)), self.logger)
+            if has_labels:
+                time_series_labels = self._get_dimension_labels(time_series, dim)
+                if len(time_series_labels) == 0:
+                    raise_value_error("TimeSeries to concatenate %s \n "
+                                      "has no dimension labels across the concatenation axis,\n"
+                                      "unlike the TimeSeries to be appended to: %s!"
+                                      % (str(time_series), str(first_time_series)), self.logger)
+                labels += time_series_labels
+        shape[dim] = int(np.sum([time_series.shape[dim] for time_series in selected]))
+        dtype = np.result_type(*[time_series.data.dtype for time_series in selected])
+        labels_dimensions = dict(first_time_series.labels_dimensions)
+        if has_labels:
+            labels_dimensions[first_time_series.get_dimension_name(dim)] = np.array(labels)
+        return selected, tuple(shape), dtype, labels_dimensions
+
+    def copy_concatenation(self, selected, dim, out, fun=None):
+        # Copy each one of the selected TimeSeries (see plan_concatenation()) exactly once,
+        # to its slice along dim of out, which may be any array-like with slice assignment, e.g., an h5py dataset,
+        # calling fun(data), if given, for the data of each one of them
+        i_start = 0
+        indices = [slice(None)] * len(out.shape)
+        for time_series in selected:
+            data = time_series.data
+            indices[dim] = slice(i_start, i_start + data.shape[dim])
+            out[tuple(indices)] = data
+            if fun is not None:
+                fun(data)
+            i_start += data.shape[dim]
+        return out
+
+    def concatenate(self, time_series_list, dim, **kwargs):
+        # All TimeSeries are selected and validated first, and then copied, once each, to the preallocated output
+        selected, shape, dtype, labels_dimensions = self.plan_concatenation(time_series_list, dim, **kwargs)
+        if len(selected) == 1:
+            return selected[0]
+        data = np.empty(shape, dtype=dtype)
+        self.copy_concatenation(selected, dim, data)
+        return selected[0].duplicate(data=data, labels_dimensions=labels_dimensions)
 
     def concatenate_in_time(self, time_series_list, **kwargs):
         return self.concatenate(time_series_list, 0, **kwargs)
@@ -202,14 +350,73 @@ class TimeSeriesService(object):
                                                                              n_groups, members_per_group))
         return time_series.get_subspace_by_index(selection), selection
 
+    def _standardize_space_signals(self, time_series):
+        # One standardized signal per space label, i.e., the standardized signals of all its variables and modes,
+        # concatenated, and scaled, so that the correlation of two space labels is the mean correlation of
+        # their signals of the same variable and mode, and the power of each space label,
+        # summed across its variables and modes.
+        (n_variables, n_signals, n_modes) = time_series.shape[1:]
+        signals, norms = standardize_signals(np.asarray(time_series.data))
+        signals = signals.reshape((n_variables, n_signals, n_modes, -1))
+        if n_variables * n_modes > 1:
+            signals = np.transpose(signals, (1, 0, 2, 3)) / np.sqrt(n_variables * n_modes, dtype=signals.dtype)
+        power = np.sum((norms ** 2).reshape((n_variables, n_signals, n_modes)), axis=(0, 2))
+        return signals.reshape((n_signals, -1)), power
+
     def select_by_correlation_power(self, time_series, correlation=np.array([]), disconnectivity=np.array([]),
-                                    power=np.array([]), n_groups=10, members_per_group=1):
-        if correlation.shape[0] != time_series.number_of_labels:
-            correlation = self.correlation(time_series)
-        if len(power) != time_series.number_of_labels:
-            power = self.power(time_series)
-        return self.select_by_hierarchical_group_metric_clustering(time_series, 1 - correlation,
-                                                                   disconnectivity, power, n_groups, members_per_group)
+                                    power=np.array([]), n_groups=10, members_per_group=1, top_k=None, n_jobs=1):
+        # Space labels are clustered by the correlation distance of their signals, i.e., 1 - correlation,
+        # where, for more than one variable or mode, correlation is the mean correlation across them.
+        # For more than CORRELATION_DENSE_MAX_SIGNALS labels, e.g., surface vertices, unless a correlation
+        # or disconnectivity matrix is given, or if top_k is given, only the distances of each label to its top_k
+        # most correlated labels are computed, instead of a dense correlation matrix,
+        # and the pairs of labels of nonzero disconnectivity, if given, are removed from their sparse connectivity.
+        n_signals = time_series.number_of_labels
+        if correlation.shape[0] == n_signals:
+            if len(power) != n_signals:
+                power = self._standardize_space_signals(time_series)[1]
+            return self.select_by_hierarchical_group_metric_clustering(time_series, 1 - correlation,
+                                                                       disconnectivity, power, n_groups,
+                                                                       members_per_group)
+        # The signals are standardized only once, for their power, correlation and clustering
+        signals, signals_power = self._standardize_space_signals(time_series)
+        if len(power) != n_signals:
+            power = signals_power
+        if top_k is None and (n_signals <= CORRELATION_DENSE_MAX_SIGNALS or disconnectivity.shape == (n_signals,) * 2):
+            distance = 1 - correlation_matrix(signals, n_jobs=n_jobs, standardized=True)
+            return self.select_by_hierarchical_group_metric_clustering(time_series, distance,
+                                                                       disconnectivity, power, n_groups,
+                                                                       members_per_group)
+        if top_k is None:
+            top_k = DEFAULT_CORRELATION_TOP_K
+        connectivity = self._top_k_connectivity(signals, top_k, disconnectivity, n_jobs)
+        # The cosine distance of standardized signals is their correlation distance
+        selection = np.unique(select_by_hierarchical_group_metric_clustering(signals, metric=power,
+                                                                             n_groups=n_groups,
+                                                                             members_per_group=members_per_group,
+                                                                             connectivity=connectivity,
+                                                                             affinity="cosine"))
+        return time_series.get_subspace_by_index(selection), selection
+
+    def _top_k_connectivity(self, signals, top_k, disconnectivity=np.array([]), n_jobs=1):
+        # A sparse, symmetric connectivity of each standardized signal to its top_k most correlated ones,
+        # without the pairs of signals that are disconnected, i.e., of nonzero disconnectivity, if given,
+        # which, thus, are not merged directly by the clustering.
+        n_signals = signals.shape[0]
+        indices = correlation_matrix(signals, top_k=top_k, n_jobs=n_jobs, standardized=True)[0]
+        rows = np.repeat(np.arange(n_signals), indices.shape[1])
+        cols = indices.ravel()
+        rows, cols = np.concatenate([rows, cols]), np.concatenate([cols, rows])
+        if disconnectivity.shape == (n_signals,) * 2:
+            connected = np.asarray(disconnectivity)[rows, cols] == 0
+            rows, cols = rows[connected], cols[connected]
+        elif disconnectivity.size > 0:
+            raise_value_error("Disconnectivity of shape %s does not match the %d signals!"
+                              % (str(disconnectivity.shape), n_signals), self.logger)
+        connectivity = csr_matrix((np.ones(rows.size), (rows, cols)), shape=(n_signals, n_signals))
+        # Duplicate entries are summed upon conversion, so that all edges are set to 1
+        connectivity.data[:] = 1.0
+        return connectivity
 
     def select_by_projection_power(self, time_series, projection=np.array([]),
                                    disconnectivity=np.array([]), power=np.array([]),
@@ -255,17 +462,308 @@ class TimeSeriesService(object):
                                "sensors": sensor})
                 seeg[sensor.name] = \
                     source_time_series.__class__(
-                        np.expand_dims(seeg_fun(source_time_series, projection.projection_data), 1), **kwargs)
+                        np.expand_dims(seeg_fun(source_time_series, projection.projection_data), 1),
+                        share_data=True, **kwargs)
             return seeg
         else:
             kwargs.update({"labels_dimensions": {labels_ordering[2]: sensors.labels,
                                                  labels_ordering[1]: [sensors.name]},
                            "sensors": sensors})
             return TimeSeriesSEEG(
-                np.expand_dims(seeg_fun(source_time_series, projection.projection_data), 1), **kwargs)
+                np.expand_dims(seeg_fun(source_time_series, projection.projection_data), 1),
+                share_data=True, **kwargs)
 
     def compute_seeg_lin(self, source_time_series, projection_data):
         return source_time_series.dot(projection_data.T)
 
     def compute_seeg_exp(self, source_time_series, projection_data):
         return np.log(np.exp(source_time_series).dot(projection_data.T))
+
+    def pipeline(self, **kwargs):
+        # A lazy chain of operations, which are then run chunk by chunk, materializing only the final result
+        return TimeSeriesPipeline(self, **kwargs)
+
+    def stream_filter(self):
+        # A causal filter of TimeSeries chunks along time, carrying its state from one chunk to the next
+        return TimeSeriesStreamFilter(self)
+
+
+class TimeSeriesPipeline(object):
+    """
+    Lazy chain of TimeSeriesService operations, e.g.,
+        service.pipeline().detrend().filter(1.0, 40.0).hilbert_envelope().decimate(4).normalize("zscore").run(ts)
+    Operations are only recorded, until run() processes the data chunk by chunk along space,
+    with the memory of one chunk, plus the final result, which is the only TimeSeries that is materialized.
+    Successive elementwise operations (abs, log, exp, square, scale) are fused into a single, in place, pass.
+    run() returns the result, and a report of the time spent on each (fused) step, across all chunks.
+    """
+
+    # Operations' kinds:
+    ELEMENTWISE = "elementwise"  # pointwise, in place
+    SIGNAL = "signal"  # along time, for each signal separately
+    DECIMATION = "decimation"  # subsampling along time
+
+    # Default memory of a chunk of data, in bytes
+    DEFAULT_MAX_MEMORY = 2 ** 28
+
+    def __init__(self, service=None, chunk_size=None, max_memory=DEFAULT_MAX_MEMORY):
+        self.service = TimeSeriesService() if service is None else service
+        # Number of space elements (e.g., regions) per chunk, or, if None, as many as fit in max_memory
+        self.chunk_size = chunk_size
+        self.max_memory = max_memory
+        self.steps = []
+        self.report = []
+
+    def _add_step(self, name, kind, fun):
+        self.steps.append((name, kind, fun))
+        return self
+
+    # Signal operations, fun(data, sample_rate):
+
+    def _cast(self, data):
+        dtype = get_precision_dtype(data)
+        return np.asarray(data).astype(dtype, copy=False), dtype
+
+    def detrend(self, type='linear'):
+        def detrend_data(data, sample_rate):
+            data, dtype = self._cast(data)
+            return ensure_precision(detrend(data, axis=0, type=type), dtype, "detrend")
+
+        return self._add_step("detrend", self.SIGNAL, detrend_data)
+
+    def filter(self, lowcut=None, highcut=None, mode='bandpass', order=3):
+        return self._add_step("filter", self.SIGNAL,
+                              lambda data, sample_rate: filter_data(data, sample_rate, lowcut, highcut, mode, order))
+
+    def hilbert_envelope(self):
+        return self._add_step("hilbert_envelope", self.SIGNAL, lambda data, sample_rate: hilbert_envelope(data))
+
+    def abs_envelope(self):
+        return self._add_step("abs_envelope", self.SIGNAL, lambda data, sample_rate: abs_envelope(data))
+
+    def normalize(self, normalization=None, axis=0, percent=None):
+        # Only normalizations along time can be computed chunk by chunk along space
+        if not all([ax == 0 for ax in ensure_list(axis)]):
+            raise_value_error("Only normalizations along time (axis=0) can be pipelined, not along axis %s!"
+                              % str(axis), self.service.logger)
+        return self._add_step("normalize", self.SIGNAL,
+                              lambda data, sample_rate: normalize_signals(data, normalization, axis, percent))
+
+    def decimate(self, decim_ratio):
+        return self._add_step("decimate", self.DECIMATION, int(decim_ratio))
+
+    # Elementwise operations, fun(data), in place:
+
+    def abs(self):
+        return self._add_step("abs", self.ELEMENTWISE, lambda data: np.abs(data, out=data))
+
+    def log(self):
+        return self._add_step("log", self.ELEMENTWISE, lambda data: np.log(data, out=data))
+
+    def exp(self):
+        return self._add_step("exp", self.ELEMENTWISE, lambda data: np.exp(data, out=data))
+
+    def square(self):
+        return self._add_step("square", self.ELEMENTWISE, lambda data: np.square(data, out=data))
+
+    def scale(self, scale=1.0, offset=0.0):
+        def scale_data(data):
+            data *= scale
+            data += offset
+            return data
+
+        return self._add_step("scale", self.ELEMENTWISE, scale_data)
+
+    def _fuse_steps(self):
+        # Successive elementwise steps are fused into one
+        fused_steps = []
+        for name, kind, fun in self.steps:
+            if kind == self.ELEMENTWISE and len(fused_steps) > 0 and fused_steps[-1][1] == self.ELEMENTWISE:
+                fused_name, _, funs = fused_steps[-1]
+                fused_steps[-1] = ("%s+%s" % (fused_name, name), kind, funs + [fun])
+            else:
+                fused_steps.append((name, kind, [fun] if kind == self.ELEMENTWISE else fun))
+        return fused_steps
+
+    def _get_chunk_size(self, shape, itemsize):
+        if self.chunk_size is not None:
+            return max(1, int(self.chunk_size))
+        # Complex temporaries, e.g., of hilbert, are twice as large as real ones
+        space_memory = 2 * itemsize * shape[0] * int(np.prod(shape[1:])) / max(shape[2], 1)
+        return int(max(1, min(shape[2], self.max_memory // max(space_memory, 1))))
+
+    def _run_chunk(self, chunk, steps, sample_rate, timings):
+        # The input chunk, which may be a view of the data of the TimeSeries, is not owned by the pipeline,
+        # and, thus, not modified in place, until a step returns a new array that does not share memory with it,
+        # since some steps may return their input as is, e.g., normalize without a normalization method
+        data = chunk
+        owned = False
+        for i_step, (name, kind, fun) in enumerate(steps):
+            tic = time.time()
+            if kind == self.ELEMENTWISE:
+                if not owned:
+                    data, _ = self._cast(data)
+                    data = np.array(data)
+                    owned = True
+                for elementwise_fun in fun:
+                    data = elementwise_fun(data)
+            elif kind == self.DECIMATION:
+                data = data[::fun]
+                sample_rate = sample_rate / fun
+            else:
+                data = fun(data, sample_rate)
+                owned = not np.may_share_memory(data, chunk)
+            timings[i_step] += time.time() - tic
+        return data
+
+    def run(self, time_series, **kwargs):
+        steps = self._fuse_steps()
+        timings = [0.0] * len(steps)
+        # Chunks of lazy data, e.g., of dask-backed, memory-mapped or h5 TimeSeries, are read one by one
+        data = time_series.lazy_data if hasattr(time_series, "lazy_data") else time_series.data
+        shape = data.shape
+        decim_ratio = int(np.prod([fun for _, kind, fun in steps if kind == self.DECIMATION]))
+        chunk_size = self._get_chunk_size(shape, get_precision_dtype(data).itemsize)
+        output = None
+        read_time = 0.0
+        write_time = 0.0
+        for i_start in range(0, shape[2], chunk_size):
+            space_slice = slice(i_start, min(i_start + chunk_size, shape[2]))
+            tic = time.time()
+            chunk = np.asarray(data[:, :, space_slice])
+            read_time += time.time() - tic
+            chunk = self._run_chunk(chunk, steps, time_series.sample_rate, timings)
+            tic = time.time()
+            if output is None:
+                # The result is allocated once, as soon as its time length and dtype are known
+                output = np.empty((chunk.shape[0],) + tuple(shape[1:]), dtype=chunk.dtype)
+            output[:, :, space_slice] = chunk
+            write_time += time.time() - tic
+        self.report = [("read", read_time)] + [(name, timing) for (name, _, _), timing in zip(steps, timings)] + \
+                      [("write", write_time)]
+        self.service.logger.info("TimeSeriesPipeline timings (sec):\n" +
+                                 "\n".join(["%s: %g" % (name, timing) for name, timing in self.report]))
+        if decim_ratio > 1:
+            kwargs["sample_period"] = float(decim_ratio * time_series.sample_period)
+        return time_series.duplicate(data=output, **kwargs), self.report
+
+
+class TimeSeriesStreamFilter(object):
+    """
+    Causal, stateful chain of filters of TimeSeries processed chunk by chunk along time, e.g.,
+        stream = service.stream_filter().filter(1.0, 40.0).envelope(5.0).decimate(4)
+        for ts_chunk in ts_chunks:
+            ts_output = stream.process(ts_chunk)
+    Unlike TimeSeriesService.filter(), filters are causal (sosfilt, not zero-phase sosfiltfilt),
+    and their state (zi) is carried across chunks, as is the phase of decimation,
+    so that the concatenated outputs are identical to the output of the whole recording,
+    which can thus be read incrementally from disk, or received from a live simulation, with constant memory.
+    Filters are designed upon the first chunk, from its sample rate, and start from their steady state for its
+    first sample, to avoid transients.
+    """
+
+    def __init__(self, service=None):
+        self.service = TimeSeriesService() if service is None else service
+        # Steps are (name, fun(data, sample_rate, state)), with state a dict of each step, emptied by reset()
+        self.steps = []
+        self.states = []
+        self.sample_rate = None
+        self.signals_shape = None
+
+    def _add_step(self, name, fun):
+        self.steps.append((name, fun))
+        self.states.append({})
+        return self
+
+    def reset(self):
+        # Forget the state of all steps, e.g., to process another recording
+        self.states = [{} for _ in self.steps]
+        self.sample_rate = None
+        self.signals_shape = None
+        return self
+
+    @staticmethod
+    def _sosfilt(data, sample_rate, state, lowcut, highcut, mode, order):
+        if "sos" not in state:
+            state["sos"] = design_sos_filter(sample_rate, lowcut, highcut, get_filter_mode(lowcut, highcut, mode),
+                                             order, data.dtype)
+            # Steady state initial conditions for the first sample of each signal
+            zi = sosfilt_zi(state["sos"]).astype(data.dtype)
+            state["zi"] = zi.reshape(zi.shape + (1,) * (data.ndim - 1)) * data[:1]
+        data, state["zi"] = sosfilt(state["sos"], data, axis=0, zi=state["zi"])
+        return data
+
+    def filter(self, lowcut=None, highcut=None, mode='bandpass', order=3):
+        # Lowpass if lowcut is None, highpass if highcut is None, otherwise mode, i.e., bandpass or bandstop
+        return self._add_step("filter",
+                              lambda data, sample_rate, state:
+                              (self._sosfilt(data, sample_rate, state, lowcut, highcut, mode, order), sample_rate))
+
+    def envelope(self, cutoff=None, order=3):
+        # Causal envelope, i.e., rectified signals, smoothed by a lowpass filter with cutoff frequency, if any
+        def envelope(data, sample_rate, state):
+            data = np.abs(data)
+            if cutoff is not None:
+                data = self._sosfilt(data, sample_rate, state, None, cutoff, "lowpass", order)
+            return data, sample_rate
+
+        return self._add_step("envelope", envelope)
+
+    def decimate(self, decim_ratio, order=8):
+        # Subsample by decim_ratio, after a causal anti-aliasing lowpass filter
+        decim_ratio = int(decim_ratio)
+
+        def decimate_data(data, sample_rate, state):
+            data = self._sosfilt(data, sample_rate, state, None, 0.8 * sample_rate / 2.0 / decim_ratio, "lowpass",
+                                 order)
+            # Keep the samples at multiples of decim_ratio of the whole recording
+            offset = state.get("offset", 0)
+            state["offset"] = (offset - data.shape[0]) % decim_ratio
+            state["first_sample"] = offset
+            return data[offset::decim_ratio], sample_rate / decim_ratio
+
+        return self._add_step("decimate", decimate_data)
+
+    def _check_chunk(self, data, sample_rate):
+        if self.signals_shape is None:
+            self.signals_shape = data.shape[1:]
+            self.sample_rate = sample_rate
+        elif data.shape[1:] != self.signals_shape or not np.isclose(sample_rate, self.sample_rate):
+            raise_value_error("Chunk of shape %s and sample rate %g does not follow the stream "
+                              "of signals' shape %s and sample rate %g! Use reset() for a new stream."
+                              % (str(data.shape), sample_rate, str(self.signals_shape), self.sample_rate),
+                              self.service.logger)
+
+    def process(self, time_series, **kwargs):
+        # Return the TimeSeries of the next chunk time_series,
+        # or None, if decimation leaves no samples of a (short) chunk.
+        data = time_series.data
+        dtype = get_precision_dtype(data)
+        data = np.asarray(data).astype(dtype, copy=False)
+        self._check_chunk(data, time_series.sample_rate)
+        sample_rate = self.sample_rate
+        # Position of the first output sample in the chunk, and output sample period, in input samples
+        first_sample = 0
+        period = 1
+        for (name, fun), state in zip(self.steps, self.states):
+            if data.shape[0] == 0:
+                break
+            data, next_sample_rate = fun(data, sample_rate, state)
+            if next_sample_rate != sample_rate:
+                first_sample += state["first_sample"] * period
+                period = int(round(period * sample_rate / next_sample_rate))
+                sample_rate = next_sample_rate
+        data = ensure_precision(data, dtype, "stream_filter")
+        if data.shape[0] == 0:
+            return None
+        if period > 1:
+            kwargs["start_time"] = float(time_series.start_time + first_sample * time_series.sample_period)
+            kwargs["sample_period"] = float(period * time_series.sample_period)
+        return time_series.duplicate(data=data, **kwargs)
+
+    def run(self, time_series_chunks, **kwargs):
+        # Generate the output TimeSeries of an iterable of successive TimeSeries chunks, skipping empty ones
+        for time_series in time_series_chunks:
+            output = self.process(time_series, **kwargs)
+            if output is not None:
+                yield output
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import os
+import numpy
+import pytest
+from tvb_scripts.datatypes.time_series import TimeSeries
+from tvb_scripts.io.h5_reader_base import H5DataProxy
+from tvb_scripts.io.h5_reader import H5Reader
+from tvb_scripts.io.h5_writer import H5Writer
+from tvb_scripts.service.time_series_service import TimeSeriesService
+
+
+class TestH5(object):
+
+    def _prepare_time_series(self, n_times=20, i_ts=0):
+        data = numpy.random.RandomState(i_ts).rand(n_times, 2, 3, 1)
+        return TimeSeries(data, start_time=0.0, sample_period=0.5, sample_period_unit="ms",
+                          labels_ordering=["Time", "State Variable", "Region", "Mode"],
+                          labels_dimensions={"State Variable": ["x", "y"],
+                                             "Region": ["%s%d" % (label, i_ts) for label in "abc"]})
+
+    def test_read_timeseries_lazy(self, tmpdir):
+        path = os.path.join(str(tmpdir), "ts.h5")
+        H5Writer().write_timeseries(self._prepare_time_series(), path)
+        data = H5Reader().read_timeseries(path).data
+        ts = H5Reader().read_timeseries(path, lazy=True)
+        proxy = ts.data
+        assert isinstance(proxy, H5DataProxy)
+        assert proxy.shape == data.shape and proxy.dtype == data.dtype and len(proxy) == len(data)
+        # Only the indexed hyperslabs are read, orthogonally for list indices
+        assert numpy.array_equal(proxy[2:10:3, 1], data[2:10:3, 1])
+        assert numpy.array_equal(proxy[..., [2, 0], 0], data[..., [2, 0], 0])
+        assert numpy.array_equal(proxy[-1, ::-1], data[-1, ::-1])
+        assert numpy.array_equal(proxy[:, [1, 0], [0, 2]], data[:, [1, 0]][:, :, [0, 2]])
+        assert numpy.array_equal(ts.get_subspace_by_label(["c0", "a0"]).data, data[:, :, [2, 0]])
+        assert numpy.array_equal(numpy.asarray(proxy), data)
+        # close() releases the file
+        h5_file = proxy.h5_file
+        proxy.close()
+        assert proxy.h5_file is None and not h5_file
+        with pytest.raises(Exception):
+            proxy[0]
+
+    def test_read_timeseries_lazy_chunks(self, tmpdir):
+        pytest.importorskip("dask")
+        path = os.path.join(str(tmpdir), "ts.h5")
+        ts = self._prepare_time_series()
+        H5Writer().write_timeseries(ts, path)
+        ts_chunked = H5Reader().read_xarray_time_series(path, chunks={"Time": 5})
+        assert ts_chunked.is_chunked and ts_chunked.chunks[0] == (5, 5, 5, 5)
+        assert numpy.array_equal(ts_chunked[5:15].compute().data, ts.data[5:15])
+
+    def test_write_ts_concatenation(self, tmpdir):
+        time_series = [self._prepare_time_series(i_ts=i_ts) for i_ts in range(3)]
+        for dim in [0, 2]:
+            path = os.path.join(str(tmpdir), "ts%d.h5" % dim)
+            # Streamed into the file, one TimeSeries at a time, as concatenated in memory
+            H5Writer().write_ts_concatenation(time_series, dim, path)
+            ts = H5Reader().read_timeseries(path)
+            ts_concatenated = TimeSeriesService().concatenate(time_series, dim)
+            assert numpy.array_equal(ts.data, ts_concatenated.data)
+            assert ts.start_time == ts_concatenated.start_time and ts.end_time == ts_concatenated.end_time
+            assert list(ts.labels_dimensions["Region"]) == list(ts_concatenated.labels_dimensions["Region"])
+        path = os.path.join(str(tmpdir), "ts_y.h5")
+        H5Writer().write_ts_concatenation(time_series, 2, path, **{"State Variable": ["y"]})
+        ts = H5Reader().read_timeseries(path)
+        assert numpy.array_equal(ts.data, TimeSeriesService().concatenate(time_series, 2,
+                                                                           **{"State Variable": ["y"]}).data)
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import os
+import numpy
+from tvb_scripts.datatypes.time_series import TimeSeries, TimeSeriesDimensions
+from tvb_scripts.io.memmap import write_memmap_time_series, read_memmap_time_series
+
+
+class TestMemmap(object):
+
+    def test_memmap_time_series(self, tmpdir):
+        data = numpy.random.rand(10, 2, 3, 1)
+        ts = TimeSeries(data, start_time=1.0, sample_period=0.5, sample_period_unit="ms",
+                        labels_dimensions={TimeSeriesDimensions.SPACE.value: ["r1", "r2", "r3"]})
+        for extension in [".npy", ".raw"]:
+            path = os.path.join(str(tmpdir), "ts" + extension)
+            write_memmap_time_series(ts, path)
+            ts_memmap = read_memmap_time_series(path)
+            assert isinstance(ts_memmap, TimeSeries)
+            assert isinstance(ts_memmap.data, numpy.memmap)
+            assert numpy.array_equal(ts_memmap.data, data)
+            assert ts_memmap.start_time == ts.start_time
+            assert ts_memmap.sample_period == ts.sample_period
+            assert ts_memmap.sample_period_unit == ts.sample_period_unit
+            assert ts_memmap.space_labels.tolist() == ["r1", "r2", "r3"]
+            # Slicing returns views of the memory-mapped data...
+            assert isinstance(ts_memmap.get_subspace_by_label(["r2"]).data, numpy.memmap)
+            # ...whereas writing to read-only memory-mapped data copies them, without changing the file
+            ts_memmap[0, 0, 0, 0] = 10.0
+            assert not isinstance(ts_memmap.data, numpy.memmap)
+            assert read_memmap_time_series(path).data[0, 0, 0, 0] == data[0, 0, 0, 0]
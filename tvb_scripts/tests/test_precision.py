@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import numpy
+import pytest
+from tvb_scripts.datatypes.time_series import TimeSeries
+from tvb_scripts.service.time_series_service import TimeSeriesService
+from tvb_scripts.utils.time_series_utils import set_precision, ensure_precision, spectral_analysis
+
+
+class TestPrecision(object):
+    service = TimeSeriesService()
+    sample_period = 1.0
+    sample_period_unit = "ms"
+    # Relative tolerance of float32 results with respect to the float64 ones
+    rtol = 1e-3
+
+    def _prepare_time_series(self):
+        time = numpy.arange(2000) * self.sample_period
+        data = numpy.sin(2 * numpy.pi * 0.01 * time)[:, None, None, None] + \
+               0.1 * numpy.random.RandomState(0).randn(2000, 2, 3, 1)
+        ts64 = TimeSeries(data, start_time=0.0, sample_period=self.sample_period,
+                          sample_period_unit=self.sample_period_unit)
+        return ts64, ts64.astype("float32")
+
+    def _assert_close(self, ts32, ts64):
+        assert ts32.data.dtype == numpy.float32
+        assert ts64.data.dtype == numpy.float64
+        assert numpy.allclose(ts32.data, ts64.data, rtol=self.rtol, atol=self.rtol * numpy.abs(ts64.data).max())
+
+    def test_float32_time_series(self):
+        ts64, ts32 = self._prepare_time_series()
+        assert ts32.data.dtype == numpy.float32
+        assert ts32.duplicate().data.dtype == numpy.float32
+
+    def test_filter(self):
+        ts64, ts32 = self._prepare_time_series()
+        self._assert_close(self.service.filter(ts32, 5.0, 20.0, "bandpass"),
+                           self.service.filter(ts64, 5.0, 20.0, "bandpass"))
+
+    def test_normalize(self):
+        ts64, ts32 = self._prepare_time_series()
+        for normalization in ["zscore", "baseline-amplitude", "minmax"]:
+            self._assert_close(self.service.normalize(ts32, normalization, axis=0),
+                               self.service.normalize(ts64, normalization, axis=0))
+
+    def test_hilbert_envelope(self):
+        ts64, ts32 = self._prepare_time_series()
+        self._assert_close(self.service.hilbert_envelope(ts32), self.service.hilbert_envelope(ts64))
+
+    def test_detrend(self):
+        ts64, ts32 = self._prepare_time_series()
+        self._assert_close(self.service.detrend(ts32), self.service.detrend(ts64))
+
+    def test_spectral_analysis(self):
+        ts64, ts32 = self._prepare_time_series()
+        psd32, freq = spectral_analysis(ts32.data[:, 0, :, 0], ts32.sample_rate, nperseg=256, window="hann")
+        psd64, _ = spectral_analysis(ts64.data[:, 0, :, 0], ts64.sample_rate, nperseg=256, window="hann")
+        assert psd32.dtype == numpy.float32
+        assert numpy.allclose(psd32, psd64, rtol=self.rtol, atol=self.rtol * psd64.max())
+
+    def test_global_precision(self):
+        ts64, _ = self._prepare_time_series()
+        set_precision("float32")
+        try:
+            ts32 = self.service.filter(ts64, 5.0, 20.0, "bandpass")
+        finally:
+            set_precision()
+        self._assert_close(ts32, self.service.filter(ts64, 5.0, 20.0, "bandpass"))
+
+    def test_upcast_policy(self):
+        data = numpy.ones((10, 2))
+        assert ensure_precision(data, "float32", "test").dtype == numpy.float32
+        set_precision(upcast="raise")
+        try:
+            with pytest.raises(ValueError):
+                ensure_precision(data, "float32", "test")
+        finally:
+            set_precision()
+        with pytest.raises(ValueError):
+            set_precision("int32")
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import multiprocessing
+import numpy
+import pytest
+from tvb_scripts.datatypes.time_series import TimeSeries, TimeSeriesDimensions
+from tvb_scripts.io.shared_memory import share_time_series, attach_time_series
+
+
+def _sum_shared_time_series(descriptor):
+    # A worker attaching to the shared TimeSeries, and closing its shared memory when done
+    ts, shared_memory = attach_time_series(descriptor)
+    result = float(numpy.sum(ts.data))
+    del ts
+    shared_memory.close()
+    return result
+
+
+class TestSharedMemory(object):
+
+    def test_shared_memory_time_series(self):
+        data = numpy.random.rand(10, 2, 3, 1)
+        ts = TimeSeries(data, start_time=1.0, sample_period=0.5,
+                        labels_dimensions={TimeSeriesDimensions.SPACE.value: ["r1", "r2", "r3"]})
+        ts_shared_memory, descriptor = share_time_series(ts)
+        with ts_shared_memory:
+            ts_worker, worker_shared_memory = attach_time_series(descriptor)
+            assert numpy.array_equal(ts_worker.data, data)
+            assert ts_worker.start_time == ts.start_time
+            assert ts_worker.space_labels.tolist() == ["r1", "r2", "r3"]
+            # The owner's writes are visible to the workers, which do not copy the data...
+            ts_shared_memory.data[0, 0, 0, 0] = 10.0
+            assert ts_worker.data[0, 0, 0, 0] == 10.0
+            # ...unless they write to them
+            assert not ts_worker.data.flags.writeable
+            ts_worker[0, 0, 0, 0] = 20.0
+            assert ts_shared_memory.data[0, 0, 0, 0] == 10.0
+            # Only the owner can unlink the shared memory
+            with pytest.raises(ValueError):
+                worker_shared_memory.unlink()
+            del ts_worker
+            worker_shared_memory.close()
+
+    def test_shared_memory_pool(self):
+        data = numpy.random.rand(10, 2, 3, 1)
+        ts = TimeSeries(data, start_time=1.0, sample_period=0.5)
+        ts_shared_memory, descriptor = share_time_series(ts)
+        with ts_shared_memory:
+            pool = multiprocessing.Pool(2)
+            try:
+                results = pool.map(_sum_shared_time_series, [descriptor] * 4)
+            finally:
+                pool.close()
+                pool.join()
+            assert numpy.allclose(results, numpy.sum(data))
+            # The shared memory block outlives the workers, until the owner unlinks it
+            assert numpy.allclose(_sum_shared_time_series(descriptor), numpy.sum(data))
+        with pytest.raises(FileNotFoundError):
+            attach_time_series(descriptor)
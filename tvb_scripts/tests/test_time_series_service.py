@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+import numpy
+import pytest
+from scipy.signal import convolve, detrend, hilbert, spectrogram
+from tvb_scripts.datatypes.time_series import TimeSeries
+from tvb_scripts.service.time_series_service import TimeSeriesService
+from tvb_scripts.utils.time_series_utils import apply_along_time, design_sos_filter
+
+
+class TestTimeSeriesService(object):
+    service = TimeSeriesService()
+
+    def _prepare_time_series(self, n_times=2000, n_regions=6):
+        data = numpy.random.RandomState(0).randn(n_times, 2, n_regions, 1)
+        return TimeSeries(data, start_time=0.0, sample_period=1.0, sample_period_unit="ms")
+
+    def test_pipeline(self):
+        ts = self._prepare_time_series()
+        data = numpy.array(ts.data)
+        ts_chain = self.service.normalize(
+            self.service.decimate(self.service.hilbert_envelope(self.service.filter(self.service.detrend(ts),
+                                                                                    5.0, 40.0)), 4),
+            "zscore", axis=0)
+        ts_chain = self.service.log(self.service.square(ts_chain))
+        pipeline = self.service.pipeline(chunk_size=4).detrend().filter(5.0, 40.0).hilbert_envelope().decimate(4). \
+            normalize("zscore").square().log()
+        ts_pipeline, report = pipeline.run(ts)
+        assert ts_pipeline.shape == ts_chain.shape
+        assert ts_pipeline.sample_period == ts_chain.sample_period
+        assert numpy.allclose(ts_pipeline.data, ts_chain.data)
+        # Elementwise steps are fused, and the input data are not modified
+        assert [name for name, _ in report] == ["read", "detrend", "filter", "hilbert_envelope", "decimate",
+                                                "normalize", "square+log", "write"]
+        assert numpy.array_equal(ts.data, data)
+
+        ts_pipeline, report = self.service.pipeline().abs().scale(2.0, 1.0).run(ts)
+        assert numpy.allclose(ts_pipeline.data, 2 * numpy.abs(data) + 1)
+        assert numpy.array_equal(ts.data, data)
+        # Steps that return their input as is, e.g., normalize without a normalization method, or views of it,
+        # e.g., decimate, are not followed by in place modifications of the input data
+        for pipeline in [self.service.pipeline().normalize().abs(), self.service.pipeline().decimate(2).abs()]:
+            ts_pipeline = pipeline.run(ts)[0]
+            assert numpy.allclose(ts_pipeline.data, numpy.abs(ts_pipeline.data))
+            assert numpy.array_equal(ts.data, data)
+        with pytest.raises(ValueError):
+            self.service.pipeline().normalize("zscore", axis=2)
+
+    def test_n_jobs(self):
+        ts = self._prepare_time_series()
+        for fun in [lambda ts, n_jobs: self.service.filter(ts, 5.0, 40.0, n_jobs=n_jobs),
+                    lambda ts, n_jobs: self.service.detrend(ts, n_jobs=n_jobs),
+                    lambda ts, n_jobs: self.service.hilbert_envelope(ts, n_jobs=n_jobs)]:
+            assert numpy.array_equal(fun(ts, 1).data, fun(ts, 4).data)
+        # Results do not depend on n_jobs, even when signals are split in many chunks
+        data = numpy.array(ts.data)
+        results = [apply_along_time(lambda x: detrend(x, axis=0), data, n_jobs, chunk_memory=data.shape[0] * 8 * 5)
+                   for n_jobs in [1, 3, -1]]
+        assert results[0].shape == data.shape
+        assert numpy.array_equal(results[0], results[1]) and numpy.array_equal(results[0], results[2])
+        # Results are written to any out, even if it is not contiguous, whereas invalid outs are rejected upfront
+        out = numpy.empty(data.shape[::-1]).T
+        assert apply_along_time(lambda x: detrend(x, axis=0), data, 3, chunk_memory=data.shape[0] * 8 * 5,
+                                out=out) is out
+        assert numpy.array_equal(out, results[0])
+        read_only_out = numpy.empty_like(data)
+        read_only_out.flags.writeable = False
+        for out in [numpy.empty(data.shape[:-1]), numpy.empty(data.shape, dtype="i"), read_only_out]:
+            with pytest.raises(ValueError):
+                apply_along_time(lambda x: detrend(x, axis=0), data, out=out)
+
+    def test_filter_bank(self):
+        ts = self._prepare_time_series()
+        bands = [(None, 4.0), (4.0, 8.0), (8.0, 30.0), (100.0, None)]
+        ts_bands = self.service.filter_bank(ts, bands, order=5, n_jobs=2)
+        assert len(ts_bands) == len(bands)
+        for (lowcut, highcut), ts_band in zip(bands, ts_bands):
+            mode = "lowpass" if lowcut is None else ("highpass" if highcut is None else "bandpass")
+            assert numpy.array_equal(ts_band.data, self.service.filter(ts, lowcut, highcut, mode, order=5).data)
+        # Designs are cached, and their copies are independent of the cache
+        sos = design_sos_filter(ts.sample_rate, 4.0, 8.0, order=5)
+        sos[:] = 0.0
+        assert numpy.any(design_sos_filter(ts.sample_rate, 4.0, 8.0, order=5) != 0.0)
+        # Second-order sections remain stable for high orders and narrow bands
+        assert numpy.all(numpy.isfinite(self.service.filter(ts, 1.0, 2.0, order=8).data))
+
+    def test_stream_filter(self):
+        ts = self._prepare_time_series(n_times=2003)
+        stream = self.service.stream_filter().filter(5.0, 40.0).envelope(5.0).decimate(4)
+        ts_whole = stream.process(ts)
+        assert ts_whole.sample_period == 4 * ts.sample_period
+        # The concatenated outputs of chunks of any length equal the output of the whole TimeSeries
+        stream.reset()
+        bounds = [0, 1, 2, 500, 503, 1000, 1999, 2003]
+        ts_chunks = list(stream.run(ts.slice_data_across_dimension_by_slice(slice(i_start, i_end), 0)
+                                    for i_start, i_end in zip(bounds[:-1], bounds[1:])))
+        assert numpy.allclose(numpy.concatenate([ts_chunk.data for ts_chunk in ts_chunks]), ts_whole.data)
+        assert numpy.allclose(numpy.concatenate([ts_chunk.time for ts_chunk in ts_chunks]), ts_whole.time)
+        with pytest.raises(ValueError):
+            stream.process(ts.slice_data_across_dimension_by_slice(slice(0, 3), 2))
+
+    def test_convolve(self):
+        ts = self._prepare_time_series()
+        data = ts.data + 100.0
+        ts = ts.duplicate(data=data)
+        for win_len in [1, 4, 25, 2500]:
+            # The O(N) moving average equals the convolution with a boxcar kernel along time
+            assert numpy.allclose(self.service.convolve(ts, win_len).data,
+                                  convolve(data, numpy.ones((win_len, 1, 1, 1)) / win_len, mode="same"))
+        for n_kernel_points in [5, 50, 1500]:
+            kernel = numpy.hanning(n_kernel_points)
+            assert numpy.allclose(self.service.convolve(ts, kernel=kernel, n_jobs=2).data,
+                                  convolve(data, kernel.reshape((-1, 1, 1, 1)), mode="same"))
+        with pytest.raises(ValueError):
+            self.service.convolve(ts, kernel=numpy.ones((5, 2)))
+
+    def test_hilbert_envelope(self):
+        ts = self._prepare_time_series()
+        envelope = self.service.hilbert_envelope(ts).data
+        # For fast fft lengths, the envelope equals the scipy one, for any chunks and threads
+        assert numpy.array_equal(envelope, numpy.abs(hilbert(ts.data, axis=0)))
+        assert numpy.array_equal(self.service.hilbert_envelope(ts, n_jobs=3, max_memory=2 ** 18).data, envelope)
+        # Time blocks, with overlaps, approximate the envelope, apart from the edges of the signals
+        time = numpy.arange(10007) / 1000.0
+        data = numpy.sin(2 * numpy.pi * 10.0 * time) * (1.0 + 0.5 * numpy.sin(2 * numpy.pi * 0.5 * time))
+        ts = TimeSeries(data[:, None] * numpy.ones((1, 4)), start_time=0.0, sample_period=1.0,
+                        sample_period_unit="ms")
+        envelope = numpy.abs(hilbert(ts.data, axis=0))[500:-500]
+        for kwargs in [{"max_memory": 2 ** 17}, {"block_length": 2000, "overlap": 500}]:
+            assert numpy.allclose(self.service.hilbert_envelope(ts, **kwargs).data[500:-500], envelope, atol=0.05)
+
+    def test_spectrogram_envelope(self):
+        ts = self._prepare_time_series()
+        ts_envelope = self.service.spectrogram_envelope(ts, 40.0, 5.0, 256)
+        # The 4D structure is kept, with the spectrogram segments along time
+        assert ts_envelope.shape[1:] == ts.shape[1:]
+        F, T, C = spectrogram(ts.data[:, 1, 2, 0], ts.sample_rate, nperseg=256)
+        assert numpy.allclose(ts_envelope.data[:, 1, 2, 0], C[(F > 5.0) * (F < 40.0)].sum(axis=0))
+        assert ts_envelope.start_time == 1000 * T[0] and ts_envelope.sample_period == 1000 * numpy.diff(T).mean()
+        # Bands are extracted from the same spectrogram
+        ts_bands = self.service.spectrogram_envelope(ts, nperseg=256, bands=[(5.0, 40.0), (None, 4.0)], n_jobs=2)
+        assert len(ts_bands) == 2
+        assert numpy.array_equal(ts_bands[0].data, ts_envelope.data)
+        assert numpy.allclose(ts_bands[1].data[:, 1, 2, 0], C[F < 4.0].sum(axis=0))
+
+    def test_concatenate(self):
+        time_series = []
+        for i_ts in range(3):
+            ts = self._prepare_time_series(n_times=100, n_regions=3)
+            time_series.append(ts.duplicate(labels_dimensions={"Space": ["%s%d" % (label, i_ts)
+                                                                         for label in "abc"]}))
+        data = numpy.array(time_series[0].data)
+        ts = self.service.concatenate_in_time(time_series)
+        assert ts.shape == (300, 2, 3, 1) and ts.end_time == 299.0
+        assert numpy.array_equal(ts.data, numpy.concatenate([ts.data for ts in time_series]))
+        ts = self.service.concatenate_in_space(time_series, **{"State Variable": [1]})
+        assert ts.shape == (100, 1, 9, 1)
+        assert list(ts.labels_dimensions["Space"]) == ["a0", "b0", "c0", "a1", "b1", "c1", "a2", "b2", "c2"]
+        assert numpy.array_equal(ts.data[:, :, :3], data[:, 1:])
+        # The inputs are not modified, and they are all validated before any data are copied
+        assert numpy.array_equal(time_series[0].data, data) and time_series[0].shape == (100, 2, 3, 1)
+        with pytest.raises(ValueError):
+            self.service.concatenate_in_time(time_series + [self._prepare_time_series(n_times=100, n_regions=4)])
+
+    def test_inplace_and_out(self):
+        for fun in [self.service.log, self.service.square, self.service.abs_envelope, self.service.detrend,
+                    lambda ts, **kwargs: self.service.normalize(ts, "zscore", axis=0, **kwargs),
+                    lambda ts, **kwargs: self.service.normalize(ts, "baseline-amplitude", axis=0, **kwargs)]:
+            ts = self._prepare_time_series()
+            ts = ts.duplicate(data=numpy.abs(ts.data) + 0.1)
+            data = numpy.array(ts.data)
+            result = fun(ts).data
+            # By default, and with out, the data of the input TimeSeries are not modified
+            assert numpy.array_equal(ts.data, data)
+            out = numpy.empty_like(data)
+            assert numpy.shares_memory(fun(ts, out=out).data, out)
+            assert numpy.array_equal(out, result) and numpy.array_equal(ts.data, data)
+            # In place, the data of the input TimeSeries are overwritten, but not those shared with others
+            ts_shared = ts.duplicate()
+            assert fun(ts, inplace=True) is ts
+            assert numpy.array_equal(ts.data, result) and numpy.array_equal(ts_shared.data, data)
+        with pytest.raises(ValueError):
+            self.service.log(ts, out=numpy.empty(ts.shape, dtype="float32"))
+        # In place operations on slices and windows do not modify the TimeSeries they come from
+        ts = self._prepare_time_series()
+        ts = ts.duplicate(data=numpy.abs(ts.data) + 0.1)
+        data = numpy.array(ts.data)
+        for ts_view in [ts.get_subspace_by_slice(slice(0, 6, 2)), ts.get_time_window(10, 100),
+                        ts.duplicate(data=ts.data[:, :1])]:
+            result = self.service.detrend(self.service.log(ts_view))
+            self.service.detrend(self.service.log(ts_view, inplace=True), inplace=True)
+            assert numpy.array_equal(ts_view.data, result.data)
+            assert numpy.array_equal(ts.data, data)
+        # Input arrays of the user are not overwritten, whereas the data owned by a TimeSeries are not copied again
+        for data in [numpy.random.rand(100, 2, 3, 1) + 0.1, numpy.random.rand(100, 3) + 0.1]:
+            data_in = numpy.array(data)
+            ts = TimeSeries(data, start_time=0.0, sample_period=1.0)
+            data_ts = ts.data
+            self.service.log(ts, inplace=True)
+            self.service.square(ts, inplace=True)
+            assert ts.data is data_ts and numpy.array_equal(data, data_in)
+
+    def test_correlation(self, tmpdir):
+        ts = self._prepare_time_series(n_times=300, n_regions=40)
+        ts = ts.slice_data_across_dimension_by_slice(slice(0, 1), 1)
+        corrcoef = numpy.corrcoef(ts.squeezed.T)
+        # Tiles of any number of rows, computed by any number of threads, and spilled to disk, or not
+        path = str(tmpdir.join("correlation.npy"))
+        for correlation in [self.service.correlation(ts), self.service.correlation(ts, block_size=7, n_jobs=2),
+                            self.service.correlation(ts, path=path, block_size=11)]:
+            assert correlation.dtype == numpy.float32 and numpy.allclose(correlation, corrcoef, atol=1e-6)
+        assert numpy.allclose(numpy.load(path), corrcoef, atol=1e-6)
+        indices, correlations = self.service.correlation(ts, top_k=3, block_size=9)
+        corrcoef_others = corrcoef - 2 * numpy.eye(40)
+        assert numpy.array_equal(indices, numpy.argsort(-corrcoef_others, axis=1)[:, :3])
+        assert numpy.allclose(correlations, numpy.sort(corrcoef_others, axis=1)[:, ::-1][:, :3], atol=1e-6)
+        correlation = self.service.correlation(ts, threshold=0.1).toarray()
+        selected = (numpy.abs(corrcoef) >= 0.1) & (numpy.eye(40) == 0)
+        assert numpy.array_equal(correlation != 0, selected)
+        assert numpy.allclose(correlation[selected], corrcoef[selected], atol=1e-6)
+        # Selection by the top_k most correlated signals of each signal, instead of the dense correlation matrix
+        selection = self.service.select_by_correlation_power(ts, n_groups=5, top_k=5)[1]
+        assert 0 < len(selection) <= 40
+        # More than one variable: the correlation of two regions is their mean correlation across variables
+        ts = self._prepare_time_series(n_times=200, n_regions=10)
+        signals, power = self.service._standardize_space_signals(ts)
+        corrcoef = numpy.mean([numpy.corrcoef(ts.data[:, i_var, :, 0].T) for i_var in range(2)], axis=0)
+        assert numpy.allclose(numpy.dot(signals, signals.T), corrcoef, atol=1e-6)
+        assert numpy.allclose(power, numpy.sum((ts.data - ts.data.mean(axis=0)) ** 2, axis=(0, 1, 3)))
+        for top_k in [None, 3]:
+            ts_selection, selection = self.service.select_by_correlation_power(ts, n_groups=4, top_k=top_k)
+            assert 0 < len(selection) <= 10 and numpy.all(selection < 10)
+            assert ts_selection.shape == (200, 2, len(selection), 1)
+        # Disconnected pairs of labels are removed from the sparse connectivity of the top_k most correlated ones
+        disconnectivity = numpy.ones((10, 10))
+        disconnectivity[:5, :5] = 0.0
+        connectivity = self.service._top_k_connectivity(signals, 3, disconnectivity).toarray()
+        assert numpy.array_equal(connectivity, connectivity.T)
+        assert numpy.all(connectivity[disconnectivity > 0] == 0) and numpy.any(connectivity[:5, :5] > 0)
+        assert numpy.array_equal(connectivity > 0, self.service._top_k_connectivity(signals, 3).toarray() *
+                                 (disconnectivity == 0) > 0)
+        selection = self.service.select_by_correlation_power(ts, disconnectivity=disconnectivity,
+                                                             n_groups=4, top_k=3)[1]
+        assert 0 < len(selection) <= 10
+        with pytest.raises(ValueError):
+            self.service.select_by_correlation_power(ts, disconnectivity=numpy.ones((5, 5)), n_groups=4, top_k=3)
@@ -1,7 +1,9 @@
 # coding=utf-8
 import numpy
 import pytest
-from tvb_scripts.datatypes.time_series import TimeSeries, TimeSeriesDimensions, PossibleVariables
+from tvb_scripts.datatypes.time_series import TimeSeries, TimeSeriesDimensions, PossibleVariables, \
+    LABELS_ORDERING, RegularTimeAxis
+from tvb_scripts.utils.data_structures_utils import read_only_view
 
 
 class TestTimeseries(object):
@@ -200,3 +202,209 @@ class TestTimeseries(object):
                            sample_period_unit=self.sample_period_unit)
         assert ts_4D.data.shape == (3, 4, 3, 4)
         assert ts_4D.x1.data.shape == (3, 4, 1, 4)
+
+    def test_timeseries_duplicate(self):
+        ts = TimeSeries(numpy.array(self.data_4D, dtype="f"),
+                        labels_dimensions={TimeSeriesDimensions.SPACE.value: numpy.array(["r1", "r2", "r3", "r4"])},
+                        start_time=self.start_time, sample_period=self.sample_period,
+                        sample_period_unit=self.sample_period_unit)
+        ts_dupl = ts.duplicate()
+        assert numpy.shares_memory(ts_dupl.data, ts.data)
+        assert ts_dupl.labels_dimensions is not ts.labels_dimensions
+
+        # Copy-on-write:
+        ts_dupl[0, 0, 0, 0] = 10.0
+        assert not numpy.shares_memory(ts_dupl.data, ts.data)
+        assert ts_dupl.data[0, 0, 0, 0] == 10.0
+        assert ts.data[0, 0, 0, 0] == self.data_4D[0, 0, 0, 0]
+
+        ts_deep = ts.duplicate(deep_copy=True)
+        assert not numpy.shares_memory(ts_deep.data, ts.data)
+
+        # The data of the duplicated instance remain writeable,
+        # but it copies them before writing to them, as long as they are shared
+        ts_dupl = ts.duplicate()
+        ts.data[0, 0, 0, 1] = 20.0
+        ts[0, 0, 0, 2] = 30.0
+        assert ts.data[0, 0, 0, 2] == 30.0
+        assert ts_dupl.data[0, 0, 0, 2] == self.data_4D[0, 0, 0, 2]
+
+        # Input data that are views of the duplicated instance's data are shared in a copy-on-write way too
+        data = numpy.array(ts.data)
+        ts_view = ts.duplicate(data=ts.data[:, :, :2])
+        assert numpy.shares_memory(ts_view.data, ts.data)
+        ts_view[0, 0, 0, 0] = -1.0
+        assert ts_view.data[0, 0, 0, 0] == -1.0
+        assert numpy.array_equal(ts.data, data)
+
+        # Input arrays are copied, unless shared explicitly, in which case they are written to in place
+        data = numpy.array(self.data_4D, dtype="f")
+        ts = TimeSeries(data, start_time=self.start_time, sample_period=self.sample_period)
+        ts[...] = 1.0
+        ts.data[0] = 2.0
+        assert numpy.array_equal(data, self.data_4D)
+        ts = TimeSeries(data, share_data=True, start_time=self.start_time, sample_period=self.sample_period)
+        ts[...] = 1.0
+        assert numpy.all(data == 1.0)
+        # Read-only input arrays are shared, until written to
+        data = read_only_view(numpy.array(self.data_4D, dtype="f"))
+        ts = TimeSeries(data, start_time=self.start_time, sample_period=self.sample_period)
+        assert numpy.shares_memory(ts.data, data)
+        ts[0] = 1.0
+        assert not numpy.shares_memory(ts.data, data)
+
+    def test_timeseries_labels_indices(self):
+        ts = TimeSeries(self.data_3D,
+                        labels_dimensions={TimeSeriesDimensions.SPACE.value: numpy.array(["r1", "r2", "r1"])},
+                        labels_ordering=LABELS_ORDERING,
+                        start_time=self.start_time, sample_period=self.sample_period,
+                        sample_period_unit=self.sample_period_unit)
+        # As with list.index(), the first occurrence of a repeated label is returned
+        assert ts.get_indices_for_labels(["r2", "r1"]) == [1, 0]
+        assert ts.get_indices_for_labels(numpy.array(["r2"])) == [1]
+
+        with pytest.raises(IndexError):
+            ts.get_indices_for_labels(["r5"])
+
+        ts.labels_dimensions[TimeSeriesDimensions.SPACE.value] = numpy.array(["r3", "r2", "r1"])
+        assert ts.get_indices_for_labels(["r2", "r1"]) == [1, 2]
+
+        ts.update_dimension_names(TimeSeriesDimensions.REGIONS.value, 2)
+        assert ts.get_subspace_by_label(["r1", "r3"]).data.shape == (3, 4, 2, 1)
+
+        # Labels are read-only, so that they cannot be modified in place, and cached indices go stale,
+        # whereas labels set anew are resolved to their own indices
+        with pytest.raises(ValueError):
+            ts.labels_dimensions[TimeSeriesDimensions.REGIONS.value][0] = "r4"
+        labels = ["r5", "r6", "r7"]
+        ts.labels_dimensions[TimeSeriesDimensions.REGIONS.value] = labels
+        assert ts.get_indices_for_labels(["r6"]) == [1]
+        labels[1] = "r8"
+        assert ts.get_indices_for_labels(["r6"]) == [1]
+        with pytest.raises(IndexError):
+            ts.get_indices_for_labels(["r3"])
+        ts.labels_dimensions = {TimeSeriesDimensions.REGIONS.value: ["r1", "r2", "r3"]}
+        assert ts.get_indices_for_labels(["r3"]) == [2]
+
+    def test_timeseries_slice_views(self):
+        data = numpy.random.rand(10, 2, 5, 1)
+        ts = TimeSeries(data=data,
+                        labels_dimensions={TimeSeriesDimensions.SPACE.value: ["r1", "r2", "r3", "r4", "r5"]},
+                        labels_ordering=LABELS_ORDERING,
+                        start_time=self.start_time, sample_period=self.sample_period,
+                        sample_period_unit=self.sample_period_unit)
+        # Contiguous and strided slices, as well as regularly spaced indices, return views of the data
+        ts_slice = ts.slice_data_across_dimension_by_slice(slice(1, 4), 2)
+        assert numpy.shares_memory(ts_slice.data, ts.data)
+        assert ts_slice.space_labels.tolist() == ["r2", "r3", "r4"]
+        ts_slice = ts.slice_data_across_dimension_by_slice(slice(0, 5, 2), 2)
+        assert numpy.shares_memory(ts_slice.data, ts.data)
+        assert numpy.array_equal(ts_slice.data, data[:, :, ::2])
+        ts_slice = ts.slice_data_across_dimension_by_label("r4", 2)
+        assert numpy.shares_memory(ts_slice.data, ts.data)
+        assert ts_slice.data.shape == (10, 2, 1, 1)
+        # Irregular indices return copies
+        ts_slice = ts.slice_data_across_dimension_by_index([4, 0], 2)
+        assert not numpy.shares_memory(ts_slice.data, ts.data)
+        assert ts_slice.space_labels.tolist() == ["r5", "r1"]
+        # Views are copied when written to, leaving the sliced TimeSeries unchanged
+        data = numpy.array(data)
+        ts_slice = ts.get_subspace_by_slice(slice(0, 5, 2))
+        ts_slice[...] = 7.0
+        assert numpy.all(ts_slice.data == 7.0)
+        assert numpy.array_equal(ts.data, data)
+
+    def test_timeseries_data_from_slice(self):
+        data = numpy.random.rand(10, 3, 5, 2)
+        ts = TimeSeries(data=data,
+                        labels_dimensions={TimeSeriesDimensions.SPACE.value: ["r1", "r2", "r3", "r4", "r5"],
+                                           TimeSeriesDimensions.VARIABLES.value: ["sv1", "sv2", "sv3"]},
+                        labels_ordering=LABELS_ORDERING,
+                        start_time=self.start_time, sample_period=self.sample_period,
+                        sample_period_unit=self.sample_period_unit)
+        ts_slice = ts.get_data_from_slice((slice(2, 8, 2), ["sv1", "sv3"], ["r5", "r1"], 1))
+        assert numpy.array_equal(ts_slice.data, data[2:8:2][:, [0, 2]][:, :, [4, 0]][:, :, :, [1]])
+        assert ts_slice.space_labels.tolist() == ["r5", "r1"]
+        assert ts_slice.variables_labels.tolist() == ["sv1", "sv3"]
+        assert ts_slice.start_time == self.start_time + 2 * self.sample_period
+        assert ts_slice.sample_period == 2 * self.sample_period
+        # Only basic slices result in a view of the data
+        ts_slice = ts.get_data_from_slice((slice(2, 8), "sv2", slice("r2", "r4")))
+        assert ts_slice.data.shape == (6, 1, 3, 2)
+        assert numpy.shares_memory(ts_slice.data, ts.data)
+        # Arrays of labels, and labels mixed with indices and slices, are resolved in order
+        ts_slice = ts.get_data_from_slice((slice(None), slice(None), numpy.array(["r4", "r2", "r4"])))
+        assert numpy.array_equal(ts_slice.data, data[:, :, [3, 1, 3]])
+        ts_slice = ts.slice_data_across_dimensions({2: ["r5", 0, slice(1, 3), "r4"]})
+        assert ts_slice.space_labels.tolist() == ["r5", "r1", "r2", "r3", "r4"]
+        with pytest.raises(IndexError):
+            ts.get_data_from_slice((slice(None), slice(None), ["r2", "r6"]))
+
+    def test_timeseries_regular_time_axis(self):
+        ts = TimeSeries(numpy.random.rand(1000, 1, 2, 1), start_time=0.01, sample_period=0.1,
+                        sample_period_unit=self.sample_period_unit)
+        assert isinstance(ts.time, RegularTimeAxis)
+        assert len(ts.time) == ts.time_length
+        assert numpy.allclose(ts.time, 0.01 + 0.1 * numpy.arange(1000))
+        assert ts._get_index_for_time_unit(0.31) == 3
+
+        ts_window = ts.get_time_window(10, 20)
+        assert ts_window.start_time == ts.time[10]
+        assert len(ts_window.time) == 10
+
+        # It behaves as an ndarray for arithmetic, comparisons, boolean masking and ndarray methods
+        time = numpy.array(ts.time)
+        assert numpy.array_equal(ts.time * 1000, time * 1000)
+        assert numpy.array_equal(ts.time - 1, time - 1) and numpy.array_equal(1 - ts.time, 1 - time)
+        assert numpy.array_equal(time + ts.time, 2 * time)
+        assert numpy.array_equal(ts.time > 3, time > 3)
+        assert numpy.array_equal(ts.time[ts.time > 3], time[time > 3])
+        assert ts.time.min() == time.min() and ts.time.max() == time.max()
+        assert ts.time.tolist() == time.tolist() and ts.time.astype("f").dtype == numpy.float32
+        time_copy = ts.time.copy()
+        time_copy[0] = -1.0
+        assert ts.time[0] == time[0]
+
+        # Regularly sampled input time vectors are replaced by a RegularTimeAxis...
+        ts = TimeSeries(self.data_2D, time=numpy.array([1.0, 1.5, 2.0]))
+        assert isinstance(ts.time, RegularTimeAxis)
+        assert ts.start_time == 1.0 and ts.sample_period == 0.5
+        # ...unlike irregular ones
+        ts = TimeSeries(self.data_2D, time=numpy.array([0.0, 0.5, 2.0]))
+        assert isinstance(ts.time, numpy.ndarray)
+        # A zero period, e.g., of a single sample, resolves any time to the first time point
+        assert RegularTimeAxis(1.0, 0.0, 1).index_of(3.0) == 0
+        assert RegularTimeAxis(1.0, 0.0, 3).index_of(0.0) == 0
+
+    def test_timeseries_windows(self):
+        data = numpy.random.rand(10, 2, 3, 1)
+        ts = TimeSeries(data, start_time=self.start_time, sample_period=self.sample_period,
+                        sample_period_unit=self.sample_period_unit)
+        windows = list(ts.iter_windows(4, 3))
+        assert len(windows) == 3
+        for i_window, window in enumerate(windows):
+            assert numpy.shares_memory(window.data, ts.data)
+            assert window.start_time == ts.time[3 * i_window]
+            assert numpy.array_equal(window.data, data[3 * i_window:3 * i_window + 4])
+        assert len(list(ts.iter_windows(5, as_time_series=False))) == 2
+
+        batched_windows = ts.get_windows(4, 3)
+        assert batched_windows.shape == (3, 4, 2, 3, 1)
+        assert numpy.shares_memory(batched_windows, ts.data)
+        for i_window, window in enumerate(windows):
+            assert numpy.array_equal(batched_windows[i_window], window.data)
+
+        # Writing to windows leaves the TimeSeries unchanged
+        data = numpy.array(data)
+        windows[0][...] = -1.0
+        assert numpy.all(windows[0].data == -1.0)
+        assert numpy.array_equal(ts.data, data)
+        for window in ts.iter_windows(5, as_time_series=False):
+            with pytest.raises(ValueError):
+                window[0] = -1.0
+        with pytest.raises(ValueError):
+            ts.get_windows(4, 3)[0, 0] = -1.0
+        assert numpy.array_equal(ts.data, data)
+
+        with pytest.raises(ValueError):
+            ts.get_windows(11)
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+import numpy
+import pytest
+from tvb_scripts.datatypes.time_series import TimeSeries as TimeSeriesNumpy, RegularTimeAxis
+from tvb_scripts.datatypes.time_series_xarray import TimeSeries
+
+
+class TestTimeseriesXarray(object):
+    start_time = 0.0
+    sample_period = 0.5
+    labels_ordering = ["Time", "State Variable", "Region", "Mode"]
+    labels_dimensions = {"State Variable": ["x1", "x2", "z"]}
+
+    def _prepare_time_series(self):
+        data = numpy.random.rand(100, 3, 4, 1)
+        return TimeSeries(data, start_time=self.start_time, sample_period=self.sample_period,
+                          labels_ordering=self.labels_ordering,
+                          labels_dimensions=dict(self.labels_dimensions))
+
+    def test_timeseries_cache(self):
+        ts = self._prepare_time_series()
+        version = ts.data_version
+        assert ts.time is ts.time
+        assert ts.sample_period == self.sample_period
+        assert ts.end_time == 49.5
+        # labels_dimensions can be modified without affecting the cached ones
+        labels_dimensions = ts.labels_dimensions
+        labels_dimensions["State Variable"] = ["a", "b", "c"]
+        assert ts.labels_dimensions["State Variable"].tolist() == self.labels_dimensions["State Variable"]
+        assert ts._get_index_for_slice_label("z", 1) == 2
+        with pytest.raises(ValueError):
+            ts._get_index_for_slice_label("x3", 1)
+        assert ts.data_version == version
+
+        # Writing to the data invalidates the cache
+        ts[0] = 1.0
+        assert ts.data_version != version
+        assert numpy.all(ts.data[0] == 1.0)
+
+        # A sliced TimeSeries has its own cache, derived from its own data
+        ts_slice = ts[10:20][:, "x2"]
+        assert ts_slice.data_version != ts.data_version
+        assert ts_slice.start_time == 5.0 and ts_slice.end_time == 9.5
+        assert ts_slice.sample_period == self.sample_period
+        assert ts_slice.labels_dimensions["State Variable"].tolist() == ["x2"]
+        assert ts.labels_dimensions["State Variable"].tolist() == self.labels_dimensions["State Variable"]
+
+    def test_timeseries_indexing(self):
+        ts = self._prepare_time_series()
+        data = ts.data
+        # Integers and slices of integers are positional indices
+        assert numpy.array_equal(ts[10:20, 1].data, data[10:20, 1:2])
+        assert numpy.array_equal(ts[10:20, "x2"].data, data[10:20, 1:2])
+        # Strings are labels, and a stop label is included
+        assert numpy.array_equal(ts[:, "x2":"z", [0, 3]].data, data[:, 1:3][:, :, [0, 3]])
+        assert numpy.array_equal(ts[:, ["z", 0]].data, data[:, [2, 0]])
+        # Floats along time are time points, and a stop time point is included
+        ts_slice = ts[5.0:9.5, "x1"]
+        assert ts_slice.start_time == 5.0 and ts_slice.end_time == 9.5
+        assert numpy.array_equal(ts_slice.data, data[10:20, :1])
+        assert numpy.array_equal(ts[..., 2:].data, data[:, :, :, 2:])
+        with pytest.raises(ValueError):
+            ts[:, "x3"]
+
+        ts[10:20, "x2"] = 0.0
+        assert numpy.all(ts.data[10:20, 1] == 0.0)
+        assert numpy.array_equal(ts.data[:10], data[:10])
+
+    def test_timeseries_chunked(self):
+        pytest.importorskip("dask")
+        from tvb_scripts.service.time_series_service import TimeSeriesService
+        service = TimeSeriesService()
+        ts = self._prepare_time_series()
+        ts_chunked = ts.chunk({"Time": 25, "Region": 2})
+        assert ts_chunked.is_chunked and not ts.is_chunked
+        assert ts_chunked.chunks == ((25, 25, 25, 25), (3,), (2, 2), (1,))
+        assert numpy.array_equal(ts_chunked.compute().data, ts.data)
+        assert ts_chunked.persist().is_chunked
+
+        # Processing remains lazy until compute()
+        for fun in [service.hilbert_envelope, service.detrend, service.square,
+                    lambda ts: service.normalize(ts, "zscore", axis=0),
+                    lambda ts: service.mean_across_dimension(ts, "Region")]:
+            ts_result = fun(ts_chunked)
+            assert ts_result.is_chunked
+            assert numpy.allclose(ts_result.compute().data, fun(ts).data)
+
+    def test_timeseries_numpy_conversion(self):
+        data = numpy.random.rand(100, 3, 4, 1)
+        ts_numpy = TimeSeriesNumpy(data, start_time=self.start_time, sample_period=self.sample_period,
+                                   labels_ordering=self.labels_ordering,
+                                   labels_dimensions=dict(self.labels_dimensions), title="Test")
+        # The input array is copied by the numpy TimeSeries, whose data buffer is then shared by the conversions
+        assert not numpy.shares_memory(ts_numpy.data, data)
+        data = ts_numpy.data
+        ts = TimeSeries(ts_numpy)
+        assert numpy.shares_memory(ts.data, data)
+        assert ts.title == "Test" and ts.sample_period == self.sample_period
+        # The labels of the numpy TimeSeries are not modified
+        assert list(ts_numpy.labels_dimensions.keys()) == ["State Variable"]
+
+        ts_numpy_back = ts.to_TVB_time_series()
+        assert numpy.shares_memory(ts_numpy_back.data, data)
+        assert isinstance(ts_numpy_back.time, RegularTimeAxis)
+        assert ts_numpy_back.time == ts_numpy.time
+        assert ts_numpy_back.labels_ordering == ts_numpy.labels_ordering
+        assert ts_numpy_back.variables_labels.tolist() == self.labels_dimensions["State Variable"]
+        assert ts_numpy_back.start_time == ts_numpy.start_time and ts_numpy_back.sample_period == self.sample_period
+        # Conversions skip configure(), but set default integer labels, as configure() does
+        assert ts.labels_dimensions["Region"].tolist() == [0, 1, 2, 3] and ts.title == "Test"
+        # Irregular time vectors are converted as they are
+        time = numpy.cumsum(numpy.random.rand(100))
+        ts_irregular = TimeSeries(ts_numpy.duplicate(time=time)).to_TVB_time_series()
+        assert numpy.array_equal(ts_irregular.time, time) and ts_irregular.start_time == time[0]
+        assert numpy.shares_memory(ts_numpy.from_xarray_DataArray(ts._data).data, data)
+
+        # Data are shared in a copy-on-write way
+        ts[0] = 2.0
+        assert numpy.all(ts.data[0] == 2.0)
+        assert numpy.array_equal(ts_numpy.data, data) and numpy.all(data < 1.0)
+
+    def test_timeseries_indexing_large(self):
+        # Mixed label/integer selection on a 10k coordinates dimension,
+        # resolved via the cached label -> index dicts (see benchmarks/benchmark_timeseries_indexing.py for timings)
+        n_regions = 10000
+        ts = TimeSeries(numpy.random.rand(10, 3, n_regions, 1), start_time=self.start_time,
+                        sample_period=self.sample_period, labels_ordering=self.labels_ordering,
+                        labels_dimensions={"State Variable": ["x1", "x2", "z"],
+                                           "Region": ["r%d" % i_region for i_region in range(n_regions)]})
+        slice_tuple = (slice(None), "x2", ["r9000", 3, "r5000"])
+        assert ts._resolve_indices(slice_tuple) == (slice(None, None, None), [1], [9000, 3, 5000])
+        ts_slice = ts[slice_tuple]
+        assert numpy.array_equal(ts_slice.data, ts.data[:, 1:2][:, :, [9000, 3, 5000]])
+        assert ts_slice.labels_dimensions["Region"].tolist() == ["r9000", "r3", "r5000"]
+        with pytest.raises(ValueError):
+            ts[:, :, ["r10000"]]
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import os
+import numpy
+import pytest
+from tvb_scripts.datatypes.time_series_xarray import TimeSeries
+
+
+class TestZarrNetCDF(object):
+
+    def _prepare_time_series(self):
+        data = numpy.random.rand(100, 2, 4, 1)
+        return TimeSeries(data, start_time=1.0, sample_period=0.5, sample_period_unit="ms",
+                          labels_ordering=["Time", "State Variable", "Region", "Mode"],
+                          labels_dimensions={"State Variable": ["x1", "z"], "Region": ["r1", "r2", "r3", "r4"]})
+
+    def _assert_time_series(self, ts_read, ts):
+        assert numpy.array_equal(ts_read.data, ts.data)
+        assert ts_read.labels_ordering == ts.labels_ordering
+        assert ts_read.labels_dimensions["Region"].tolist() == ["r1", "r2", "r3", "r4"]
+        assert ts_read.start_time == ts.start_time
+        assert ts_read.sample_period == ts.sample_period
+        assert ts_read.sample_period_unit == ts.sample_period_unit
+
+    def test_zarr_time_series(self, tmpdir):
+        pytest.importorskip("zarr")
+        pytest.importorskip("dask")
+        from tvb_scripts.io.zarr_netcdf import initialize_zarr_time_series, write_zarr_time_series, \
+            read_zarr_time_series
+        ts = self._prepare_time_series()
+        path = os.path.join(str(tmpdir), "ts.zarr")
+        write_zarr_time_series(ts, path, chunks={"Time": 25, "Region": 2}, compressor="lz4")
+        ts_zarr = read_zarr_time_series(path)
+        # The store is reopened lazily, with its chunks
+        assert ts_zarr.chunks == ((25, 25, 25, 25), (2,), (2, 2), (1,))
+        self._assert_time_series(ts_zarr, ts)
+
+        # Regions of an initialized store are written independently, e.g., by different processes
+        path = os.path.join(str(tmpdir), "ts_regions.zarr")
+        initialize_zarr_time_series(ts, path, chunks={"Region": 1})
+        for i_region in range(4):
+            write_zarr_time_series(ts[:, :, i_region], path, region={"Region": slice(i_region, i_region + 1)})
+        self._assert_time_series(read_zarr_time_series(path, chunks=None), ts)
+
+    def test_netcdf_time_series(self, tmpdir):
+        pytest.importorskip("netCDF4")
+        pytest.importorskip("dask")
+        from tvb_scripts.io.zarr_netcdf import write_netcdf_time_series, read_netcdf_time_series
+        ts = self._prepare_time_series()
+        path = os.path.join(str(tmpdir), "ts.nc")
+        write_netcdf_time_series(ts, path, chunks={"Time": 50})
+        ts_netcdf = read_netcdf_time_series(path)
+        assert ts_netcdf.is_chunked
+        self._assert_time_series(ts_netcdf, ts)
+        ts_netcdf = read_netcdf_time_series(path, chunks=None)
+        assert not ts_netcdf.is_chunked
+        self._assert_time_series(ts_netcdf, ts)
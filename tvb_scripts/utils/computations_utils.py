@@ -86,13 +86,25 @@ def select_greater_values_2Darray_inds(values, threshold=None, percentile=None,
         select_greater_values_array_inds(values.flatten(), threshold, percentile, nvals, verbose), values.shape)
 
 
+def _agglomerative_clustering(n_groups, affinity="precomputed", connectivity=None):
+    try:
+        return AgglomerativeClustering(n_groups, metric=affinity, linkage="average", connectivity=connectivity)
+    except TypeError:
+        # scikit-learn < 1.2
+        return AgglomerativeClustering(n_groups, affinity=affinity, linkage="average", connectivity=connectivity)
+
+
 def select_by_hierarchical_group_metric_clustering(distance, disconnectivity=np.array([]), metric=None,
-                                                   n_groups=10, members_per_group=1):
-    if disconnectivity.shape == distance.shape:
+                                                   n_groups=10, members_per_group=1, connectivity=None,
+                                                   affinity="precomputed"):
+    # distance is a precomputed distance matrix, or, for any other affinity, e.g., "cosine",
+    # the (n_samples, n_features) data, whose distances are computed only for the pairs of samples connected in
+    # connectivity, if given, e.g., a sparse k-nearest neighbors graph, instead of for all pairs.
+    if disconnectivity.shape == distance.shape and affinity == "precomputed":
         distance += disconnectivity * distance.max()
 
     n_groups = np.minimum(np.maximum(n_groups, 3), n_groups // members_per_group)
-    clustering = AgglomerativeClustering(n_groups, affinity="precomputed", linkage="average")
+    clustering = _agglomerative_clustering(n_groups, affinity, connectivity)
     clusters_labels = clustering.fit_predict(distance)
     selection = []
     for cluster_id in range(len(np.unique(clusters_labels))):
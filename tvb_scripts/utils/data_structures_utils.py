@@ -587,6 +587,14 @@ def squeeze_array_to_scalar(arr):
         return arr
 
 
+def read_only_view(arr):
+    # A view of arr, sharing its buffer, which cannot be written to.
+    # The input array itself remains writeable.
+    view = arr.view()
+    view.flags.writeable = False
+    return view
+
+
 def assert_arrays(params, shape=None, transpose=False):
     # type: (object, object) -> object
     if shape is None or \
@@ -1,15 +1,149 @@
 # coding=utf-8
+import os
+from concurrent.futures import ThreadPoolExecutor
 from six import string_types
 from itertools import cycle
-from matplotlib.mlab import demean
+from functools import lru_cache
 import numpy as np
-from scipy.stats import zscore
-from scipy.signal import butter, filtfilt, welch, periodogram, spectrogram, decimate
+from scipy import fft as sp_fft
+from scipy.signal import butter, sosfiltfilt, convolve, fftconvolve, oaconvolve, welch, periodogram, spectrogram, \
+    decimate
 from scipy.interpolate import interp1d, griddata
-from tvb_scripts.utils.log_error_utils import raise_value_error
+from scipy.sparse import csr_matrix
+from tvb_scripts.utils.log_error_utils import initialize_logger, raise_value_error, warning
 from tvb_scripts.utils.data_structures_utils import ensure_list, isequal_string
 
 
+logger = initialize_logger(__name__)
+
+
+# Precision policy:
+
+# dtype: the floating point dtype of the results of time series processing,
+#        or None, for keeping the floating point dtype of the input data (float64 for any other input data).
+# upcast: "warn", "raise" or "ignore", when a processing step would upcast its results beyond that dtype.
+PRECISION_POLICY = {"dtype": None, "upcast": "warn"}
+
+UPCAST_POLICIES = ["warn", "raise", "ignore"]
+
+
+def set_precision(dtype=None, upcast="warn"):
+    if dtype is not None:
+        dtype = np.dtype(dtype)
+        if not np.issubdtype(dtype, np.floating):
+            raise_value_error("Precision dtype %s is not a floating point dtype!" % str(dtype), logger)
+    if upcast not in UPCAST_POLICIES:
+        raise_value_error("Upcast policy %s is not one of %s!" % (str(upcast), str(UPCAST_POLICIES)), logger)
+    PRECISION_POLICY["dtype"] = dtype
+    PRECISION_POLICY["upcast"] = upcast
+
+
+def get_precision_dtype(x=None):
+    # The floating point dtype of the results of processing x, according to the precision policy
+    if PRECISION_POLICY["dtype"] is not None:
+        return np.dtype(PRECISION_POLICY["dtype"])
+    if x is not None and np.issubdtype(x.dtype, np.floating):
+        return x.dtype
+    return np.dtype("float64")
+
+
+def ensure_precision(y, dtype, step=""):
+    # If y has been upcast beyond dtype, cast it back to dtype, after warning, or raise, according to the policy
+    dtype = np.dtype(dtype)
+    if y.dtype.kind == dtype.kind and y.dtype.itemsize > dtype.itemsize:
+        msg = "%s upcast its results from %s to %s!" % (step, str(dtype), str(y.dtype))
+        if PRECISION_POLICY["upcast"] == "raise":
+            raise_value_error(msg, logger)
+        elif PRECISION_POLICY["upcast"] == "warn":
+            warning(msg + " Casting them back to %s." % str(dtype), logger)
+        y = y.astype(dtype)
+    return y
+
+
+# Parallel processing of signals:
+
+# Memory of a chunk of signals, in bytes, which should fit in the cache of a core
+DEFAULT_CHUNK_MEMORY = 2 ** 22
+
+
+def get_n_jobs(n_jobs=1):
+    # n_jobs < 0 means all cores, e.g., -1, or all but one, -2, etc
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return max(1, n_jobs)
+
+
+def apply_along_time(fun, data, n_jobs=1, chunk_memory=DEFAULT_CHUNK_MEMORY, out=None):
+    # Apply fun, which processes each signal along the first (time) axis independently, to data.
+    # The signals, i.e., all other axes flattened, are split in chunks small enough to fit in the cache of a core,
+    # which fun processes in a pool of n_jobs threads (scipy.signal filtering and numpy ffts release the GIL).
+    # Chunks depend only on chunk_memory, and not on n_jobs, so that results are identical for any n_jobs.
+    # If out is given, e.g., data themselves, the results of each chunk are written to it,
+    # so that only the temporaries of the chunks being processed are allocated,
+    # unless out is not contiguous, in which case the results are written to a temporary, which is copied to out.
+    _check_out(data, out)
+    if data.ndim < 2:
+        return _write_to_out(fun(data), out)
+    shape = data.shape
+    signals = data.reshape((shape[0], -1))
+    n_signals = signals.shape[1]
+    chunk_size = int(max(1, chunk_memory // max(1, shape[0] * signals.itemsize)))
+    if chunk_size >= n_signals:
+        return _write_to_out(fun(data), out)
+    chunks = [signals[:, i_start:i_start + chunk_size] for i_start in range(0, n_signals, chunk_size)]
+    out_signals = None
+    if out is not None:
+        # A view of out, of the shape of the signals, which fails, instead of copying, if out is not contiguous
+        try:
+            out_signals = out.view()
+            out_signals.shape = (out.shape[0], n_signals) + out.shape[data.ndim:]
+        except AttributeError:
+            out_signals = None
+    n_jobs = min(get_n_jobs(n_jobs), len(chunks))
+    if n_jobs > 1:
+        with ThreadPoolExecutor(n_jobs) as executor:
+            result = _gather_chunks(executor.map(fun, chunks), n_signals, out_signals)
+    else:
+        result = _gather_chunks((fun(chunk) for chunk in chunks), n_signals, out_signals)
+    if out is not None and out_signals is not None:
+        return out
+    # fun may add trailing axes to its results, e.g., for the bands of a filter bank
+    return _write_to_out(result.reshape((result.shape[0],) + shape[1:] + result.shape[2:]), out)
+
+
+def _check_out(data, out=None):
+    # out has to be a writeable array, of the shape of data along all axes but time, and of a dtype data cast to
+    if out is None:
+        return
+    if not isinstance(out, np.ndarray) or not out.flags.writeable or out.shape[1:data.ndim] != data.shape[1:] or \
+            not np.can_cast(data.dtype, out.dtype, "same_kind"):
+        if isinstance(out, np.ndarray):
+            out = "array of shape %s, dtype %s, writeable=%s" % (str(out.shape), str(out.dtype), out.flags.writeable)
+        raise_value_error("Cannot write the results of data of shape %s and dtype %s to out %s!"
+                          % (str(data.shape), str(data.dtype), str(out)), logger)
+
+
+def _write_to_out(result, out=None):
+    if out is None:
+        return result
+    out[...] = result
+    return out
+
+
+def _gather_chunks(results, n_signals, result=None):
+    # Write the results of successive chunks of signals to the result,
+    # allocated, unless given, once its shape and dtype are known
+    i_start = 0
+    for chunk_result in results:
+        if result is None:
+            result = np.empty((chunk_result.shape[0], n_signals) + chunk_result.shape[2:], dtype=chunk_result.dtype)
+        result[:, i_start:i_start + chunk_result.shape[1]] = chunk_result
+        i_start += chunk_result.shape[1]
+    return result
+
+
 # Pointwise analyzers:
 
 # x is assumed to be data (real numbers) arranged along the first dimension of an ndarray
@@ -23,35 +157,192 @@ def interval_scaling(x, min_targ=0.0, max_targ=1.0, min_orig=None, max_orig=None
     return min_targ + (x - min_orig) * scale_factor
 
 
-def abs_envelope(x):
-    x_mean = x.mean(axis=0) * np.ones(x.shape[1:])
+def abs_envelope(x, out=None):
+    # x is never modified, unless it is out, i.e., for an in place envelope.
+    # The envelope is written to out, if given, otherwise to a new array.
+    x_mean = x.mean(axis=0)
     # Mean center each signal
-    x -= x_mean
+    out = np.subtract(x, x_mean, out=out)
     # Compute the absolute value and add back the mean
-    return np.abs(x) + x_mean
+    np.abs(out, out=out)
+    out += x_mean
+    return out
 
 
-def spectrogram_envelope(x, fs, lpf=None, hpf=None, nperseg=None):
-    envelope = []
-    for xx in x.T:
-        F, T, C = spectrogram(xx, fs, nperseg=nperseg)
-        fmask = np.ones(F.shape, 'bool')
-        if hpf:
-            fmask *= F > hpf
-        if lpf:
-            fmask *= F < lpf
-        envelope.append(C[fmask].sum(axis=0))
-    return np.array(envelope).T, T
+def spectrogram_envelope(x, fs, lpf=None, hpf=None, nperseg=None, bands=None, n_jobs=1):
+    # The power of the spectrogram of x along its first (time) axis, summed within the (hpf, lpf) band,
+    # for all signals of any other axes at once (in chunks, processed by n_jobs threads, see apply_along_time()).
+    # If bands are given, as (lowcut, highcut) pairs, where either may be None, the envelopes of all of them are
+    # extracted from the same spectrogram, and stacked along a new last axis.
+    # Return the envelope(s), with the segments' times as first axis, and those times.
+    dtype = get_precision_dtype(x)
+    x = np.asarray(x).astype(dtype, copy=False)
+    if bands is None:
+        band_list = [(hpf, lpf)]
+    else:
+        band_list = list(bands)
+    segments_times = []
+
+    def envelope(signals):
+        F, T, C = spectrogram(signals, fs, nperseg=nperseg, axis=0)
+        if len(segments_times) == 0:
+            segments_times.append(T)
+        fmasks = []
+        for lowcut, highcut in band_list:
+            fmask = np.ones(F.shape, 'bool')
+            if lowcut:
+                fmask *= F > lowcut
+            if highcut:
+                fmask *= F < highcut
+            fmasks.append(fmask)
+        # Sum the power within each band, and move the segments' times to the first axis
+        y = np.stack([np.moveaxis(C[fmask].sum(axis=0), -1, 0) for fmask in fmasks], axis=-1)
+        if bands is None:
+            return y[..., 0]
+        return y
+
+    y = apply_along_time(envelope, x, n_jobs)
+    return ensure_precision(y, dtype, "spectrogram_envelope"), segments_times[0]
 
 
 # Time domain:
 
-def decimate_signals(signals, time, decim_ratio):
+def moving_average(x, win_len, scale=None):
+    # Convolution in "same" mode, along the first (time) axis, with a boxcar kernel of win_len points,
+    # each one equal to scale (default 1/win_len, i.e., the moving average), in O(N), via cumulative sums.
+    # Signals are centered first, so that the precision of the cumulative sums does not degrade with their length.
+    dtype = get_precision_dtype(x)
+    x = np.asarray(x)
+    win_len = int(win_len)
+    if scale is None:
+        scale = 1.0 / win_len
+    n_times = x.shape[0]
+    mean = np.mean(x, axis=0, dtype=np.float64)
+    cumsum = np.zeros((n_times + 1,) + x.shape[1:])
+    np.cumsum(np.subtract(x, mean, dtype=np.float64), axis=0, out=cumsum[1:])
+    # The window of each output point i is [i + shift - win_len + 1, i + shift], clipped to the signals
+    shift = (win_len - 1) // 2
+    i_ends = np.clip(np.arange(n_times) + shift + 1, 0, n_times)
+    i_starts = np.clip(np.arange(n_times) + shift - win_len + 1, 0, n_times)
+    y = cumsum[i_ends]
+    y -= cumsum[i_starts]
+    y += (i_ends - i_starts).reshape((-1,) + (1,) * (x.ndim - 1)) * mean
+    y *= scale
+    # Cumulative sums are accumulated in float64 on purpose, and cast back to the precision of the data
+    return ensure_precision(y.astype(dtype, copy=False), dtype, "moving_average")
+
+
+def _analytic_signal(x, n_fft):
+    # The analytic signal of x along its first (time) axis, as scipy.signal.hilbert,
+    # but via ffts of length n_fft, zero padded, and in the precision of x
+    x_fft = sp_fft.fft(x, n_fft, axis=0)
+    h = np.zeros(n_fft, dtype=x_fft.real.dtype)
+    h[0] = 1
+    h[1:(n_fft + 1) // 2] = 2
+    if n_fft % 2 == 0:
+        h[n_fft // 2] = 1
+    x_fft *= h.reshape((-1,) + (1,) * (x.ndim - 1))
+    return sp_fft.ifft(x_fft, axis=0, overwrite_x=True)[:x.shape[0]]
+
+
+# Overlap of time blocks of the hilbert envelope, as a fraction of their length, if not given
+DEFAULT_HILBERT_OVERLAP = 0.1
+
+
+def hilbert_envelope(x, n_jobs=1, max_memory=None, block_length=None, overlap=None):
+    # The envelope of the analytic signal of x along its first (time) axis, via ffts of fast (zero padded) lengths,
+    # in chunks of signals, processed in parallel by n_jobs threads (see apply_along_time()).
+    # The complex temporaries of all threads fit in max_memory bytes, if given, otherwise, each chunk fits in cache.
+    # Signals too long for max_memory, or longer than block_length, if given, are processed in time blocks,
+    # extended by overlap points (default 10% of block_length) on both sides, which are trimmed afterwards,
+    # so that the edge effects of each block are (approximately) avoided.
+    dtype = get_precision_dtype(x)
+    x = np.asarray(x).astype(dtype, copy=False)
+    n_times = x.shape[0]
+    n_jobs = get_n_jobs(n_jobs)
+    # Bytes per time point and signal of the complex temporaries, i.e., the fft and the analytic signal
+    complex_memory = 2 * 2 * np.dtype(dtype).itemsize
+    chunk_memory = DEFAULT_CHUNK_MEMORY
+    max_signal_length = None
+    if max_memory is not None:
+        max_signal_length = int(max_memory // (n_jobs * complex_memory))
+        if block_length is None and n_times > max_signal_length:
+            if overlap is None:
+                block_length = int(max_signal_length / (1.0 + 2 * DEFAULT_HILBERT_OVERLAP))
+            else:
+                block_length = max_signal_length - 2 * int(overlap)
+            if block_length < 1:
+                raise_value_error("max_memory of %d bytes is too small for the hilbert envelope!" % max_memory,
+                                  logger)
+    if block_length is None or block_length >= n_times:
+        block_length = n_times
+        overlap = 0
+    elif overlap is None:
+        overlap = int(np.ceil(DEFAULT_HILBERT_OVERLAP * block_length))
+    block_length = int(block_length)
+    overlap = int(overlap)
+
+    def get_n_fft(n_points):
+        # Zero pad to a fast fft length, unless it exceeds max_memory
+        n_fft = sp_fft.next_fast_len(n_points)
+        if max_signal_length is not None and n_fft > max_signal_length:
+            return n_points
+        return n_fft
+
+    if max_memory is not None:
+        signals_memory = complex_memory * get_n_fft(min(block_length + 2 * overlap, n_times))
+        # chunk_memory of apply_along_time() is that of the input signals
+        chunk_memory = max(1, max_memory // (n_jobs * signals_memory)) * n_times * x.itemsize
+
+    def envelope(signals):
+        if block_length == n_times:
+            return np.abs(_analytic_signal(signals, get_n_fft(n_times)))
+        y = np.empty(signals.shape, dtype=dtype)
+        for i_start in range(0, n_times, block_length):
+            i_end = min(i_start + block_length, n_times)
+            i_block_start = max(0, i_start - overlap)
+            i_block_end = min(n_times, i_end + overlap)
+            block = signals[i_block_start:i_block_end]
+            y[i_start:i_end] = np.abs(_analytic_signal(block, get_n_fft(block.shape[0])))[
+                               i_start - i_block_start:i_end - i_block_start]
+        return y
+
+    return ensure_precision(apply_along_time(envelope, x, n_jobs, chunk_memory), dtype, "hilbert_envelope")
+
+
+# Kernels of up to this length are convolved directly, and longer ones via ffts
+DIRECT_CONVOLUTION_MAX_LENGTH = 16
+
+
+def convolve_along_time(x, kernel, n_jobs=1):
+    # Convolution in "same" mode, along the first (time) axis only, with a 1D kernel,
+    # directly for short kernels, by overlap-add for kernels much shorter than the signals, and by fft otherwise.
+    # Signals are convolved in chunks, by n_jobs threads (see apply_along_time()).
+    dtype = get_precision_dtype(x)
+    x = np.asarray(x).astype(dtype, copy=False)
+    kernel = np.asarray(kernel).astype(dtype, copy=False)
+    n_kernel_points = kernel.size
+    if n_kernel_points <= DIRECT_CONVOLUTION_MAX_LENGTH:
+        convolve_fun = lambda signals, kernel: convolve(signals, kernel, mode="same", method="direct")
+    elif x.shape[0] >= 8 * n_kernel_points:
+        convolve_fun = lambda signals, kernel: oaconvolve(signals, kernel, mode="same", axes=0)
+    else:
+        convolve_fun = lambda signals, kernel: fftconvolve(signals, kernel, mode="same", axes=0)
+
+    def convolve_signals(signals):
+        # The kernel extends along time only
+        return convolve_fun(signals, kernel.reshape((-1,) + (1,) * (signals.ndim - 1)))
+
+    return ensure_precision(apply_along_time(convolve_signals, x, n_jobs), dtype, "convolve")
+
+
+def decimate_signals(signals, time, decim_ratio, n_jobs=1):
     if decim_ratio > 1:
-        signals = decimate(signals, decim_ratio, axis=0, zero_phase=True, ftype="fir")
+        signals = apply_along_time(lambda x: decimate(x, decim_ratio, axis=0, zero_phase=True, ftype="fir"),
+                                   signals, n_jobs)
         time = decimate(time, decim_ratio, zero_phase=True, ftype="fir")
         dt = np.mean(np.diff(time))
-        (n_times, n_signals) = signals.shape
+        n_times = signals.shape[0]
         return signals, time, dt, n_times
 
 
@@ -62,40 +353,70 @@ def cut_signals_tails(signals, time, cut_tails):
     return signals, time, n_times
 
 
+def sum_of_squares(x, axis=None):
+    # Sum of the squares of x along axis, accumulated in float64, without any temporary arrays of the size of x
+    if axis is None:
+        return np.einsum("i,i->", x.ravel(), x.ravel(), dtype=np.float64)
+    dims = "abcdefghijklmnopqrstuvwxyz"[:x.ndim]
+    dims_out = dims.replace(dims[axis % x.ndim], "")
+    return np.einsum("%s,%s->%s" % (dims, dims, dims_out), x, x, dtype=np.float64)
+
+
 NORMALIZATION_METHODS = ["zscore", "mean", "min", "max", "baseline", "baseline-amplitude", "baseline-std", "minmax"]
 
 
-def normalize_signals(signals, normalization=None, axis=None, percent=None):
+def normalize_signals(signals, normalization=None, axis=None, percent=None, out=None):
     # Following pylab demean:
+    # signals are never modified, unless they are out, i.e., for in place normalization.
+    # The normalized signals are written to out, if given, otherwise to a new array,
+    # and all normalization steps after the first one are computed in place.
 
-    def matrix_subtract_along_axis(x, y, axis=0):
-        "Return x minus y, where y corresponds to some statistic of x along the specified axis"
+    dtype = get_precision_dtype(signals)
+    signals = np.asarray(signals).astype(dtype, copy=False)
+    input_signals = signals
+
+    def get_out(x):
+        # Write to out, if given, or in place, as soon as x is not the input signals
+        if out is not None:
+            return out
+        if x is input_signals:
+            return None
+        return x
+
+    def statistic_along_axis(x, y, axis=0):
+        # Statistics, e.g., percentiles, might be computed in a higher precision than x
+        y = np.asarray(y).astype(x.dtype, copy=False)
         if axis == 0 or axis is None or x.ndim <= 1:
-            return x - y
+            return y
         ind = [slice(None)] * x.ndim
         ind[axis] = np.newaxis
-        return x - y[ind]
+        return y[tuple(ind)]
+
+    def matrix_subtract_along_axis(x, y, axis=0):
+        "Return x minus y, where y corresponds to some statistic of x along the specified axis"
+        return np.subtract(x, statistic_along_axis(x, y, axis), out=get_out(x))
 
     def matrix_divide_along_axis(x, y, axis=0):
         "Return x divided by y, where y corresponds to some statistic of x along the specified axis"
-        if axis == 0 or axis is None or x.ndim <= 1:
-            return x / y
-        ind = [slice(None)] * x.ndim
-        ind[axis] = np.newaxis
-        return x / y[ind]
+        return np.divide(x, statistic_along_axis(x, y, axis), out=get_out(x))
 
     for norm, ax, prcnd in zip(ensure_list(normalization), cycle(ensure_list(axis)), cycle(ensure_list(percent))):
         if isinstance(norm, string_types):
             if isequal_string(norm, "zscore"):
-                signals = zscore(signals, axis=ax)  # / 3.0
+                signals = matrix_subtract_along_axis(signals, signals.mean(axis=ax), axis=ax)
+                # The std of the centered signals, without any temporary arrays of their size
+                n_points = signals.size if ax is None else signals.shape[ax]
+                std = np.sqrt(sum_of_squares(signals, axis=ax) / n_points)
+                signals = matrix_divide_along_axis(signals, std, axis=ax)  # / 3.0
             elif isequal_string(norm, "baseline-std"):
-                signals = normalize_signals(["baseline", "std"], axis=axis)
+                signals = normalize_signals(signals, ["baseline", "std"], axis=axis, out=get_out(signals))
             elif norm.find("baseline") == 0 and norm.find("amplitude") >= 0:
-                signals = normalize_signals(signals, ["baseline", norm.split("-")[1]], axis=axis, percent=percent)
+                signals = normalize_signals(signals, ["baseline", norm.split("-")[1]], axis=axis, percent=percent,
+                                            out=get_out(signals))
             elif isequal_string(norm, "minmax"):
-                signals = normalize_signals(signals, ["min", "max"], axis=axis)
+                signals = normalize_signals(signals, ["min", "max"], axis=axis, out=get_out(signals))
             elif isequal_string(norm, "mean"):
-                signals = demean(signals, axis=ax)
+                signals = matrix_subtract_along_axis(signals, signals.mean(axis=ax), axis=ax)
             elif isequal_string(norm, "baseline"):
                 if prcnd is None:
                     prcnd = 1
@@ -121,12 +442,123 @@ def normalize_signals(signals, normalization=None, axis=None, percent=None):
             else:
                 raise_value_error("Ignoring signals' normalization " + normalization +
                                   ",\nwhich is not one of the currently available " + str(NORMALIZATION_METHODS) + "!")
-    return signals
+    if out is not None and signals is not out:
+        # No normalization
+        out[...] = signals
+        signals = out
+    return ensure_precision(signals, dtype, "normalize_signals")
+
+
+# Correlation of very many signals:
+
+# The number of signals above which a dense correlation matrix is avoided, e.g., by select_by_correlation_power(),
+# in favor of the top k most correlated signals of each signal
+CORRELATION_DENSE_MAX_SIGNALS = 5000
+DEFAULT_CORRELATION_TOP_K = 10
+
+
+def standardize_signals(x, dtype=np.float32):
+    # Standardize the signals of x, i.e., all but its first (time) dimension flattened, once,
+    # to rows of zero mean and unit norm, so that their correlations are the dot products of the rows.
+    # Return the standardized signals, of shape (n_signals, n_times) and of dtype,
+    # and the norms of the demeaned signals, i.e., the square roots of their power.
+    # Constant signals are standardized to zeros, i.e., they are not correlated to any signal, not even themselves.
+    x = np.asarray(x)
+    x = x.reshape((x.shape[0], -1))
+    (n_times, n_signals) = x.shape
+    signals = np.empty((n_signals, n_times), dtype=dtype)
+    norms = np.empty((n_signals,))
+    # Chunks of signals, so that only their float64 temporaries are allocated
+    chunk_size = int(max(1, DEFAULT_CHUNK_MEMORY // max(1, 8 * n_times)))
+    for i_start in range(0, n_signals, chunk_size):
+        chunk = x[:, i_start:i_start + chunk_size].T.astype(np.float64)
+        constant = np.ptp(chunk, axis=1) == 0
+        chunk -= chunk.mean(axis=1, keepdims=True)
+        chunk_norms = np.sqrt(sum_of_squares(chunk, axis=1))
+        chunk_norms[constant] = 0.0
+        chunk /= np.where(constant, 1.0, chunk_norms)[:, np.newaxis]
+        chunk[constant] = 0.0
+        signals[i_start:i_start + chunk_size] = chunk
+        norms[i_start:i_start + chunk_size] = chunk_norms
+    return signals, norms
+
+
+def correlation_matrix(x, top_k=None, threshold=None, block_size=None, max_memory=DEFAULT_CHUNK_MEMORY,
+                       dtype=np.float32, path=None, n_jobs=1, standardized=False):
+    # Correlation matrix of the signals of x (see standardize_signals()),
+    # or of the rows of x, if they are already standardized, computed by tiles of rows, via BLAS, in dtype:
+    # - by default, as a dense (n_signals, n_signals) array, or, if path is given,
+    #   as a .npy file, memory mapped, to which the tiles are spilled, instead of being kept in memory,
+    # - if top_k is given, as the (n_signals, top_k) indices and correlations of the top_k most correlated other
+    #   signals of each signal, in descending order of correlation,
+    # - if threshold is given, as a sparse (CSR) matrix of the correlations of absolute value >= threshold,
+    #   without the diagonal.
+    # Tiles have block_size rows, or as many as fit max_memory, and are computed by a pool of n_jobs threads.
+    if top_k is not None and threshold is not None:
+        raise_value_error("Only one of top_k=%s and threshold=%s can be given!" % (str(top_k), str(threshold)))
+    if standardized:
+        signals = np.asarray(x).astype(dtype, copy=False)
+    else:
+        signals = standardize_signals(x, dtype)[0]
+    n_signals = signals.shape[0]
+    if top_k is not None:
+        top_k = int(min(top_k, n_signals - 1))
+        if top_k < 1:
+            raise_value_error("top_k=%s correlated signals are not available for %d signals!"
+                              % (str(top_k), n_signals))
+    if block_size is None:
+        block_size = max_memory // max(1, n_signals * signals.itemsize)
+    block_size = int(max(1, min(block_size, n_signals)))
+    blocks = [(i_start, min(i_start + block_size, n_signals)) for i_start in range(0, n_signals, block_size)]
+    if top_k is None and threshold is None:
+        if path is None:
+            result = np.empty((n_signals, n_signals), dtype=dtype)
+        else:
+            result = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(n_signals, n_signals))
+    else:
+        result = None
+
+    def correlation_tile(block):
+        (i_start, i_end) = block
+        tile = np.dot(signals[i_start:i_end], signals.T)
+        # Rounding errors should not let correlations exceed [-1.0, 1.0]
+        np.clip(tile, -1.0, 1.0, out=tile)
+        if result is not None:
+            result[i_start:i_end] = tile
+            return None
+        rows = np.arange(i_end - i_start)
+        if top_k is not None:
+            # Each signal is excluded from its own most correlated signals
+            tile[rows, rows + i_start] = -np.inf
+            indices = np.argpartition(-tile, top_k - 1, axis=1)[:, :top_k]
+            correlations = np.take_along_axis(tile, indices, axis=1)
+            order = np.argsort(-correlations, axis=1)
+            return np.take_along_axis(indices, order, axis=1), np.take_along_axis(correlations, order, axis=1)
+        selected = np.abs(tile) >= threshold
+        selected[rows, rows + i_start] = False
+        (tile_rows, cols) = np.nonzero(selected)
+        return tile_rows + i_start, cols, tile[tile_rows, cols]
+
+    n_jobs = min(get_n_jobs(n_jobs), len(blocks))
+    if n_jobs > 1:
+        with ThreadPoolExecutor(n_jobs) as executor:
+            tiles = list(executor.map(correlation_tile, blocks))
+    else:
+        tiles = [correlation_tile(block) for block in blocks]
+    if result is not None:
+        if path is not None:
+            result.flush()
+        return result
+    if top_k is not None:
+        return np.concatenate([tile[0] for tile in tiles]), np.concatenate([tile[1] for tile in tiles])
+    return csr_matrix((np.concatenate([tile[2] for tile in tiles]),
+                       (np.concatenate([tile[0] for tile in tiles]), np.concatenate([tile[1] for tile in tiles]))),
+                      shape=(n_signals, n_signals))
 
 
 # Frequency domain:
 
-def _butterworth_bandpass(fs, mode, lowcut, highcut, order=3):
+def _butterworth_bandpass(fs, mode, lowcut, highcut, order=3, output="ba"):
     """
     Build a diggital Butterworth filter
     """
@@ -136,23 +568,71 @@ def _butterworth_bandpass(fs, mode, lowcut, highcut, order=3):
         freqs.append(lowcut / nyq)  # normalize frequency
     if highcut is not None:
         freqs.append(highcut / nyq)  # normalize frequency
-    b, a = butter(order, freqs, btype=mode)     # btype : {'lowpass', 'highpass', 'bandpass', 'bandstop}, optional
-    return b, a
+    # btype : {'lowpass', 'highpass', 'bandpass', 'bandstop}, optional
+    return butter(order, freqs, btype=mode, output=output)
 
 
-def filter_data(data, fs, lowcut=None, highcut=None, mode='bandpass', order=3, axis=0):
-    # get filter coefficients
-    b, a = _butterworth_bandpass(fs, mode, lowcut, highcut, order)
-    # filter data
-    y = filtfilt(b, a, data, axis=axis)
-    # y = lfilter(b, a, data, axis=axis)
-    return y
+def get_filter_mode(lowcut=None, highcut=None, mode='bandpass'):
+    # Bands open on one side are lowpass or highpass ones
+    if lowcut is None:
+        return "lowpass"
+    if highcut is None:
+        return "highpass"
+    return mode
+
+
+@lru_cache(maxsize=256)
+def _sos_filter_design(fs, lowcut, highcut, mode, order):
+    sos = _butterworth_bandpass(fs, mode, lowcut, highcut, order, output="sos")
+    # The cached design is shared by all callers, and, therefore, read-only
+    sos.setflags(write=False)
+    return sos
+
+
+def design_sos_filter(fs, lowcut=None, highcut=None, mode='bandpass', order=3, dtype=np.float64):
+    # A Butterworth filter in second-order sections, which, unlike transfer function (b, a) coefficients,
+    # remain stable for high orders and narrow bands, relatively to the sampling frequency.
+    # Designs are cached, keyed by (fs, band, order, mode).
+    sos = _sos_filter_design(float(fs), None if lowcut is None else float(lowcut),
+                             None if highcut is None else float(highcut), mode, int(order))
+    # A (tiny) copy of the cached design, in the precision of the data, so that they are not upcast
+    return np.array(sos, dtype=dtype)
+
+
+def filter_data(data, fs, lowcut=None, highcut=None, mode='bandpass', order=3, axis=0, n_jobs=1):
+    dtype = get_precision_dtype(data)
+    data = np.asarray(data).astype(dtype, copy=False)
+    sos = design_sos_filter(fs, lowcut, highcut, mode, order, dtype)
+    y = np.moveaxis(apply_along_time(lambda x: sosfiltfilt(sos, x, axis=0), np.moveaxis(data, axis, 0), n_jobs),
+                    0, axis)
+    return ensure_precision(y, dtype, "filter_data")
+
+
+def filter_bank(data, fs, bands, mode='bandpass', order=3, axis=0, n_jobs=1):
+    # Filter data in all (lowcut, highcut) bands, where lowcut or highcut may be None for highpass or lowpass bands,
+    # in one pass over the data, i.e., all bands are applied to each chunk of signals, while it is in cache.
+    # The filtered signals of each band are stacked along a new last axis.
+    dtype = get_precision_dtype(data)
+    data = np.asarray(data).astype(dtype, copy=False)
+    soss = [design_sos_filter(fs, lowcut, highcut, get_filter_mode(lowcut, highcut, mode), order, dtype)
+            for lowcut, highcut in bands]
+
+    def filter_bands(x):
+        y = np.empty(x.shape + (len(soss),), dtype=dtype)
+        for i_band, sos in enumerate(soss):
+            y[..., i_band] = sosfiltfilt(sos, x, axis=0)
+        return y
+
+    y = np.moveaxis(apply_along_time(filter_bands, np.moveaxis(data, axis, 0), n_jobs), 0, axis)
+    return ensure_precision(y, dtype, "filter_bank")
 
 
 def spectral_analysis(x, fs, freq=None, method="periodogram", output="spectrum", nfft=None, window='hanning',
                       nperseg=256, detrend='constant', noverlap=None, f_low=10.0, log_scale=False):
+    dtype = get_precision_dtype(x)
+    x = np.asarray(x).astype(dtype, copy=False)
     if freq is None:
-        freq = np.linspace(f_low, nperseg, nperseg - f_low - 1)
+        freq = np.linspace(f_low, nperseg, int(nperseg - f_low - 1))
         df = freq[1] - freq[0]
     psd = []
     for iS in range(x.shape[1]):
@@ -177,12 +657,13 @@ def spectral_analysis(x, fs, freq=None, method="periodogram", output="spectrum",
                                  return_onesided=True,
                                  axis=0)
         f = interp1d(f, temp_psd)
-        temp_psd = f(freq)
+        # interp1d always returns float64
+        temp_psd = f(freq).astype(dtype)
         if output == "density":
             temp_psd /= (np.sum(temp_psd) * df)
         psd.append(temp_psd)
     # Stack them to a ndarray
-    psd = np.stack(psd, axis=1)
+    psd = ensure_precision(np.stack(psd, axis=1), dtype, "spectral_analysis")
     if output == "energy":
         return np.sum(psd, axis=0)
     else:
@@ -195,7 +676,7 @@ def time_spectral_analysis(x, fs, freq=None, mode="psd", nfft=None, window='hann
                            noverlap=None, f_low=10.0, calculate_psd=True, log_scale=False):
     # TODO: add a Continuous Wavelet Transform implementation
     if freq is None:
-        freq = np.linspace(f_low, nperseg, nperseg - f_low - 1)
+        freq = np.linspace(f_low, nperseg, int(nperseg - f_low - 1))
     stf = []
     for iS in range(x.shape[1]):
         f, t, temp_s = spectrogram(x[:, iS], fs=fs, nperseg=nperseg, nfft=nfft, window=window, mode=mode,